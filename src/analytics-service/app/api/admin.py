@@ -1,12 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from typing import Optional, List
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from app.database import SessionDep
 from app.api.dependencies import verify_admin_token
 from app.models.analytics import ClickEvent
 from app.core.stats import calculate_stats
 from app.core.export import export_stats_to_json, export_stats_to_xlsx, export_clicks_to_json, export_clicks_to_xlsx
+from app.core.analytics import parse_user_agent, get_locations_info, extract_real_ip
+from app.crud.analytics import create_click_events, get_click_deltas
+from app.schemas.analytics import ClickEventBatchCreate, ClickDeltasResponse
+from app.config import CLICK_DELTAS_MAX_EVENTS, CLICK_DELTAS_LAG_SECONDS
 from sqlmodel import select, func, Session
 
 admin_router = APIRouter()
@@ -43,6 +47,39 @@ def build_filtered_query(
             
     return base_query, start_dt, end_dt
 
+@admin_router.post("/events/batch", tags=["admin"])
+async def track_click_events_batch(
+    batch: ClickEventBatchCreate,
+    session: SessionDep,
+    admin_verified: bool = Depends(verify_admin_token)
+):
+    real_ips = [extract_real_ip({"x-forwarded-for": click_data.ip_address or ""}) for click_data in batch.events]
+    locations = await get_locations_info(real_ips)
+    event_data_list = []
+    for click_data, real_ip in zip(batch.events, real_ips):
+        location_info = locations[real_ip]
+        user_agent_info = parse_user_agent(click_data.user_agent)
+        
+        event_data = {
+            "event_id": click_data.event_id,
+            "url_id": click_data.url_id,
+            "user_id": click_data.user_id,
+            "ip_address": real_ip,
+            "user_agent": click_data.user_agent,
+            "referer": click_data.referer,
+            "country": location_info.get("country"),
+            "city": location_info.get("city"),
+            "device_type": user_agent_info.get("device_type"),
+            "browser": user_agent_info.get("browser"),
+            "os": user_agent_info.get("os")
+        }
+        if click_data.clicked_at:
+            event_data["clicked_at"] = click_data.clicked_at
+        event_data_list.append(event_data)
+    
+    accepted = create_click_events(session, event_data_list) if event_data_list else 0
+    return {"accepted": accepted, "duplicates": len(event_data_list) - accepted}
+
 @admin_router.get("/overview", tags=["admin"])
 async def admin_overview(
     session: SessionDep,
@@ -232,6 +269,24 @@ async def admin_export_raw_clicks(
         response.headers["Content-Disposition"] = "attachment; filename=admin_clicks.xlsx"
         return export_clicks_to_xlsx(events)
 
+@admin_router.get("/clicks/deltas", response_model=ClickDeltasResponse, tags=["admin"])
+async def get_clicks_deltas(
+    session: SessionDep,
+    admin_verified: bool = Depends(verify_admin_token),
+    after_id: int = Query(0, ge=0),
+    limit: int = Query(CLICK_DELTAS_MAX_EVENTS, ge=1, le=CLICK_DELTAS_MAX_EVENTS)
+):
+    settled_before = datetime.utcnow() - timedelta(seconds=CLICK_DELTAS_LAG_SECONDS)
+    last_event_id, has_more, rows = get_click_deltas(session, after_id, limit, settled_before)
+    return {
+        "last_event_id": after_id if last_event_id is None else last_event_id,
+        "has_more": has_more,
+        "deltas": [
+            {"url_id": url_id, "clicks": clicks, "last_clicked_at": last_clicked_at}
+            for url_id, clicks, last_clicked_at in rows
+        ]
+    }
+
 @admin_router.get("/clicks/{url_id}", tags=["admin"])
 async def get_url_clicks_count(
     url_id: int,
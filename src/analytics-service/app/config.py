@@ -9,6 +9,10 @@ USERS_SERVICE_URL = config("USERS_SERVICE_URL", default="http://easylink_users_s
 URL_SERVICE_URL = config("URL_SERVICE_URL", default="http://easylink_url_service:8001")
 
 MAX_EXPORT_RECORDS = config("MAX_EXPORT_RECORDS", default=100000, cast=int)
+CLICK_DELTAS_MAX_EVENTS = config("CLICK_DELTAS_MAX_EVENTS", default=50000, cast=int)
+CLICK_DELTAS_LAG_SECONDS = config("CLICK_DELTAS_LAG_SECONDS", default=30, cast=float)
+GEOLOCATION_CONCURRENCY = config("GEOLOCATION_CONCURRENCY", default=10, cast=int)
+GEOLOCATION_BATCH_TIMEOUT = config("GEOLOCATION_BATCH_TIMEOUT", default=2.0, cast=float)
 
 ADMIN_TOKEN = config("ADMIN_TOKEN", default="admin_secret_token_12345")
 
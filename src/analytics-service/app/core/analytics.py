@@ -1,9 +1,11 @@
 import re
-from typing import Optional, Dict, Any
+import asyncio
+from typing import Optional, Dict, Any, Iterable
 import httpx
 from user_agents import parse
 import os
 from ipaddress import ip_address, IPv4Address, IPv6Address
+from app.config import GEOLOCATION_CONCURRENCY, GEOLOCATION_BATCH_TIMEOUT
 
 def parse_user_agent(user_agent_string: str) -> Dict[str, Optional[str]]:
     try:
@@ -57,6 +59,26 @@ async def get_location_info(ip_address: str) -> Dict[str, Optional[str]]:
         "city": "Unknown"
     }
 
+async def get_locations_info(ip_addresses: Iterable[str]) -> Dict[str, Dict[str, Optional[str]]]:
+    semaphore = asyncio.Semaphore(GEOLOCATION_CONCURRENCY)
+
+    async def lookup(ip: str) -> Dict[str, Optional[str]]:
+        async with semaphore:
+            return await get_location_info(ip)
+
+    tasks = {ip: asyncio.create_task(lookup(ip)) for ip in set(ip_addresses)}
+    if tasks:
+        await asyncio.wait(tasks.values(), timeout=GEOLOCATION_BATCH_TIMEOUT)
+
+    locations = {}
+    for ip, task in tasks.items():
+        if task.done():
+            locations[ip] = task.result()
+        else:
+            task.cancel()
+            locations[ip] = {"country": "Unknown", "city": "Unknown"}
+    return locations
+
 def extract_real_ip(headers: dict) -> str:
     HOP_IP_HEADERS = [
         'x-forwarded-for',
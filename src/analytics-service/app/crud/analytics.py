@@ -1,5 +1,9 @@
-from sqlmodel import Session
+from sqlmodel import Session, select, func
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from typing import List, Optional, Tuple
 from app.models.analytics import ClickEvent
+from datetime import datetime
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,3 +19,64 @@ def create_click_event(session: Session, click_data: dict) -> ClickEvent:
         logger.error(f"Error creating click event: {e}")
         session.rollback()
         raise
+
+def create_click_events(session: Session, click_data_list: List[dict]) -> int:
+    event_ids = [click_data["event_id"] for click_data in click_data_list if click_data.get("event_id")]
+    for attempt in range(2):
+        seen = set()
+        if event_ids:
+            seen.update(session.exec(select(ClickEvent.event_id).where(ClickEvent.event_id.in_(event_ids))).all())
+        click_events = []
+        for click_data in click_data_list:
+            event_id = click_data.get("event_id")
+            if event_id:
+                if event_id in seen:
+                    continue
+                seen.add(event_id)
+            click_events.append(ClickEvent(**click_data))
+        try:
+            session.add_all(click_events)
+            session.commit()
+            return len(click_events)
+        except IntegrityError:
+            session.rollback()
+            if attempt:
+                raise
+        except Exception as e:
+            logger.error(f"Error creating click events batch: {e}")
+            session.rollback()
+            raise
+
+def get_click_deltas(
+    session: Session,
+    after_id: int,
+    limit: int,
+    settled_before: datetime
+) -> Tuple[Optional[int], bool, List[Tuple[int, int, datetime]]]:
+    # Ids are allocated before commit, so a lower id can still become visible
+    # after a higher one. Only ids up to the newest event received before
+    # settled_before are handed out, every lower id has committed by then.
+    settled_id = session.exec(
+        select(func.max(ClickEvent.id))
+        .where(or_(ClickEvent.received_at == None, ClickEvent.received_at < settled_before))
+    ).first()
+    if not settled_id or settled_id <= after_id:
+        return None, False, []
+    
+    event_ids = session.exec(
+        select(ClickEvent.id)
+        .where(ClickEvent.id > after_id, ClickEvent.id <= settled_id)
+        .order_by(ClickEvent.id)
+        .limit(limit + 1)
+    ).all()
+    if not event_ids:
+        return None, False, []
+    
+    has_more = len(event_ids) > limit
+    last_event_id = event_ids[:limit][-1]
+    rows = session.exec(
+        select(ClickEvent.url_id, func.count(ClickEvent.id), func.max(ClickEvent.clicked_at))
+        .where(ClickEvent.id > after_id, ClickEvent.id <= last_event_id)
+        .group_by(ClickEvent.url_id)
+    ).all()
+    return last_event_id, has_more, rows
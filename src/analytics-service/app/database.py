@@ -1,4 +1,5 @@
 from sqlmodel import create_engine, SQLModel, Session
+from sqlalchemy import inspect
 from typing import Annotated
 from fastapi import Depends
 import logging
@@ -9,10 +10,29 @@ logger = logging.getLogger(__name__)
 
 engine = create_engine(DATABASE_URL)
 
+def add_missing_columns(connection) -> None:
+    inspector = inspect(connection)
+    for table in SQLModel.metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            column_type = column.type.compile(dialect=connection.dialect)
+            connection.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}")
+            logger.info(f"Added column {table.name}.{column.name}")
+
+def create_missing_indexes(connection) -> None:
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
 def create_db_and_tables():
     logger.info("Initializing Analytics service database")
     try:
         SQLModel.metadata.create_all(engine)
+        with engine.begin() as connection:
+            add_missing_columns(connection)
+            create_missing_indexes(connection)
         logger.info("Analytics service database tables created successfully")
     except Exception as e:
         logger.error(f"Error creating Analytics service database tables: {e}")
@@ -6,6 +6,7 @@ class ClickEvent(SQLModel, table=True):
     __tablename__ = "click_events"
     
     id: Optional[int] = Field(default=None, primary_key=True)
+    event_id: Optional[str] = Field(default=None, unique=True, index=True)
     url_id: int = Field(index=True)
     user_id: Optional[int] = Field(default=None, index=True)
     ip_address: str
@@ -17,3 +18,4 @@ class ClickEvent(SQLModel, table=True):
     browser: Optional[str] = Field(default=None)
     os: Optional[str] = Field(default=None)
     clicked_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+    received_at: Optional[datetime] = Field(default_factory=datetime.utcnow)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
 from typing import Optional
 
@@ -7,6 +7,28 @@ class ClickEventCreate(BaseModel):
     user_agent: str
     referer: Optional[str] = None
 
+class ClickEventBatchItem(BaseModel):
+    event_id: Optional[str] = Field(default=None, max_length=64)
+    url_id: int
+    user_id: Optional[int] = None
+    user_agent: str
+    referer: Optional[str] = None
+    ip_address: Optional[str] = None
+    clicked_at: Optional[datetime] = None
+
+class ClickEventBatchCreate(BaseModel):
+    events: list[ClickEventBatchItem]
+
+class ClickDelta(BaseModel):
+    url_id: int
+    clicks: int
+    last_clicked_at: datetime
+
+class ClickDeltasResponse(BaseModel):
+    last_event_id: int
+    has_more: bool
+    deltas: list[ClickDelta]
+
 class ClickEventResponse(BaseModel):
     id: int
     url_id: int
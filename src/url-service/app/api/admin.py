@@ -1,17 +1,35 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import FileResponse
 from typing import Optional
 from datetime import datetime, timedelta
-from urllib.parse import urlparse
-import httpx
 import logging
 from app.database import SessionDep
-from app.crud.url import check_and_deactivate_expired_urls, get_url_by_id
-from app.api.dependencies import verify_admin_token
+from app.crud.url import (
+    check_and_deactivate_expired_urls, get_url_by_id, invalidate_cached_urls, apply_safety_verdicts,
+    list_urls_query, count_rows, apply_list_cursor, order_for_listing, paginate_rows
+)
+from app.api.dependencies import verify_admin_token, require_click_counts
 from app.schemas.url import UrlResponse, SafetyCheckRequest, SafetyCheckResponse
 from app.core.safe_browsing import safe_browsing_service
-from sqlmodel import select, func
+from app.core.cache import url_cache
+from app.core.bloom import short_code_filter
+from app.core.bots import is_social_media_bot
+from app.core.previews import preview_cache
+from app.core.qr import qr_cache
+from app.core.snapshot import redirect_snapshot
+from app.core.click_events import click_event_shipper
+from app.core.http_clients import upstream_clients
+from app.core.allocator import short_code_allocator
+from app.core.imports import import_jobs
+from app.core.security_rescan import security_rescan_job
+from app.core.expiry import expiry_scheduler
+from app.core.utils import to_naive_utc
+from app.core.counters import counter_reconciler
+from app.core.click_sync import click_count_sync
+from app.crud.counter import TOTAL_URLS, ACTIVE_URLS, created_day_key, get_counter, get_top_counters
+from sqlmodel import select
 from app.models.url import Url
-from app.config import ADMIN_TOKEN, ANALYTICS_SERVICE_URL
+from app.config import SAFE_BROWSING_BATCH_SIZE
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -43,16 +61,9 @@ async def get_urls_stats_summary(
     session: SessionDep,
     admin_verified: bool = Depends(verify_admin_token)
 ):
-    total_urls = session.exec(select(func.count(Url.id))).first() or 0
-    today = datetime.utcnow().date()
-    today_urls_query = select(func.count(Url.id)).where(
-        func.date(Url.created_at) == today
-    )
-    today_urls = session.exec(today_urls_query).first() or 0
-    active_urls_query = select(func.count(Url.id)).where(
-        Url.is_active == True
-    )
-    active_urls = session.exec(active_urls_query).first() or 0
+    total_urls = await get_counter(session, *TOTAL_URLS)
+    today_urls = await get_counter(session, *created_day_key(datetime.utcnow()))
+    active_urls = await get_counter(session, *ACTIVE_URLS)
     
     return {
         "total": total_urls,
@@ -66,19 +77,7 @@ async def get_popular_domains(
     admin_verified: bool = Depends(verify_admin_token),
     limit: int = Query(10, ge=1, le=50)
 ):
-    urls = session.exec(select(Url.original_url)).all()
-    domain_counts = {}
-    for original_url in urls:
-        try:
-            parsed = urlparse(original_url)
-            domain = parsed.netloc.lower()
-            if domain:
-                if domain.startswith('www.'):
-                    domain = domain[4:]
-                domain_counts[domain] = domain_counts.get(domain, 0) + 1
-        except Exception:
-            continue
-    popular_domains = sorted(domain_counts.items(), key=lambda x: x[1], reverse=True)[:limit]
+    popular_domains = await get_top_counters(session, "domain", limit)
     
     return {
         "domains": [
@@ -87,7 +86,7 @@ async def get_popular_domains(
         ]
     }
 
-def format_url_response(url, request: Request) -> UrlResponse:
+def format_url_response(url, request: Request, is_active: Optional[bool] = None) -> UrlResponse:
     base_url = f"{request.url.scheme}://{request.url.netloc}"
     return UrlResponse(
         id=url.id,
@@ -95,36 +94,125 @@ def format_url_response(url, request: Request) -> UrlResponse:
         short_code=url.short_code,
         short_url=f"{base_url}/{url.short_code}",
         user_id=url.user_id,
-        is_active=url.is_active,
+        is_active=url.is_active if is_active is None else is_active,
         has_password=url.password is not None,
         created_at=url.created_at,
         expires_at=url.expires_at,
         remaining_clicks=url.remaining_clicks,
         hide_thumbnail=url.hide_thumbnail,
         safety_check_status=url.safety_check_status,
-        safety_check_at=url.safety_check_at
+        safety_check_at=url.safety_check_at,
+        click_count=url.click_count,
+        last_clicked_at=url.last_clicked_at
     )
 
-async def get_clicks_count_for_url(url_id: int) -> int:
-    try:
-        async with httpx.AsyncClient() as client:
-            headers = {"Authorization": f"Bearer {ADMIN_TOKEN}"}
-            response = await client.get(f"{ANALYTICS_SERVICE_URL}/admin/clicks/{url_id}", headers=headers, timeout=5.0)
-            
-            if response.status_code == 200:
-                data = response.json()
-                return data.get("total_clicks", 0)
-            else:
-                return 0
-    except Exception as e:
-        return 0
+@router.get("/cache/stats")
+async def get_cache_stats(
+    admin_verified: bool = Depends(verify_admin_token)
+):
+    return {
+        "url_cache": url_cache.stats(),
+        "short_code_filter": short_code_filter.stats(),
+        "preview_cache": preview_cache.stats(),
+        "qr_cache": qr_cache.stats(),
+        "redirect_snapshot": redirect_snapshot.stats(),
+        "bot_verdicts": is_social_media_bot.cache_info()._asdict()
+    }
+
+@router.get("/safe-browsing/stats")
+async def get_safe_browsing_stats(
+    admin_verified: bool = Depends(verify_admin_token)
+):
+    return safe_browsing_service.stats()
+
+@router.get("/expiry/stats")
+async def get_expiry_stats(
+    admin_verified: bool = Depends(verify_admin_token)
+):
+    return expiry_scheduler.stats()
+
+@router.get("/click-sync/stats")
+async def get_click_sync_stats(
+    admin_verified: bool = Depends(verify_admin_token)
+):
+    return click_count_sync.stats()
+
+@router.get("/counters/stats")
+async def get_counters_stats(
+    admin_verified: bool = Depends(verify_admin_token)
+):
+    return counter_reconciler.stats()
+
+@router.get("/security-rescan/stats")
+async def get_security_rescan_stats(
+    session: SessionDep,
+    admin_verified: bool = Depends(verify_admin_token)
+):
+    return await security_rescan_job.stats(session)
+
+@router.get("/short-codes/stats")
+async def get_short_codes_stats(
+    admin_verified: bool = Depends(verify_admin_token)
+):
+    return short_code_allocator.stats()
+
+@router.get("/click-events/stats")
+async def get_click_events_stats(
+    admin_verified: bool = Depends(verify_admin_token)
+):
+    return click_event_shipper.stats()
+
+@router.get("/http-clients/stats")
+async def get_http_clients_stats(
+    admin_verified: bool = Depends(verify_admin_token)
+):
+    return upstream_clients.stats()
+
+@router.post("/imports")
+async def import_urls(
+    request: Request,
+    session: SessionDep,
+    admin_verified: bool = Depends(verify_admin_token),
+    format: str = Query("csv", pattern="^(csv|ndjson)$")
+):
+    job = import_jobs.create(format)
+    await job.run(session, request.stream())
+    return job.to_dict()
+
+@router.get("/imports")
+async def list_imports(
+    admin_verified: bool = Depends(verify_admin_token)
+):
+    return [job.to_dict() for job in import_jobs.list()]
+
+@router.get("/imports/{job_id}")
+async def get_import(
+    job_id: str,
+    admin_verified: bool = Depends(verify_admin_token)
+):
+    job = import_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import not found")
+    return job.to_dict()
+
+@router.get("/imports/{job_id}/failed")
+async def download_import_failures(
+    job_id: str,
+    admin_verified: bool = Depends(verify_admin_token)
+):
+    job = import_jobs.get(job_id)
+    if not job or not job.has_report:
+        raise HTTPException(status_code=404, detail="Failed rows report not found")
+    if job.status == "running":
+        raise HTTPException(status_code=409, detail="Import is still running")
+    return FileResponse(job.report_path, media_type="text/csv", filename=f"import-{job_id}-failed.csv")
 
 @router.post("/cleanup-expired")
 async def cleanup_expired_urls(
     session: SessionDep,
     admin_verified: bool = Depends(verify_admin_token)
 ):
-    count = check_and_deactivate_expired_urls(session)
+    count = await check_and_deactivate_expired_urls(session)
     return {"message": f"Deactivated {count} URLs"}
 
 @router.get("/urls")
@@ -140,77 +228,50 @@ async def get_all_urls(
     created_to: Optional[str] = Query(None),
     min_clicks: Optional[int] = Query(None, ge=0),
     max_clicks: Optional[int] = Query(None, ge=0),
-    domain: Optional[str] = Query(None)
+    domain: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None),
+    include_total: bool = Query(True),
+    sort: str = Query("created_at", pattern="^(created_at|clicks)$")
 ):
-    query = select(Url)
-    
-    if user_id is not None:
-        query = query.where(Url.user_id == user_id)
-    if is_active is not None:
-        query = query.where(Url.is_active == is_active)
+    require_click_counts(min_clicks, max_clicks, sort)
+    created_from_dt = None
+    created_to_dt = None
     
     if created_from:
         try:
-            created_from_dt = datetime.fromisoformat(created_from.replace('Z', '+00:00'))
-            query = query.where(Url.created_at >= created_from_dt)
+            created_from_dt = to_naive_utc(datetime.fromisoformat(created_from.replace('Z', '+00:00')))
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid created_from date format. Use ISO format.")
     
     if created_to:
         try:
-            created_to_dt = datetime.fromisoformat(created_to.replace('Z', '+00:00'))
-            query = query.where(Url.created_at <= created_to_dt)
+            created_to_dt = to_naive_utc(datetime.fromisoformat(created_to.replace('Z', '+00:00')))
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid created_to date format. Use ISO format.")
     
-    if domain:
-        query = query.where(Url.original_url.contains(f"://{domain}"))
+    base_query = list_urls_query(user_id, is_active, created_from_dt, created_to_dt, domain, min_clicks, max_clicks)
     
-    count_query = select(func.count(Url.id))
-    if user_id is not None:
-        count_query = count_query.where(Url.user_id == user_id)
-    if is_active is not None:
-        count_query = count_query.where(Url.is_active == is_active)
-    if created_from:
-        try:
-            created_from_dt = datetime.fromisoformat(created_from.replace('Z', '+00:00'))
-            count_query = count_query.where(Url.created_at >= created_from_dt)
-        except ValueError:
-            pass
-    if created_to:
-        try:
-            created_to_dt = datetime.fromisoformat(created_to.replace('Z', '+00:00'))
-            count_query = count_query.where(Url.created_at <= created_to_dt)
-        except ValueError:
-            pass
-    if domain:
-        count_query = count_query.where(Url.original_url.contains(f"://{domain}"))
+    try:
+        query = apply_list_cursor(base_query, cursor, sort)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if cursor:
+        skip = 0
     
-    total_count = session.exec(count_query).first()
+    total_count = None
+    if include_total:
+        total_count = (await session.exec(count_rows(base_query))).first()
     
-    if min_clicks is not None or max_clicks is not None:
-        all_urls = session.exec(query.order_by(Url.created_at.desc())).all()
-        
-        filtered_urls = []
-        for url in all_urls:
-            clicks_count = await get_clicks_count_for_url(url.id)
-            if min_clicks is not None and clicks_count < min_clicks:
-                continue
-            if max_clicks is not None and clicks_count > max_clicks:
-                continue
-            filtered_urls.append(url)
-        total_count = len(filtered_urls)
-        urls = filtered_urls[skip:skip + limit]
-    else:
-        query = query.order_by(Url.created_at.desc()).offset(skip).limit(limit)
-        urls = session.exec(query).all()
+    query = order_for_listing(query, sort).offset(skip).limit(limit + 1)
+    rows, next_cursor = paginate_rows((await session.exec(query)).all(), limit, sort)
     
-    formatted_urls = [format_url_response(url, request) for url in urls]
+    formatted_urls = [format_url_response(url, request, bool(url_is_active)) for url, url_is_active in rows]
     return {
         "urls": formatted_urls,
         "total": total_count,
-        "skip": skip,
+        "skip": None if cursor else skip,
         "limit": limit,
+        "next_cursor": next_cursor,
         "filters": {
             "user_id": user_id,
             "is_active": is_active,
@@ -218,7 +279,8 @@ async def get_all_urls(
             "created_to": created_to,
             "min_clicks": min_clicks,
             "max_clicks": max_clicks,
-            "domain": domain
+            "domain": domain,
+            "sort": sort
         }
     }
 
@@ -229,7 +291,7 @@ async def get_url_by_id_admin(
     session: SessionDep,
     admin_verified: bool = Depends(verify_admin_token)
 ):
-    url = get_url_by_id(session, url_id)
+    url = await get_url_by_id(session, url_id)
     if not url:
         raise HTTPException(status_code=404, detail="URL not found")
     return format_url_response(url, request)
@@ -240,7 +302,7 @@ async def get_url_user_id(
     session: SessionDep,
     admin_verified: bool = Depends(verify_admin_token)
 ):
-    url = get_url_by_id(session, url_id)
+    url = await get_url_by_id(session, url_id)
     if not url:
         raise HTTPException(status_code=404, detail="URL not found")
     return {"user_id": url.user_id}
@@ -253,64 +315,34 @@ async def security_scan_urls(
     user_id: Optional[int] = Query(None)
 ):
     try:
-        query = select(Url).where(Url.is_active == True)
+        query = select(Url.id, Url.short_code, Url.original_url).where(Url.is_active == True)
         if user_id:
             query = query.where(Url.user_id == user_id)
         
         query = query.limit(limit)
-        urls = session.exec(query).all()
+        urls = (await session.exec(query)).all()
         
         results = []
-        unsafe_count = 0
+        deactivated = []
+        scanned_at = datetime.utcnow()
         
-        for url in urls:
-            try:
-                safety_check = await safe_browsing_service.check_url_safety(url.original_url)
-                import json
-                url.safety_check_status = "safe" if safety_check["is_safe"] else "unsafe"
-                url.safety_check_at = datetime.utcnow()
-                url.safety_threats = json.dumps(safety_check["threats"]) if safety_check["threats"] else None
-                
-                result = {
-                    "url_id": url.id,
-                    "short_code": url.short_code,
-                    "original_url": url.original_url,
-                    "is_safe": safety_check["is_safe"],
-                    "threats": safety_check["threats"],
-                    "details": safety_check["details"]
-                }
-                
-                if not safety_check["is_safe"]:
-                    url.is_active = False
-                    unsafe_count += 1
-                    result["action"] = "deactivated"
-                else:
-                    result["action"] = "no_action"
-                
-                session.add(url)
-                results.append(result)
-                
-            except Exception as e:
-                logger.error(f"Error scanning URL {url.id}: {str(e)}")
-                url.safety_check_status = "error"
-                url.safety_check_at = datetime.utcnow()
-                session.add(url)
-                
-                results.append({
-                    "url_id": url.id,
-                    "short_code": url.short_code,
-                    "original_url": url.original_url,
-                    "is_safe": None,
-                    "threats": [],
-                    "details": f"Scan failed: {str(e)}",
-                    "action": "scan_failed"
-                })
-        session.commit()
+        for i in range(0, len(urls), SAFE_BROWSING_BATCH_SIZE):
+            chunk = urls[i:i + SAFE_BROWSING_BATCH_SIZE]
+            safety_checks = await safe_browsing_service.check_urls_safety(
+                [original_url for _, _, original_url in chunk],
+                use_cache=False
+            )
+            chunk_results, chunk_deactivated = await apply_safety_verdicts(session, chunk, safety_checks, scanned_at)
+            # Committing per chunk keeps counter rows unlocked during the next lookup
+            await session.commit()
+            invalidate_cached_urls(chunk_deactivated)
+            results.extend(chunk_results)
+            deactivated.extend(chunk_deactivated)
         
         return {
             "scanned_count": len(urls),
-            "unsafe_count": unsafe_count,
-            "deactivated_count": unsafe_count,
+            "unsafe_count": len(deactivated),
+            "deactivated_count": len(deactivated),
             "results": results
         }
         
@@ -1,8 +1,9 @@
-import httpx
 from fastapi import HTTPException, Depends, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import Optional
-from app.config import USERS_SERVICE_URL, ADMIN_TOKEN
+from app.config import ADMIN_TOKEN
+from app.core.http_clients import upstream_clients
+from app.core.click_sync import click_count_sync
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,16 +14,15 @@ async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(secur
     if not credentials:
         return None
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{USERS_SERVICE_URL}/verify-token",
-                headers={"Authorization": f"Bearer {credentials.credentials}"}
-            )
-            if response.status_code == 200:
-                user_data = response.json()
-                return user_data
-            else:
-                return None
+        response = await upstream_clients.get("users").post(
+            "/verify-token",
+            headers={"Authorization": f"Bearer {credentials.credentials}"}
+        )
+        if response.status_code == 200:
+            user_data = response.json()
+            return user_data
+        else:
+            return None
     except Exception as e:
         logger.error(f"Error verifying token: {e}")
         return None
@@ -59,3 +59,13 @@ async def verify_admin_token(credentials: HTTPAuthorizationCredentials = Depends
         )
     
     return True
+
+def require_click_counts(min_clicks: Optional[int], max_clicks: Optional[int], sort: str) -> None:
+    # click_count is only kept up to date by the click count sync job
+    if click_count_sync.enabled:
+        return
+    if min_clicks is not None or max_clicks is not None or sort == "clicks":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Click filters and sorting by clicks require click count sync (CLICK_SYNC_ENABLED)"
+        )
@@ -1,39 +1,43 @@
 from fastapi import APIRouter, HTTPException, Depends, status, Request, Path, Query
-from fastapi.responses import RedirectResponse
+from fastapi.responses import RedirectResponse, Response
 from sqlmodel import select
 from typing import Optional
 from datetime import datetime
 import logging
 
 from app.database import SessionDep
-from app.schemas.url import UrlCreate, UrlUpdate, UrlResponse, UrlListResponse
+from app.schemas.url import UrlCreate, UrlBatchCreate, UrlUpdate, UrlResponse, UrlListResponse, UrlBatchItemResult, UrlBatchResponse
 from app.crud.url import (
-    create_url, get_url_by_short_code,
+    create_url, create_urls_batch, get_url_by_short_code,
     get_user_urls, get_url_by_id, update_url, deactivate_url,
     get_url_with_qr_code, count_user_urls, activate_url
 )
-from app.api.dependencies import get_current_user, get_current_user_optional
+from app.api.dependencies import get_current_user, get_current_user_optional, require_click_counts
 from app.core.rate_limiting import limiter, RATE_LIMIT_GENERAL, RATE_LIMIT_STRICT
+from app.core.previews import etag_matches
+from app.core.utils import to_naive_utc
 from app.config import FRONTEND_URL
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-def format_url_response(url, request: Request) -> UrlResponse:
+def format_url_response(url, request: Request, is_active: Optional[bool] = None) -> UrlResponse:
     return UrlResponse(
         id=url.id,
         original_url=url.original_url,
         short_code=url.short_code,
         short_url=f"{FRONTEND_URL}/{url.short_code}",
         user_id=url.user_id,
-        is_active=url.is_active,
+        is_active=url.is_active if is_active is None else is_active,
         has_password=url.password is not None,
         created_at=url.created_at,
         expires_at=url.expires_at,
         remaining_clicks=url.remaining_clicks,
         hide_thumbnail=url.hide_thumbnail,
         safety_check_status=url.safety_check_status,
-        safety_check_at=url.safety_check_at
+        safety_check_at=url.safety_check_at,
+        click_count=url.click_count,
+        last_clicked_at=url.last_clicked_at
     )
 
 @router.post("/shorten", response_model=UrlResponse)
@@ -55,6 +59,33 @@ async def shorten_url(
         logger.error(f"Unexpected error shortening URL: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@router.post("/shorten/batch", response_model=UrlBatchResponse)
+@limiter.limit(RATE_LIMIT_STRICT)
+async def shorten_urls_batch(
+    batch: UrlBatchCreate,
+    request: Request,
+    session: SessionDep,
+    current_user: Optional[dict] = Depends(get_current_user_optional)
+):
+    user_id = current_user["id"] if current_user else -1
+    
+    try:
+        results = await create_urls_batch(session, batch.urls, user_id)
+    except Exception as e:
+        logger.error(f"Unexpected error shortening URL batch: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+    
+    items = [
+        UrlBatchItemResult(
+            index=index,
+            url=format_url_response(url, request) if url else None,
+            error=error
+        )
+        for index, (url, error) in enumerate(results)
+    ]
+    created = sum(1 for item in items if item.url is not None)
+    return UrlBatchResponse(results=items, created=created, failed=len(items) - created)
+
 @router.put("/{url_id}", response_model=UrlResponse)
 @limiter.limit(RATE_LIMIT_GENERAL)
 async def update_url_endpoint(
@@ -83,7 +114,7 @@ async def deactivate_url_endpoint(
     session: SessionDep,
     current_user: dict = Depends(get_current_user)
 ):
-    url = deactivate_url(session, url_id, current_user["id"])
+    url = await deactivate_url(session, url_id, current_user["id"])
     if not url:
         raise HTTPException(status_code=404, detail="URL not found or access denied")
     return format_url_response(url, request)
@@ -95,7 +126,7 @@ async def deactivate_url_endpoint(
     session: SessionDep,
     current_user: dict = Depends(get_current_user)
 ):
-    url = activate_url(session, url_id, current_user["id"])
+    url = await activate_url(session, url_id, current_user["id"])
     if not url:
         raise HTTPException(status_code=404, detail="URL not found or access denied")
     return format_url_response(url, request)
@@ -112,77 +143,72 @@ async def get_my_urls(
     created_to: Optional[str] = Query(None),
     min_clicks: Optional[int] = Query(None, ge=0),
     max_clicks: Optional[int] = Query(None, ge=0),
-    domain: Optional[str] = Query(None)
+    domain: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None),
+    include_total: bool = Query(True),
+    sort: str = Query("created_at", pattern="^(created_at|clicks)$")
 ):
+    require_click_counts(min_clicks, max_clicks, sort)
     created_from_dt = None
     created_to_dt = None
     
     if created_from:
         try:
-            created_from_dt = datetime.fromisoformat(created_from.replace('Z', '+00:00'))
+            created_from_dt = to_naive_utc(datetime.fromisoformat(created_from.replace('Z', '+00:00')))
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid created_from date format. Use ISO format.")
     
     if created_to:
         try:
-            created_to_dt = datetime.fromisoformat(created_to.replace('Z', '+00:00'))
+            created_to_dt = to_naive_utc(datetime.fromisoformat(created_to.replace('Z', '+00:00')))
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid created_to date format. Use ISO format.")
     
-    urls = get_user_urls(
-        session, 
-        current_user["id"], 
-        skip, 
-        limit,
-        is_active=is_active,
-        created_from=created_from_dt,
-        created_to=created_to_dt,
-        domain=domain
-    )
-    
-    if min_clicks is not None or max_clicks is not None:
-        from app.crud.url import get_clicks_count_for_user_url
-        token = None
-        if hasattr(request, 'headers') and 'authorization' in request.headers:
-            auth_header = request.headers.get('authorization', '')
-            if auth_header.startswith('Bearer '):
-                token = auth_header[7:]
-        if token:
-            filtered_urls = []
-            for url in urls:
-                clicks_count = await get_clicks_count_for_user_url(url.id, current_user["id"], token)
-                if min_clicks is not None and clicks_count < min_clicks:
-                    continue
-                if max_clicks is not None and clicks_count > max_clicks:
-                    continue
-                filtered_urls.append(url)
-            urls = filtered_urls
-            total = len(urls)
-        else:
-            urls = []
-            total = 0
-    else:
-        total = count_user_urls(
-            session,
-            current_user["id"],
+    try:
+        rows, next_cursor = await get_user_urls(
+            session, 
+            current_user["id"], 
+            skip, 
+            limit,
             is_active=is_active,
             created_from=created_from_dt,
             created_to=created_to_dt,
-            domain=domain
+            domain=domain,
+            cursor=cursor,
+            min_clicks=min_clicks,
+            max_clicks=max_clicks,
+            sort=sort
         )
-    formatted_urls = [format_url_response(url, request) for url in urls]
+        total = None
+        if include_total:
+            total = await count_user_urls(
+                session,
+                current_user["id"],
+                is_active=is_active,
+                created_from=created_from_dt,
+                created_to=created_to_dt,
+                domain=domain,
+                min_clicks=min_clicks,
+                max_clicks=max_clicks
+            )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    formatted_urls = [format_url_response(url, request, url_is_active) for url, url_is_active in rows]
     return UrlListResponse(
         urls=formatted_urls, 
         total=total,
-        skip=skip,
+        skip=None if cursor else skip,
         limit=limit,
+        next_cursor=next_cursor,
         filters={
             "is_active": is_active,
             "created_from": created_from,
             "created_to": created_to,
             "min_clicks": min_clicks,
             "max_clicks": max_clicks,
-            "domain": domain
+            "domain": domain,
+            "sort": sort
         }
     )
 
@@ -191,16 +217,28 @@ async def get_url_qr_code(
     url_id: int,
     request: Request,
     session: SessionDep,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    size: int = Query(10, ge=1, le=40),
+    border: int = Query(4, ge=0, le=20),
+    format: Optional[str] = Query(None, pattern="^(png|svg)$")
 ):
     base_url = f"{request.url.scheme}://{request.url.netloc}"
-    result = get_url_with_qr_code(session, url_id, current_user["id"], base_url)
+    result = await get_url_with_qr_code(
+        session, url_id, current_user["id"], base_url, size=size, border=border, format=format or "png"
+    )
     if not result:
         raise HTTPException(status_code=404, detail="URL not found")
     
+    qr_code = result["qr_code"]
+    if format:
+        headers = {"ETag": qr_code.etag, "Cache-Control": "private, max-age=86400"}
+        if etag_matches(request.headers.get("if-none-match"), qr_code.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=qr_code.content, media_type=qr_code.media_type, headers=headers)
+    
     return {
         "url_id": result["url"].id,
         "short_code": result["url"].short_code,
         "short_url": result["short_url"],
-        "qr_code": result["qr_code"]
+        "qr_code": qr_code.to_data_uri()
     }
@@ -0,0 +1,114 @@
+import asyncio
+import hashlib
+import string
+from typing import List
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.models.url import short_code_block_seq
+from app.core.utils import generate_unique_short_code, is_code_reserved
+from app.config import SECRET_KEY, SHORT_CODE_LENGTH, SHORT_CODE_BLOCK_SIZE
+
+BASE62_ALPHABET = string.digits + string.ascii_letters
+
+class ShortCodePermutation:
+    def __init__(self, length: int, secret: str):
+        self.length = length
+        self.space = len(BASE62_ALPHABET) ** length
+        digest = hashlib.sha256(secret.encode()).digest()
+        self.keys = []
+        for i in range(2):
+            multiplier = self._coprime(int.from_bytes(digest[i * 16:i * 16 + 8], "big") % self.space)
+            offset = int.from_bytes(digest[i * 16 + 8:i * 16 + 16], "big") % self.space
+            self.keys.append((multiplier, offset, pow(multiplier, -1, self.space)))
+
+    def _coprime(self, value: int) -> int:
+        value |= 1
+        while value % 31 == 0:
+            value += 2
+        return value % self.space
+
+    def _reverse_digits(self, value: int) -> int:
+        result = 0
+        for _ in range(self.length):
+            value, digit = divmod(value, len(BASE62_ALPHABET))
+            result = result * len(BASE62_ALPHABET) + digit
+        return result
+
+    def permute(self, value: int) -> int:
+        (m1, o1, _), (m2, o2, _) = self.keys
+        value = (value * m1 + o1) % self.space
+        value = self._reverse_digits(value)
+        return (value * m2 + o2) % self.space
+
+    def invert(self, value: int) -> int:
+        (_, o1, i1), (_, o2, i2) = self.keys
+        value = (value - o2) * i2 % self.space
+        value = self._reverse_digits(value)
+        return (value - o1) * i1 % self.space
+
+    def encode(self, value: int) -> str:
+        value = self.permute(value)
+        digits = []
+        for _ in range(self.length):
+            value, digit = divmod(value, len(BASE62_ALPHABET))
+            digits.append(BASE62_ALPHABET[digit])
+        return "".join(reversed(digits))
+
+    def decode(self, code: str) -> int:
+        value = 0
+        for char in code:
+            value = value * len(BASE62_ALPHABET) + BASE62_ALPHABET.index(char)
+        return self.invert(value)
+
+class ShortCodeAllocator:
+    def __init__(self, length: int = SHORT_CODE_LENGTH, block_size: int = SHORT_CODE_BLOCK_SIZE):
+        self.permutation = ShortCodePermutation(length, SECRET_KEY)
+        self.block_size = block_size
+        self._next = 0
+        self._end = 0
+        self._lock = asyncio.Lock()
+        self.blocks_leased = 0
+        self.allocated = 0
+
+    async def _lease_block(self, session: AsyncSession) -> None:
+        block = (await session.execute(select(short_code_block_seq.next_value()))).scalar_one()
+        start = block * self.block_size
+        if start + self.block_size > self.permutation.space:
+            raise ValueError("Short code space exhausted, increase SHORT_CODE_LENGTH")
+        self._next, self._end = start, start + self.block_size
+        self.blocks_leased += 1
+
+    async def allocate_many(self, session: AsyncSession, urls: List[str]) -> List[str]:
+        if not session.bind.dialect.supports_sequences:
+            codes = []
+            taken = set()
+            for url in urls:
+                codes.append(await generate_unique_short_code(session, url, exclude=taken))
+                taken.add(codes[-1])
+            return codes
+        
+        count = len(urls)
+        codes = []
+        async with self._lock:
+            while len(codes) < count:
+                if self._next >= self._end:
+                    await self._lease_block(session)
+                code = self.permutation.encode(self._next)
+                self._next += 1
+                if not is_code_reserved(code):
+                    codes.append(code)
+        self.allocated += len(codes)
+        return codes
+
+    async def allocate(self, session: AsyncSession, url: str) -> str:
+        return (await self.allocate_many(session, [url]))[0]
+
+    def stats(self) -> dict:
+        return {
+            "block_size": self.block_size,
+            "blocks_leased": self.blocks_leased,
+            "allocated": self.allocated,
+            "remaining_in_block": self._end - self._next
+        }
+
+short_code_allocator = ShortCodeAllocator()
@@ -0,0 +1,125 @@
+import asyncio
+import hashlib
+import logging
+import math
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+from sqlmodel import select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.models.url import Url
+from app.database import create_session
+from app.config import (
+    SHORT_CODE_FILTER_ENABLED, SHORT_CODE_FILTER_ERROR_RATE,
+    SHORT_CODE_FILTER_MIN_CAPACITY, SHORT_CODE_FILTER_REBUILD_INTERVAL
+)
+
+logger = logging.getLogger(__name__)
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(capacity, 1)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray(math.ceil(self.num_bits / 8))
+        self.count = 0
+
+    def _positions(self, key: str) -> Iterable[int]:
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def estimated_false_positive_rate(self) -> float:
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+
+class ShortCodeFilter:
+    def __init__(self, enabled: bool = SHORT_CODE_FILTER_ENABLED, error_rate: float = SHORT_CODE_FILTER_ERROR_RATE):
+        self.enabled = enabled
+        self.error_rate = error_rate
+        self._filter: Optional[BloomFilter] = None
+        self._pending: Optional[List[str]] = None
+        self.rejected = 0
+        self.passed = 0
+        self.rebuilds = 0
+        self.last_rebuild_at: Optional[datetime] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.enabled and self._filter is not None
+
+    def might_contain(self, short_code: str) -> bool:
+        if not self.ready:
+            return True
+        if short_code in self._filter:
+            self.passed += 1
+            return True
+        self.rejected += 1
+        return False
+
+    def add(self, short_code: str) -> None:
+        if not self.enabled:
+            return
+        if self._pending is not None:
+            self._pending.append(short_code)
+        if self._filter is not None:
+            self._filter.add(short_code)
+
+    async def rebuild(self, session: AsyncSession) -> None:
+        if not self.enabled:
+            return
+        self._pending = []
+        try:
+            total = (await session.exec(select(func.count(Url.id)))).first() or 0
+            bloom = BloomFilter(max(total * 2, SHORT_CODE_FILTER_MIN_CAPACITY), self.error_rate)
+            codes = await session.stream_scalars(select(Url.short_code).execution_options(yield_per=10000))
+            async for short_code in codes:
+                bloom.add(short_code)
+            for short_code in self._pending:
+                bloom.add(short_code)
+            self._filter = bloom
+        finally:
+            self._pending = None
+        self.rebuilds += 1
+        self.last_rebuild_at = datetime.utcnow()
+        logger.info(f"Short code filter rebuilt with {bloom.count} codes")
+
+    async def run_periodic_rebuild(self) -> None:
+        while True:
+            await asyncio.sleep(SHORT_CODE_FILTER_REBUILD_INTERVAL)
+            try:
+                async with create_session() as session:
+                    await self.rebuild(session)
+            except Exception as e:
+                logger.error(f"Short code filter rebuild failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        if not self.ready:
+            return {"enabled": self.enabled, "ready": False}
+        return {
+            "enabled": self.enabled,
+            "ready": True,
+            "items": self._filter.count,
+            "capacity": self._filter.capacity,
+            "num_bits": self._filter.num_bits,
+            "num_hashes": self._filter.num_hashes,
+            "memory_bytes": len(self._filter.bits),
+            "target_false_positive_rate": self.error_rate,
+            "estimated_false_positive_rate": round(self._filter.estimated_false_positive_rate(), 6),
+            "rejected": self.rejected,
+            "passed": self.passed,
+            "rebuilds": self.rebuilds,
+            "last_rebuild_at": self.last_rebuild_at.isoformat() if self.last_rebuild_at else None
+        }
+
+short_code_filter = ShortCodeFilter()
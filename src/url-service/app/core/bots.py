@@ -0,0 +1,19 @@
+import re
+from functools import lru_cache
+from typing import Iterable
+from app.config import SOCIAL_BOT_SIGNATURES, BOT_VERDICT_CACHE_SIZE
+
+def compile_bot_pattern(signatures: Iterable[str]) -> re.Pattern:
+    signatures = sorted({s.strip().lower() for s in signatures if s.strip()}, key=len, reverse=True)
+    if not signatures:
+        return re.compile(r"(?!)")
+    return re.compile("|".join(re.escape(signature) for signature in signatures))
+
+bot_pattern = compile_bot_pattern(SOCIAL_BOT_SIGNATURES)
+
+def matches_bot_signature(user_agent: str) -> bool:
+    return bot_pattern.search(user_agent.lower()) is not None
+
+@lru_cache(maxsize=BOT_VERDICT_CACHE_SIZE)
+def is_social_media_bot(user_agent: str) -> bool:
+    return matches_bot_signature(user_agent)
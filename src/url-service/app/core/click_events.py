@@ -0,0 +1,148 @@
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from fastapi import Request
+from app.core.http_clients import upstream_clients
+from app.config import (
+    ADMIN_TOKEN, CLICK_EVENTS_QUEUE_SIZE, CLICK_EVENTS_BATCH_SIZE,
+    CLICK_EVENTS_FLUSH_INTERVAL, CLICK_EVENTS_MAX_RETRIES, CLICK_EVENTS_RETRY_BACKOFF
+)
+
+logger = logging.getLogger(__name__)
+
+def build_click_event(request: Request, url_id: int, user_id: Optional[int]) -> Dict[str, Any]:
+    headers = request.headers
+    real_ip = headers.get("x-real-ip") or headers.get("x-forwarded-for")
+    if not real_ip and request.client:
+        real_ip = request.client.host
+    return {
+        "event_id": uuid.uuid4().hex,
+        "url_id": url_id,
+        "user_id": user_id,
+        "user_agent": headers.get("user-agent", ""),
+        "referer": headers.get("referer", ""),
+        "ip_address": real_ip,
+        "clicked_at": datetime.utcnow().isoformat()
+    }
+
+class ClickEventShipper:
+    def __init__(
+        self,
+        queue_size: int = CLICK_EVENTS_QUEUE_SIZE,
+        batch_size: int = CLICK_EVENTS_BATCH_SIZE,
+        flush_interval: float = CLICK_EVENTS_FLUSH_INTERVAL,
+        max_retries: int = CLICK_EVENTS_MAX_RETRIES,
+        retry_backoff: float = CLICK_EVENTS_RETRY_BACKOFF
+    ):
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.enqueued = 0
+        self.sent = 0
+        self.dropped = 0
+        self.batches_sent = 0
+        self.batches_failed = 0
+        self.retries = 0
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        pending = []
+        while not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        for i in range(0, len(pending), self.batch_size):
+            await self._send(pending[i:i + self.batch_size], retries=0)
+
+    def enqueue(self, event: Dict[str, Any]) -> bool:
+        if self._queue is None:
+            self.dropped += 1
+            return False
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        self.enqueued += 1
+        return True
+
+    async def _collect_batch(self) -> List[Dict[str, Any]]:
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._collect_batch()
+            try:
+                await self._send(batch, retries=self.max_retries)
+            except Exception as e:
+                logger.error(f"Unexpected error shipping click events: {e}")
+
+    async def _send(self, batch: List[Dict[str, Any]], retries: int) -> bool:
+        for attempt in range(retries + 1):
+            try:
+                response = await upstream_clients.get("analytics").post(
+                    "/admin/events/batch",
+                    json={"events": batch},
+                    headers={"Authorization": f"Bearer {ADMIN_TOKEN}"}
+                )
+                if response.status_code < 500:
+                    if response.status_code == 200:
+                        self.sent += len(batch)
+                        self.batches_sent += 1
+                        return True
+                    logger.error(f"Analytics Service rejected click events batch: {response.status_code}")
+                    break
+                logger.warning(f"Analytics Service error on click events batch: {response.status_code}")
+            except Exception as e:
+                logger.warning(f"Error sending click events batch to Analytics Service: {e}")
+
+            if attempt < retries:
+                self.retries += 1
+                await asyncio.sleep(self.retry_backoff * (2 ** attempt))
+
+        self.batches_failed += 1
+        self.dropped += len(batch)
+        return False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "queue_size": self.queue_size,
+            "enqueued": self.enqueued,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "batches_sent": self.batches_sent,
+            "batches_failed": self.batches_failed,
+            "retries": self.retries
+        }
+
+click_event_shipper = ClickEventShipper()
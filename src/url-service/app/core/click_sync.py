@@ -0,0 +1,103 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from sqlalchemy import bindparam, case, or_, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.database import create_session
+from app.models.url import Url
+from app.crud.job_state import get_job_state, save_job_state
+from app.core.http_clients import upstream_clients
+from app.config import ADMIN_TOKEN, CLICK_SYNC_ENABLED, CLICK_SYNC_INTERVAL, CLICK_SYNC_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+JOB_NAME = "click_count_sync"
+
+urls_table = Url.__table__
+apply_delta = (
+    update(urls_table)
+    .where(urls_table.c.id == bindparam("delta_url_id"))
+    .values(
+        click_count=urls_table.c.click_count + bindparam("delta_clicks"),
+        last_clicked_at=case(
+            (or_(urls_table.c.last_clicked_at == None, urls_table.c.last_clicked_at < bindparam("delta_last_clicked_at")),
+             bindparam("delta_last_clicked_at")),
+            else_=urls_table.c.last_clicked_at
+        )
+    )
+)
+
+class ClickCountSync:
+    def __init__(self):
+        self.enabled = CLICK_SYNC_ENABLED
+        self.last_event_id = 0
+        self.pulls = 0
+        self.failures = 0
+        self.clicks = 0
+        self.updated_urls = 0
+        self.last_synced_at: Optional[datetime] = None
+
+    async def fetch_deltas(self, after_id: int) -> Dict[str, Any]:
+        response = await upstream_clients.get("analytics").get(
+            "/admin/clicks/deltas",
+            params={"after_id": after_id, "limit": CLICK_SYNC_BATCH_SIZE},
+            headers={"Authorization": f"Bearer {ADMIN_TOKEN}"}
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def apply(self, session: AsyncSession, deltas: List[Dict[str, Any]], last_event_id: int) -> None:
+        if deltas:
+            await session.execute(apply_delta, [
+                {
+                    "delta_url_id": delta["url_id"],
+                    "delta_clicks": delta["clicks"],
+                    "delta_last_clicked_at": datetime.fromisoformat(delta["last_clicked_at"])
+                }
+                for delta in deltas
+            ])
+        await save_job_state(session, JOB_NAME, {"last_event_id": last_event_id})
+        await session.commit()
+
+    async def sync(self) -> bool:
+        data = await self.fetch_deltas(self.last_event_id)
+        deltas = data.get("deltas", [])
+        last_event_id = data.get("last_event_id", self.last_event_id)
+        if last_event_id != self.last_event_id:
+            async with create_session() as session:
+                await self.apply(session, deltas, last_event_id)
+            self.clicks += sum(delta["clicks"] for delta in deltas)
+            self.updated_urls += len(deltas)
+            self.last_event_id = last_event_id
+
+        self.pulls += 1
+        self.last_synced_at = datetime.utcnow()
+        return data.get("has_more", False)
+
+    async def run_periodic(self) -> None:
+        async with create_session() as session:
+            self.last_event_id = (await get_job_state(session, JOB_NAME)).get("last_event_id", 0)
+
+        while True:
+            try:
+                has_more = await self.sync()
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"Click count sync failed after event {self.last_event_id}: {e}")
+                has_more = False
+            if not has_more:
+                await asyncio.sleep(CLICK_SYNC_INTERVAL)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "last_event_id": self.last_event_id,
+            "last_synced_at": self.last_synced_at,
+            "pulls": self.pulls,
+            "failures": self.failures,
+            "clicks": self.clicks,
+            "updated_urls": self.updated_urls
+        }
+
+click_count_sync = ClickCountSync()
@@ -0,0 +1,95 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Dict, Optional
+from sqlmodel import select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.exc import DBAPIError
+from app.database import create_session, begin_snapshot
+from app.models.url import Url
+from app.crud.counter import TOTAL_URLS, ACTIVE_URLS, get_all_counters, increment_counters
+from app.config import COUNTERS_RECONCILE_INTERVAL, COUNTERS_RECONCILE_RETRIES
+
+logger = logging.getLogger(__name__)
+
+class CounterReconciler:
+    def __init__(self):
+        self.runs = 0
+        self.failures = 0
+        self.retries = 0
+        self.last_drift = 0
+        self.last_duration = 0.0
+        self.last_reconciled_at: Optional[datetime] = None
+
+    async def count_urls(self, session: AsyncSession) -> Dict[tuple, int]:
+        counts = {
+            TOTAL_URLS: (await session.exec(select(func.count(Url.id)))).first() or 0,
+            ACTIVE_URLS: (await session.exec(select(func.count(Url.id)).where(Url.is_active == True))).first() or 0
+        }
+        created_day = func.date(Url.created_at)
+        for day, count in (await session.exec(select(created_day, func.count(Url.id)).group_by(created_day))).all():
+            counts[("created_day", str(day))] = count
+        for domain, count in (await session.exec(
+            select(Url.domain, func.count(Url.id)).where(Url.domain != None).group_by(Url.domain)
+        )).all():
+            counts[("domain", domain)] = count
+        return counts
+
+    async def reconcile(self, session: AsyncSession) -> int:
+        started = datetime.utcnow()
+        for attempt in range(COUNTERS_RECONCILE_RETRIES + 1):
+            try:
+                drift = await self._reconcile_once(session)
+                break
+            except DBAPIError as e:
+                await session.rollback()
+                if attempt == COUNTERS_RECONCILE_RETRIES:
+                    raise
+                self.retries += 1
+                logger.warning(f"Counter reconciliation conflicted, retrying: {e}")
+                await asyncio.sleep(0.1 * 2 ** attempt)
+
+        self.runs += 1
+        self.last_drift = drift
+        self.last_reconciled_at = datetime.utcnow()
+        self.last_duration = (self.last_reconciled_at - started).total_seconds()
+        if drift:
+            logger.warning(f"Counters reconciled with drift {drift}")
+        return drift
+
+    async def _reconcile_once(self, session: AsyncSession) -> int:
+        # Stored values and counts come from one snapshot without locking any
+        # counter row; the difference is then added in a short transaction, so
+        # increments committed meanwhile are kept
+        await begin_snapshot(session)
+        stored = await get_all_counters(session)
+        counts = await self.count_urls(session)
+        await session.rollback()
+
+        deltas = {key: counts.get(key, 0) - stored.get(key, 0) for key in counts.keys() | stored.keys()}
+        await increment_counters(session, deltas)
+        await session.commit()
+        return sum(abs(delta) for delta in deltas.values())
+
+    async def run_periodic(self) -> None:
+        while True:
+            try:
+                async with create_session() as session:
+                    await self.reconcile(session)
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"Counter reconciliation failed: {e}")
+            await asyncio.sleep(COUNTERS_RECONCILE_INTERVAL)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "interval": COUNTERS_RECONCILE_INTERVAL,
+            "runs": self.runs,
+            "failures": self.failures,
+            "retries": self.retries,
+            "last_reconciled_at": self.last_reconciled_at,
+            "last_duration_seconds": round(self.last_duration, 3),
+            "last_drift": self.last_drift
+        }
+
+counter_reconciler = CounterReconciler()
@@ -0,0 +1,109 @@
+import asyncio
+import heapq
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from sqlmodel import select
+from app.database import create_session
+from app.models.url import Url
+from app.crud.url import deactivate_expired_urls
+from app.core.utils import to_naive_utc
+from app.config import EXPIRY_SCHEDULER_ENABLED, EXPIRY_WINDOW, EXPIRY_MAX_PENDING, EXPIRY_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+class ExpiryScheduler:
+    def __init__(self):
+        self.enabled = EXPIRY_SCHEDULER_ENABLED
+        self._heap: List[Tuple[datetime, int]] = []
+        self._window_end: Optional[datetime] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self.loads = 0
+        self.batches = 0
+        self.deactivated = 0
+        self.max_lag = 0.0
+
+    def schedule(self, url_id: int, expires_at: Optional[datetime]) -> None:
+        if self._window_end is None or expires_at is None:
+            return
+        expires_at = to_naive_utc(expires_at)
+        if expires_at >= self._window_end:
+            return
+        heapq.heappush(self._heap, (expires_at, url_id))
+        if self._wakeup is not None and self._heap[0] == (expires_at, url_id):
+            self._wakeup.set()
+
+    async def load_window(self, now: datetime) -> None:
+        window_end = now + timedelta(seconds=EXPIRY_WINDOW)
+        async with create_session() as session:
+            rows = (await session.exec(
+                select(Url.id, Url.expires_at)
+                .where(Url.is_active == True, Url.expires_at != None, Url.expires_at < window_end)
+                .order_by(Url.expires_at)
+                .limit(EXPIRY_MAX_PENDING)
+            )).all()
+        if len(rows) == EXPIRY_MAX_PENDING:
+            window_end = rows[-1].expires_at
+
+        self._heap = [(row.expires_at, row.id) for row in rows]
+        heapq.heapify(self._heap)
+        self._window_end = window_end
+        self.loads += 1
+
+    async def expire_due(self, now: datetime) -> int:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            due.append(heapq.heappop(self._heap))
+        if not due:
+            return 0
+
+        self.max_lag = max(self.max_lag, (now - due[0][0]).total_seconds())
+        count = 0
+        for i in range(0, len(due), EXPIRY_BATCH_SIZE):
+            url_ids = [url_id for _, url_id in due[i:i + EXPIRY_BATCH_SIZE]]
+            async with create_session() as session:
+                count += len(await deactivate_expired_urls(session, now, url_ids=url_ids))
+            self.batches += 1
+        self.deactivated += count
+        if count:
+            logger.info(f"Deactivated {count} expired URLs")
+        return count
+
+    def _next_delay(self) -> float:
+        targets = [self._window_end]
+        if self._heap:
+            targets.append(self._heap[0][0])
+        return max(0.0, (min(targets) - datetime.utcnow()).total_seconds())
+
+    async def run(self) -> None:
+        self._wakeup = asyncio.Event()
+        while True:
+            try:
+                now = datetime.utcnow()
+                if self._window_end is None or now >= self._window_end:
+                    await self.load_window(now)
+                await self.expire_due(now)
+                delay = self._next_delay()
+            except Exception as e:
+                logger.error(f"Expiry scheduler iteration failed: {e}")
+                delay = EXPIRY_WINDOW
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "pending": len(self._heap),
+            "next_expiry": self._heap[0][0] if self._heap else None,
+            "window_end": self._window_end,
+            "loads": self.loads,
+            "batches": self.batches,
+            "deactivated": self.deactivated,
+            "max_lag_seconds": round(self.max_lag, 3)
+        }
+
+expiry_scheduler = ExpiryScheduler()
@@ -0,0 +1,78 @@
+import logging
+from typing import Any, Dict
+import httpx
+from app.config import (
+    USERS_SERVICE_URL, ANALYTICS_SERVICE_URL, SAFE_BROWSING_API_URL,
+    USERS_SERVICE_TIMEOUT, ANALYTICS_SERVICE_TIMEOUT, SAFE_BROWSING_TIMEOUT,
+    HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE_CONNECTIONS, HTTP_KEEPALIVE_EXPIRY
+)
+
+logger = logging.getLogger(__name__)
+
+UPSTREAMS = {
+    "users": (USERS_SERVICE_URL, USERS_SERVICE_TIMEOUT),
+    "analytics": (ANALYTICS_SERVICE_URL, ANALYTICS_SERVICE_TIMEOUT),
+    "safe_browsing": (SAFE_BROWSING_API_URL, SAFE_BROWSING_TIMEOUT)
+}
+
+class UpstreamClients:
+    def __init__(self):
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            client = self._create_client(name)
+            self._clients[name] = client
+        return client
+
+    def _create_client(self, name: str) -> httpx.AsyncClient:
+        base_url, timeout = UPSTREAMS[name]
+        counters = self._counters.setdefault(name, {"requests": 0, "responses": 0, "server_errors": 0})
+
+        async def on_request(request: httpx.Request) -> None:
+            counters["requests"] += 1
+
+        async def on_response(response: httpx.Response) -> None:
+            counters["responses"] += 1
+            if response.status_code >= 500:
+                counters["server_errors"] += 1
+
+        return httpx.AsyncClient(
+            base_url=base_url,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+            ),
+            event_hooks={"request": [on_request], "response": [on_response]}
+        )
+
+    async def close(self) -> None:
+        for name, client in self._clients.items():
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.error(f"Error closing HTTP client for {name}: {e}")
+        self._clients.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        result = {}
+        for name, client in self._clients.items():
+            pool = getattr(getattr(client, "_transport", None), "_pool", None)
+            connections = list(getattr(pool, "connections", []))
+            idle = sum(1 for connection in connections if connection.is_idle())
+            result[name] = {
+                **self._counters.get(name, {}),
+                "timeout": UPSTREAMS[name][1],
+                "connections": len(connections),
+                "idle_connections": idle,
+                "active_connections": len(connections) - idle,
+                "max_connections": HTTP_MAX_CONNECTIONS,
+                "max_keepalive_connections": HTTP_MAX_KEEPALIVE_CONNECTIONS
+            }
+        return result
+
+upstream_clients = UpstreamClients()
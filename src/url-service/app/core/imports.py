@@ -0,0 +1,215 @@
+import csv
+import json
+import logging
+import os
+import uuid
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from pydantic import ValidationError
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.schemas.url import UrlImportRow
+from app.crud.url import create_urls_batch
+from app.config import IMPORT_CHUNK_SIZE, IMPORT_REPORTS_DIR, IMPORT_JOBS_KEEP
+
+logger = logging.getLogger(__name__)
+
+IMPORT_FORMATS = {"csv", "ndjson"}
+REPORT_HEADER = ["line", "error", "row"]
+
+ParsedRow = Tuple[int, str, Optional[UrlImportRow], Optional[str]]
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, str]]:
+    buffer = b""
+    line_number = 0
+    async for chunk in chunks:
+        buffer += chunk
+        lines = buffer.split(b"\n")
+        buffer = lines.pop()
+        for line in lines:
+            line_number += 1
+            yield line_number, line.decode("utf-8", errors="replace").rstrip("\r")
+    if buffer:
+        yield line_number + 1, buffer.decode("utf-8", errors="replace").rstrip("\r")
+
+def format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}"
+        for item in error.errors()
+    )
+
+def validate_row(data: Any) -> Tuple[Optional[UrlImportRow], Optional[str]]:
+    if not isinstance(data, dict):
+        return None, "Row must be an object"
+    try:
+        return UrlImportRow.model_validate(data), None
+    except ValidationError as e:
+        return None, format_validation_error(e)
+
+class LineFeed:
+    """Line iterator for csv.reader, filled as the request body streams in."""
+
+    def __init__(self):
+        self.lines = deque()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if not self.lines:
+            raise StopIteration
+        return self.lines.popleft()
+
+async def iter_csv_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, str, Optional[List[str]]]]:
+    feed = LineFeed()
+    reader = csv.reader(feed)
+    start_line, pending, quotes = 0, [], 0
+    async for line_number, line in iter_lines(chunks):
+        if not pending:
+            if not line.strip():
+                continue
+            start_line = line_number
+        pending.append(line)
+        feed.lines.append(f"{line}\n")
+        quotes += line.count('"')
+        # An odd number of quotes means a quoted field continues on the next line
+        if quotes % 2 == 0:
+            yield start_line, "\n".join(pending), next(reader)
+            pending, quotes = [], 0
+    if pending:
+        yield start_line, "\n".join(pending), None
+
+async def parse_rows(format: str, chunks: AsyncIterator[bytes]) -> AsyncIterator[ParsedRow]:
+    if format == "csv":
+        header: Optional[List[str]] = None
+        async for line_number, raw, values in iter_csv_records(chunks):
+            if values is None:
+                yield line_number, raw, None, "Unterminated quoted field"
+                continue
+            if header is None:
+                header = [name.strip().lstrip("\ufeff") for name in values]
+                continue
+            if len(values) != len(header):
+                yield line_number, raw, None, f"Expected {len(header)} columns, got {len(values)}"
+                continue
+            row, error = validate_row({name: value for name, value in zip(header, values) if value != ""})
+            yield line_number, raw, row, error
+        return
+
+    async for line_number, line in iter_lines(chunks):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, line, None, f"Invalid JSON: {e}"
+            continue
+        row, error = validate_row(data)
+        yield line_number, line, row, error
+
+class ImportJob:
+    def __init__(self, format: str):
+        self.id = uuid.uuid4().hex
+        self.format = format
+        self.status = "running"
+        self.error: Optional[str] = None
+        self.started_at = datetime.utcnow()
+        self.finished_at: Optional[datetime] = None
+        self.processed = 0
+        self.created = 0
+        self.failed = 0
+        self.report_path = os.path.join(IMPORT_REPORTS_DIR, f"easylink-import-{self.id}.csv")
+        self._report_file = None
+        self._report_writer = None
+
+    def record_failure(self, line_number: int, error: str, raw: str) -> None:
+        if self._report_writer is None:
+            self._report_file = open(self.report_path, "w", newline="", encoding="utf-8")
+            self._report_writer = csv.writer(self._report_file)
+            self._report_writer.writerow(REPORT_HEADER)
+        self._report_writer.writerow([line_number, error, raw])
+        self.failed += 1
+
+    async def import_chunk(self, session: AsyncSession, chunk: List[Tuple[int, str, UrlImportRow]]) -> None:
+        groups: Dict[int, List[Tuple[int, str, UrlImportRow]]] = {}
+        for entry in chunk:
+            groups.setdefault(entry[2].user_id, []).append(entry)
+
+        for user_id, entries in groups.items():
+            results = await create_urls_batch(session, [row for _, _, row in entries], user_id)
+            for (line_number, raw, _), (url, error) in zip(entries, results):
+                if url is None:
+                    self.record_failure(line_number, error, raw)
+                else:
+                    self.created += 1
+        session.expunge_all()
+
+    async def run(self, session: AsyncSession, chunks: AsyncIterator[bytes]) -> None:
+        chunk: List[Tuple[int, str, UrlImportRow]] = []
+        try:
+            async for line_number, raw, row, error in parse_rows(self.format, chunks):
+                self.processed += 1
+                if row is None:
+                    self.record_failure(line_number, error, raw)
+                    continue
+                chunk.append((line_number, raw, row))
+                if len(chunk) >= IMPORT_CHUNK_SIZE:
+                    await self.import_chunk(session, chunk)
+                    chunk = []
+            if chunk:
+                await self.import_chunk(session, chunk)
+            self.status = "completed"
+        except Exception as e:
+            logger.error(f"URL import {self.id} failed after {self.processed} rows: {e}")
+            self.status = "failed"
+            self.error = str(e)
+        finally:
+            self.finished_at = datetime.utcnow()
+            if self._report_file is not None:
+                self._report_file.close()
+        logger.info(f"URL import {self.id} {self.status}: {self.created} created, {self.failed} failed")
+
+    @property
+    def has_report(self) -> bool:
+        return self._report_writer is not None
+
+    def remove_report(self) -> None:
+        if self.has_report and os.path.exists(self.report_path):
+            os.unlink(self.report_path)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "format": self.format,
+            "status": self.status,
+            "error": self.error,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "processed": self.processed,
+            "created": self.created,
+            "failed": self.failed,
+            "failed_rows_url": f"/admin/imports/{self.id}/failed" if self.has_report else None
+        }
+
+class ImportJobRegistry:
+    def __init__(self, keep: int = IMPORT_JOBS_KEEP):
+        self.keep = keep
+        self._jobs: "OrderedDict[str, ImportJob]" = OrderedDict()
+
+    def create(self, format: str) -> ImportJob:
+        job = ImportJob(format)
+        self._jobs[job.id] = job
+        while len(self._jobs) > self.keep:
+            stale_id = next((key for key, stale in self._jobs.items() if stale.status != "running"), None)
+            if stale_id is None:
+                break
+            self._jobs.pop(stale_id).remove_report()
+        return job
+
+    def get(self, job_id: str) -> Optional[ImportJob]:
+        return self._jobs.get(job_id)
+
+    def list(self) -> List[ImportJob]:
+        return list(reversed(self._jobs.values()))
+
+import_jobs = ImportJobRegistry()
@@ -0,0 +1,90 @@
+import asyncio
+import logging
+from typing import List
+from app.database import create_session
+from app.core.bloom import short_code_filter
+from app.core.click_events import click_event_shipper
+from app.core.http_clients import upstream_clients
+from app.core.snapshot import redirect_snapshot
+from app.core.threat_db import threat_database
+from app.core.security_rescan import security_rescan_job
+from app.core.expiry import expiry_scheduler
+from app.core.counters import counter_reconciler
+from app.core.click_sync import click_count_sync
+from app.crud.url import backfill_url_domains
+from app.config import DOMAIN_BACKFILL_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+background_tasks: List[asyncio.Task] = []
+
+async def start_redirect_services(standalone: bool = False) -> None:
+    if redirect_snapshot.enabled:
+        try:
+            redirect_snapshot.load()
+        except Exception as e:
+            logger.error(f"Redirect snapshot load failed, lookups will go to the database: {e}")
+        background_tasks.append(asyncio.create_task(redirect_snapshot.run_periodic_refresh()))
+
+    if standalone and short_code_filter.enabled:
+        short_code_filter.enabled = False
+        logger.info("Short code filter disabled: a standalone redirect app does not see codes created by the API")
+
+    if short_code_filter.enabled:
+        try:
+            async with create_session() as session:
+                await short_code_filter.rebuild(session)
+        except Exception as e:
+            logger.error(f"Short code filter build failed, lookups will go to the database: {e}")
+        background_tasks.append(asyncio.create_task(short_code_filter.run_periodic_rebuild()))
+
+    click_event_shipper.start()
+
+async def run_domain_backfill() -> None:
+    after_id = 0
+    batches = 0
+    try:
+        while True:
+            async with create_session() as session:
+                last_id = await backfill_url_domains(session, after_id, DOMAIN_BACKFILL_BATCH_SIZE)
+            if last_id is None:
+                break
+            batches += 1
+            after_id = last_id
+    except Exception as e:
+        logger.error(f"URL domain backfill failed after id {after_id}: {e}")
+        return
+    if batches:
+        logger.info(f"URL domain backfill finished in {batches} batches")
+
+async def run_table_maintenance() -> None:
+    await run_domain_backfill()
+    await counter_reconciler.run_periodic()
+
+async def start_api_services() -> None:
+    background_tasks.append(asyncio.create_task(run_table_maintenance()))
+
+    if expiry_scheduler.enabled:
+        background_tasks.append(asyncio.create_task(expiry_scheduler.run()))
+
+    if threat_database.enabled:
+        try:
+            await threat_database.update()
+        except Exception as e:
+            logger.error(f"Threat database update failed, safety checks will use the Lookup API: {e}")
+        background_tasks.append(asyncio.create_task(threat_database.run_periodic_update()))
+
+    if security_rescan_job.enabled:
+        background_tasks.append(asyncio.create_task(security_rescan_job.run_periodic()))
+
+    if click_count_sync.enabled:
+        background_tasks.append(asyncio.create_task(click_count_sync.run_periodic()))
+
+async def stop_redirect_services() -> None:
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    background_tasks.clear()
+
+    await click_event_shipper.stop()
+    await upstream_clients.close()
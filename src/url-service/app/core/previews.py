@@ -0,0 +1,78 @@
+import hashlib
+import html
+from typing import Optional, Tuple
+from app.models.url import Url
+from app.core.cache import LRUCache
+from app.config import FRONTEND_URL, PREVIEW_CACHE_MAX_SIZE
+
+preview_cache = LRUCache(max_size=PREVIEW_CACHE_MAX_SIZE)
+
+def render_preview_page(short_code: str, original_url: str, hide_thumbnail: bool) -> str:
+    base_url = f"{FRONTEND_URL}"
+    short_url = html.escape(f"{base_url}/{short_code}")
+    original_url = html.escape(original_url)
+    
+    if hide_thumbnail:
+        return f"""
+            <!DOCTYPE html>
+            <html>
+            <head>
+                <meta charset="utf-8">
+                <title>EasyLink - Сервис сокращения ссылок</title>
+                <meta property="og:title" content="EasyLink - Сервис сокращения ссылок">
+                <meta property="og:description" content="Это сокращенный URL-адрес, созданный с помощью EasyLink. Нажмите, чтобы перейти по ссылке.">
+                <meta property="og:image" content="{base_url}/api/urls/static/easylink-preview.png">
+                <meta property="og:url" content="{short_url}">
+                <meta property="og:type" content="website">
+                <meta property="og:site_name" content="EasyLink">
+                <meta name="twitter:card" content="summary_large_image">
+                <meta name="twitter:title" content="EasyLink - Сервис сокращения ссылок">
+                <meta name="twitter:description" content="Это сокращенный URL-адрес, созданный с помощью EasyLink. Нажмите, чтобы перейти по ссылке.">
+                <meta name="twitter:image" content="{base_url}/api/urls/static/easylink-preview.png">
+                <meta http-equiv="refresh" content="0; url={original_url}">
+            </head>
+            <body>
+                <p>Redirecting to destination...</p>
+                <p>Если вы не перенаправлены автоматически, <a href="{original_url}">нажмите здесь</a>.</p>
+            </body>
+            </html>
+            """
+    return f"""
+            <!DOCTYPE html>
+            <html>
+            <head>
+                <meta charset="utf-8">
+                <title>Переадресация...</title>
+                <meta http-equiv="refresh" content="0; url={original_url}">
+                <link rel="canonical" href="{original_url}">
+            </head>
+            <body>
+                <p>Переадресация...</p>
+                <p>Если вы не перенаправлены автоматически, <a href="{original_url}">нажмите здесь</a>.</p>
+            </body>
+            </html>
+            """
+
+def get_preview_page(url: Url) -> Tuple[bytes, str]:
+    key = (url.short_code, url.hide_thumbnail)
+    cached = preview_cache.get(key)
+    if cached is not None:
+        return cached
+    
+    content = render_preview_page(url.short_code, url.original_url, url.hide_thumbnail).encode("utf-8")
+    etag = f'"{hashlib.sha1(content).hexdigest()}"'
+    preview_cache.set(key, (content, etag))
+    return content, etag
+
+def invalidate_preview_pages(short_code: str) -> None:
+    preview_cache.invalidate((short_code, True))
+    preview_cache.invalidate((short_code, False))
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
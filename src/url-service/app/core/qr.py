@@ -0,0 +1,50 @@
+import asyncio
+import base64
+import hashlib
+import io
+from typing import NamedTuple
+import qrcode
+import qrcode.image.svg
+from app.core.cache import LRUCache
+from app.config import QR_CACHE_MAX_SIZE
+
+QR_MEDIA_TYPES = {
+    "png": "image/png",
+    "svg": "image/svg+xml"
+}
+
+class QrImage(NamedTuple):
+    content: bytes
+    media_type: str
+    etag: str
+
+    def to_data_uri(self) -> str:
+        return f"data:{self.media_type};base64,{base64.b64encode(self.content).decode()}"
+
+qr_cache = LRUCache(max_size=QR_CACHE_MAX_SIZE)
+
+def render_qr_code(data: str, size: int, border: int, format: str) -> bytes:
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=size,
+        border=border,
+    )
+    qr.add_data(data)
+    qr.make(fit=True)
+
+    buffer = io.BytesIO()
+    if format == "svg":
+        qr.make_image(image_factory=qrcode.image.svg.SvgPathImage).save(buffer)
+    else:
+        qr.make_image(fill_color="black", back_color="white").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+async def get_qr_code(data: str, size: int = 10, border: int = 4, format: str = "png") -> QrImage:
+    key = (data, size, border, format)
+    image = qr_cache.get(key)
+    if image is None:
+        content = await asyncio.to_thread(render_qr_code, data, size, border, format)
+        image = QrImage(content, QR_MEDIA_TYPES[format], f'"{hashlib.sha256(content).hexdigest()[:32]}"')
+        qr_cache.set(key, image)
+    return image
@@ -0,0 +1,45 @@
+from fastapi import HTTPException
+from starlette.requests import Request
+from datetime import datetime
+from typing import Optional
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.models.url import Url
+from app.crud.url import get_url_by_short_code_cached, decrement_clicks_count, set_url_inactive
+from app.core.click_events import click_event_shipper, build_click_event
+from app.core.snapshot import redirect_snapshot
+from app.config import REDIRECT_SNAPSHOT_DB_FALLBACK
+
+async def resolve_redirect(session: AsyncSession, short_code: str, password: Optional[str]) -> Url:
+    url = await get_url_by_short_code_cached(session, short_code)
+    
+    if not url:
+        if not REDIRECT_SNAPSHOT_DB_FALLBACK and redirect_snapshot.reader is not None and redirect_snapshot.reader.get(short_code):
+            # Click-limited links are counted in the database, which this replica does not query
+            raise HTTPException(status_code=503, detail="URL is not available on this server")
+        raise HTTPException(status_code=404, detail="URL not found")
+    
+    if not url.is_active:
+        raise HTTPException(status_code=410, detail="URL is no longer active")
+    
+    if url.expires_at and datetime.utcnow() > url.expires_at:
+        raise HTTPException(status_code=410, detail="URL has expired")
+    
+    if url.remaining_clicks is not None and url.remaining_clicks <= 0:
+        await set_url_inactive(session, url)
+        raise HTTPException(status_code=410, detail="URL has reached maximum clicks limit")
+    
+    if url.password is not None:
+        if password is None:
+            raise HTTPException(
+                status_code=401, 
+                detail="Password required. Add password param"
+            )
+        if password != url.password:
+            raise HTTPException(status_code=401, detail="Invalid password")
+    
+    return url
+
+async def register_click(session: AsyncSession, request: Request, url: Url) -> None:
+    if not await decrement_clicks_count(session, url):
+        raise HTTPException(status_code=410, detail="URL has reached maximum clicks limit")
+    click_event_shipper.enqueue(build_click_event(request, url.id, url.user_id))
@@ -1,32 +1,131 @@
 import logging
-from typing import Dict, List, Optional
-from urllib.parse import urlparse
-import httpx
-from app.config import GOOGLE_SAFE_BROWSING_API_KEY, SAFE_BROWSING_ENABLED
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse, urlsplit, urlunsplit
+from app.config import (
+    GOOGLE_SAFE_BROWSING_API_KEY, SAFE_BROWSING_ENABLED, SAFE_BROWSING_BATCH_SIZE,
+    SAFE_BROWSING_CACHE_MAX_SIZE, SAFE_BROWSING_CACHE_SAFE_TTL, SAFE_BROWSING_CACHE_UNSAFE_TTL
+)
+from app.core.cache import LRUCache
+from app.core.http_clients import upstream_clients
+from app.core.threat_db import threat_database
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+def canonicalize_url(url: str) -> Tuple[str, str]:
+    parsed = urlsplit(url if "://" in url else f"https://{url}")
+    scheme = parsed.scheme.lower()
+    host = (parsed.hostname or "").rstrip(".").lower()
+    try:
+        port = parsed.port
+    except ValueError:
+        port = None
+    netloc = f"{host}:{port}" if port and DEFAULT_PORTS.get(scheme) != port else host
+    return urlunsplit((scheme, netloc, parsed.path or "/", parsed.query, "")), host
+
 class SafeBrowsingService:
     def __init__(self):
         self.api_key = GOOGLE_SAFE_BROWSING_API_KEY
         self.enabled = SAFE_BROWSING_ENABLED and bool(self.api_key)
-        self.base_url = "https://safebrowsing.googleapis.com/v4/threatMatches:find"
-        
+
+        self.verdict_cache = LRUCache(max_size=SAFE_BROWSING_CACHE_MAX_SIZE)
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.upstream_requests = 0
+        self.upstream_errors = 0
+        self.upstream_latency_total = 0.0
+        self.upstream_latency_max = 0.0
+
         if not self.enabled:
             pass
-        
+
     async def check_url_safety(self, url: str) -> Dict[str, any]:
+        return (await self.check_urls_safety([url]))[url]
+
+    async def check_urls_safety(self, urls: List[str], use_cache: bool = True) -> Dict[str, Dict[str, any]]:
         if not self.enabled:
             return {
-                "is_safe": True,
-                "threats": [],
-                "details": "Safe Browsing check disabled"
+                url: {
+                    "is_safe": True,
+                    "threats": [],
+                    "details": "Safe Browsing check disabled"
+                }
+                for url in urls
             }
-        
-        try:
+
+        results = {}
+        misses = []
+        for url in dict.fromkeys(urls):
+            cached = self._get_cached_verdict(url) if use_cache else None
+            if cached is None:
+                misses.append(url)
+            else:
+                results[url] = cached
+
+        for i in range(0, len(misses), SAFE_BROWSING_BATCH_SIZE):
+            chunk_results, authoritative = await self._check_chunk(misses[i:i + SAFE_BROWSING_BATCH_SIZE])
+            if authoritative:
+                for url, verdict in chunk_results.items():
+                    self._cache_verdict(url, verdict)
+            results.update(chunk_results)
+        return results
+
+    def _get_cached_verdict(self, url: str) -> Optional[Dict[str, any]]:
+        canonical_url, host = canonicalize_url(url)
+        verdict = self.verdict_cache.get(("url", canonical_url)) or self.verdict_cache.get(("host", host))
+        if verdict is None:
+            self.cache_misses += 1
+        else:
+            self.cache_hits += 1
+        return verdict
+
+    def _cache_verdict(self, url: str, verdict: Dict[str, any]) -> None:
+        canonical_url, host = canonicalize_url(url)
+        if verdict["is_safe"]:
+            self.verdict_cache.set(("url", canonical_url), verdict, ttl=SAFE_BROWSING_CACHE_SAFE_TTL)
+            return
+        self.verdict_cache.set(("url", canonical_url), verdict, ttl=SAFE_BROWSING_CACHE_UNSAFE_TTL)
+        if urlsplit(canonical_url)[2:4] == ("/", ""):
+            # A match on the host root means the whole host is listed
+            self.verdict_cache.set(("host", host), verdict, ttl=SAFE_BROWSING_CACHE_UNSAFE_TTL)
+
+    async def _check_chunk(self, urls: List[str]) -> Tuple[Dict[str, Dict[str, any]], bool]:
+        if threat_database.ready:
+            try:
+                return self._build_results(urls, await threat_database.check_urls(urls)), True
+            except Exception as e:
+                logger.error(f"Local threat database check failed, falling back to Lookup API: {e}")
+        return await self._lookup_chunk(urls)
+
+    def _build_results(self, urls: List[str], threats: Dict[str, List[str]]) -> Dict[str, Dict[str, any]]:
+        results = {}
+        for url in urls:
+            url_threats = threats.get(url)
+            if url_threats:
+                logger.warning(f"URL {url} flagged as unsafe: {url_threats}")
+                results[url] = {
+                    "is_safe": False,
+                    "threats": url_threats,
+                    "details": f"Threats detected: {', '.join(url_threats)}"
+                }
+            else:
+                results[url] = {
+                    "is_safe": True,
+                    "threats": [],
+                    "details": "No threats detected"
+                }
+        return results
+
+    async def _lookup_chunk(self, urls: List[str]) -> Tuple[Dict[str, Dict[str, any]], bool]:
+        # Inputs that submit as the same entry share its verdict
+        entries: Dict[str, List[str]] = {}
+        for url in urls:
             parsed_url = urlparse(url)
-            if not parsed_url.scheme:
-                url = f"https://{url}"
+            entries.setdefault(url if parsed_url.scheme else f"https://{url}", []).append(url)
+
+        try:
             payload = {
                 "client": {
                     "clientId": "easylink-url-shortener",
@@ -41,48 +140,77 @@ class SafeBrowsingService:
                     ],
                     "platformTypes": ["ANY_PLATFORM"],
                     "threatEntryTypes": ["URL"],
-                    "threatEntries": [{"url": url}]
+                    "threatEntries": [{"url": entry} for entry in entries]
                 }
             }
-            
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}?key={self.api_key}",
-                    json=payload,
-                    timeout=10.0
+
+            started = time.perf_counter()
+            self.upstream_requests += 1
+            try:
+                response = await upstream_clients.get("safe_browsing").post(
+                    "/threatMatches:find",
+                    params={"key": self.api_key},
+                    json=payload
                 )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    if "matches" in result:
-                        threats = [match["threatType"] for match in result["matches"]]
-                        logger.warning(f"URL {url} flagged as unsafe: {threats}")
-                        return {
-                            "is_safe": False,
-                            "threats": threats,
-                            "details": f"Threats detected: {', '.join(threats)}"
-                        }
-                    else:
-                        return {
-                            "is_safe": True,
-                            "threats": [],
-                            "details": "No threats detected"
-                        }
-                else:
-                    logger.error(f"Safe Browsing API error: {response.status_code}")
-                    return {
+            finally:
+                latency = time.perf_counter() - started
+                self.upstream_latency_total += latency
+                self.upstream_latency_max = max(self.upstream_latency_max, latency)
+
+            if response.status_code == 200:
+                threats: Dict[str, List[str]] = {}
+                for match in response.json().get("matches", []):
+                    entry = match.get("threat", {}).get("url")
+                    for url in entries.get(entry, []):
+                        if match["threatType"] not in threats.setdefault(url, []):
+                            threats[url].append(match["threatType"])
+                return self._build_results(urls, threats), True
+            else:
+                logger.error(f"Safe Browsing API error: {response.status_code}")
+                self.upstream_errors += 1
+                return {
+                    url: {
                         "is_safe": True,
                         "threats": [],
-                        "details": f"API error: {response.status_code}"
+                        "details": f"API error: {response.status_code}",
+                        "error": True
                     }
+                    for url in urls
+                }, False
         except Exception as e:
-            logger.error(f"Error checking URL safety for {url}: {e}")
+            logger.error(f"Error checking URL safety for {len(urls)} URLs: {e}")
+            self.upstream_errors += 1
             return {
-                "is_safe": True,
-                "threats": [],
-                "details": f"Error checking URL: {str(e)}"
+                url: {
+                    "is_safe": True,
+                    "threats": [],
+                    "details": f"Error checking URL: {str(e)}",
+                    "error": True
+                }
+                for url in urls
+            }, False
+
+    def stats(self) -> Dict[str, any]:
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "enabled": self.enabled,
+            "cache": {
+                **self.verdict_cache.stats(),
+                "safe_ttl": SAFE_BROWSING_CACHE_SAFE_TTL,
+                "unsafe_ttl": SAFE_BROWSING_CACHE_UNSAFE_TTL,
+                "url_lookups": lookups,
+                "url_hits": self.cache_hits,
+                "url_hit_ratio": round(self.cache_hits / lookups, 4) if lookups else 0.0
+            },
+            "local_database": threat_database.stats(),
+            "upstream": {
+                "requests": self.upstream_requests,
+                "errors": self.upstream_errors,
+                "avg_latency_ms": round(self.upstream_latency_total / self.upstream_requests * 1000, 2) if self.upstream_requests else 0.0,
+                "max_latency_ms": round(self.upstream_latency_max * 1000, 2)
             }
-    
+        }
+
     def get_threat_description(self, threat_type: str) -> str:
         descriptions = {
             "MALWARE": "Malicious software that can harm your device",
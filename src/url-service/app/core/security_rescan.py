@@ -0,0 +1,156 @@
+import asyncio
+import itertools
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import and_, or_
+from sqlmodel import select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.database import create_session
+from app.models.url import Url
+from app.crud.url import apply_safety_verdicts, invalidate_cached_urls
+from app.crud.job_state import get_job_state, save_job_state
+from app.core.safe_browsing import safe_browsing_service
+from app.config import (
+    SECURITY_RESCAN_ENABLED, SECURITY_RESCAN_MAX_AGE, SECURITY_RESCAN_INTERVAL,
+    SECURITY_RESCAN_CHUNK_SIZE, SECURITY_RESCAN_BATCH_SIZE, SECURITY_RESCAN_CONCURRENCY,
+    SECURITY_RESCAN_RETRY_DELAY
+)
+
+logger = logging.getLogger(__name__)
+
+JOB_NAME = "security_rescan"
+
+class SecurityRescanJob:
+    def __init__(self):
+        self.enabled = SECURITY_RESCAN_ENABLED and safe_browsing_service.enabled
+        self.cursor: Dict[str, Any] = {}
+        self.passes = 0
+        self.chunks = 0
+        self.scanned = 0
+        self.deactivated = 0
+        self.errors = 0
+        self.failed_chunks = 0
+        self.busy_seconds = 0.0
+        self.last_chunk_rate = 0.0
+        self.last_pass_finished_at: Optional[datetime] = None
+
+    def _query(self):
+        cutoff = datetime.fromisoformat(self.cursor["pass_started_at"]) - timedelta(seconds=SECURITY_RESCAN_MAX_AGE)
+        query = select(Url.id, Url.short_code, Url.original_url, Url.safety_check_at).where(Url.is_active == True)
+        last_id = self.cursor.get("id", 0)
+        if self.cursor.get("checked_at") is None:
+            query = query.where(or_(
+                and_(Url.safety_check_at == None, Url.id > last_id),
+                Url.safety_check_at < cutoff
+            ))
+        else:
+            last_checked_at = datetime.fromisoformat(self.cursor["checked_at"])
+            query = query.where(Url.safety_check_at < cutoff, or_(
+                Url.safety_check_at > last_checked_at,
+                and_(Url.safety_check_at == last_checked_at, Url.id > last_id)
+            ))
+        return query.order_by(Url.safety_check_at.asc().nulls_first(), Url.id).limit(SECURITY_RESCAN_CHUNK_SIZE)
+
+    async def _check(self, urls: List[Tuple[int, str, str]]) -> Dict[str, dict]:
+        semaphore = asyncio.Semaphore(SECURITY_RESCAN_CONCURRENCY)
+
+        async def check_batch(batch: List[Tuple[int, str, str]]) -> Dict[str, dict]:
+            async with semaphore:
+                return await safe_browsing_service.check_urls_safety(
+                    [original_url for _, _, original_url in batch],
+                    use_cache=False
+                )
+
+        safety_checks = {}
+        batches = [urls[i:i + SECURITY_RESCAN_BATCH_SIZE] for i in range(0, len(urls), SECURITY_RESCAN_BATCH_SIZE)]
+        for result in await asyncio.gather(*(check_batch(batch) for batch in batches)):
+            safety_checks.update(result)
+        return safety_checks
+
+    async def run_chunk(self, session: AsyncSession) -> int:
+        if not self.cursor.get("pass_started_at"):
+            self.cursor = {"pass_started_at": datetime.utcnow().isoformat(), "checked_at": None, "id": 0}
+
+        rows = (await session.exec(self._query())).all()
+        if not rows:
+            self.passes += 1
+            self.last_pass_finished_at = datetime.utcnow()
+            self.cursor = {}
+            await save_job_state(session, JOB_NAME, self.cursor)
+            await session.commit()
+            return 0
+
+        started = time.monotonic()
+        urls = [(row.id, row.short_code, row.original_url) for row in rows]
+        safety_checks = await self._check(urls)
+        results, deactivated = await apply_safety_verdicts(session, urls, safety_checks, datetime.utcnow())
+
+        # The cursor stops before the first failed lookup so the next chunk retries it
+        failed = {result["url_id"] for result in results if result["action"] == "scan_failed"}
+        checked = list(itertools.takewhile(lambda row: row.id not in failed, rows))
+        if checked:
+            last = checked[-1]
+            self.cursor["checked_at"] = last.safety_check_at.isoformat() if last.safety_check_at else None
+            self.cursor["id"] = last.id
+        await save_job_state(session, JOB_NAME, self.cursor)
+        await session.commit()
+        invalidate_cached_urls(deactivated)
+
+        elapsed = time.monotonic() - started
+        self.chunks += 1
+        self.scanned += len(rows)
+        self.deactivated += len(deactivated)
+        self.errors += len(failed)
+        self.failed_chunks = self.failed_chunks + 1 if failed else 0
+        self.busy_seconds += elapsed
+        self.last_chunk_rate = len(rows) / elapsed if elapsed else 0.0
+        return len(rows)
+
+    async def run_periodic(self) -> None:
+        async with create_session() as session:
+            self.cursor = await get_job_state(session, JOB_NAME)
+        if self.cursor:
+            logger.info(f"Resuming security re-scan from {self.cursor}")
+
+        while True:
+            try:
+                async with create_session() as session:
+                    processed = await self.run_chunk(session)
+            except Exception as e:
+                logger.error(f"Security re-scan chunk failed: {e}")
+                processed = 0
+            if self.failed_chunks:
+                await asyncio.sleep(self.retry_delay())
+            elif not processed:
+                await asyncio.sleep(SECURITY_RESCAN_INTERVAL)
+
+    def retry_delay(self) -> float:
+        return min(SECURITY_RESCAN_RETRY_DELAY * 2 ** (self.failed_chunks - 1), SECURITY_RESCAN_INTERVAL)
+
+    async def count_backlog(self, session: AsyncSession) -> int:
+        cutoff = datetime.utcnow() - timedelta(seconds=SECURITY_RESCAN_MAX_AGE)
+        query = select(func.count(Url.id)).where(
+            Url.is_active == True,
+            or_(Url.safety_check_at == None, Url.safety_check_at < cutoff)
+        )
+        return (await session.exec(query)).first() or 0
+
+    async def stats(self, session: AsyncSession) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "cursor": self.cursor,
+            "backlog": await self.count_backlog(session),
+            "passes": self.passes,
+            "last_pass_finished_at": self.last_pass_finished_at,
+            "chunks": self.chunks,
+            "scanned": self.scanned,
+            "deactivated": self.deactivated,
+            "errors": self.errors,
+            "failed_chunks": self.failed_chunks,
+            "urls_per_second": round(self.scanned / self.busy_seconds, 2) if self.busy_seconds else 0.0,
+            "last_chunk_urls_per_second": round(self.last_chunk_rate, 2)
+        }
+
+security_rescan_job = SecurityRescanJob()
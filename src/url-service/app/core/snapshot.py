@@ -0,0 +1,462 @@
+import asyncio
+import fcntl
+import glob
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.models.url import Url
+from app.config import REDIRECT_SNAPSHOT_PATH, REDIRECT_SNAPSHOT_REFRESH_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MAGIC = b"ELSNAP02"
+DELTA_MAGIC = b"ELDELT01"
+SNAPSHOT_HEADER = struct.Struct("<8sQQ")
+HEADER = struct.Struct("<8sQ")
+OFFSET = struct.Struct("<Q")
+RECORD = struct.Struct("<qqBqqHIH")
+CODE_LEN = struct.Struct("<H")
+CODE_LEN_OFFSET = struct.calcsize("<qqBqq")
+DELTA_OP = struct.Struct("<B")
+TOMBSTONE_FRAME = struct.Struct("<QI")
+
+FLAG_HIDE_THUMBNAIL = 1
+FLAG_CLICK_LIMITED = 2
+NO_VALUE = -1
+EPOCH = datetime(1970, 1, 1)
+
+OP_UPSERT = 1
+OP_DELETE = 2
+
+class SnapshotRecord(NamedTuple):
+    short_code: str
+    original_url: str
+    id: int
+    user_id: int
+    flags: int
+    expires_at: Optional[datetime]
+    remaining_clicks: Optional[int]
+    password: Optional[str]
+
+    @property
+    def click_limited(self) -> bool:
+        return bool(self.flags & FLAG_CLICK_LIMITED)
+
+    def to_url(self) -> Url:
+        return Url(
+            id=self.id,
+            original_url=self.original_url,
+            short_code=self.short_code,
+            user_id=self.user_id,
+            is_active=True,
+            password=self.password,
+            remaining_clicks=self.remaining_clicks,
+            hide_thumbnail=bool(self.flags & FLAG_HIDE_THUMBNAIL),
+            expires_at=self.expires_at
+        )
+
+def record_from_url(url: Url) -> SnapshotRecord:
+    flags = 0
+    if url.hide_thumbnail:
+        flags |= FLAG_HIDE_THUMBNAIL
+    if url.remaining_clicks is not None:
+        flags |= FLAG_CLICK_LIMITED
+    return SnapshotRecord(
+        short_code=url.short_code,
+        original_url=url.original_url,
+        id=url.id,
+        user_id=url.user_id,
+        flags=flags,
+        expires_at=url.expires_at,
+        remaining_clicks=url.remaining_clicks,
+        password=url.password
+    )
+
+def encode_record(record: SnapshotRecord) -> bytes:
+    code = record.short_code.encode("utf-8")
+    original_url = record.original_url.encode("utf-8")
+    password = record.password.encode("utf-8") if record.password is not None else b""
+    expires_at = (record.expires_at - EPOCH) // timedelta(microseconds=1) if record.expires_at else NO_VALUE
+    remaining_clicks = record.remaining_clicks if record.remaining_clicks is not None else NO_VALUE
+    password_len = len(password) if record.password is not None else 0xFFFF
+    return RECORD.pack(
+        record.id, record.user_id, record.flags, expires_at, remaining_clicks,
+        len(code), len(original_url), password_len
+    ) + code + original_url + password
+
+def decode_record(buffer, offset: int) -> Tuple[SnapshotRecord, int]:
+    record_id, user_id, flags, expires_at, remaining_clicks, code_len, url_len, password_len = RECORD.unpack_from(buffer, offset)
+    position = offset + RECORD.size
+    code = bytes(buffer[position:position + code_len]).decode("utf-8")
+    position += code_len
+    original_url = bytes(buffer[position:position + url_len]).decode("utf-8")
+    position += url_len
+    password = None
+    if password_len != 0xFFFF:
+        password = bytes(buffer[position:position + password_len]).decode("utf-8")
+        position += password_len
+    record = SnapshotRecord(
+        short_code=code,
+        original_url=original_url,
+        id=record_id,
+        user_id=user_id,
+        flags=flags,
+        expires_at=EPOCH + timedelta(microseconds=expires_at) if expires_at != NO_VALUE else None,
+        remaining_clicks=remaining_clicks if remaining_clicks != NO_VALUE else None,
+        password=password
+    )
+    return record, position
+
+def next_sequence() -> int:
+    return time.time_ns()
+
+def delta_path(path: str, sequence: int) -> str:
+    return f"{path}.delta.{sequence:020d}-{os.getpid()}"
+
+def delta_sequence(path: str) -> int:
+    return int(path.rsplit(".delta.", 1)[1].split("-", 1)[0])
+
+def delta_paths(path: str, after: int = 0) -> List[str]:
+    paths = glob.glob(f"{glob.escape(path)}.delta.*")
+    return sorted(delta for delta in paths if delta_sequence(delta) > after)
+
+def tombstone_log_path(path: str) -> str:
+    return f"{path}.tombstones"
+
+def encode_tombstones(sequence: int, short_codes: List[str]) -> bytes:
+    codes = [short_code.encode("utf-8") for short_code in short_codes]
+    return TOMBSTONE_FRAME.pack(sequence, len(codes)) + b"".join(CODE_LEN.pack(len(code)) + code for code in codes)
+
+def decode_tombstones(data: bytes) -> Iterator[Tuple[int, List[str], int, int]]:
+    """Yield (sequence, short codes, start, end) for each complete frame, stopping at a partial one."""
+    position = 0
+    while position + TOMBSTONE_FRAME.size <= len(data):
+        start = position
+        sequence, count = TOMBSTONE_FRAME.unpack_from(data, position)
+        position += TOMBSTONE_FRAME.size
+        codes = []
+        for _ in range(count):
+            if position + CODE_LEN.size > len(data):
+                return
+            code_len = CODE_LEN.unpack_from(data, position)[0]
+            position += CODE_LEN.size
+            if position + code_len > len(data):
+                return
+            codes.append(data[position:position + code_len].decode("utf-8"))
+            position += code_len
+        yield sequence, codes, start, position
+
+@contextmanager
+def locked_tombstone_log(path: str) -> Iterator[int]:
+    log_path = tombstone_log_path(path)
+    while True:
+        fd = os.open(log_path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(fd).st_ino == os.stat(log_path).st_ino:
+                break
+        except FileNotFoundError:
+            pass
+        # Compacted while we waited for the lock, append to the new file instead
+        os.close(fd)
+    try:
+        yield fd
+    finally:
+        os.close(fd)
+
+class SnapshotReader:
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._stat = os.fstat(self._file.fileno())
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, self.sequence = SNAPSHOT_HEADER.unpack_from(self._map, 0)
+        if magic != SNAPSHOT_MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a redirect snapshot")
+        self._overlay: Dict[str, Optional[SnapshotRecord]] = {}
+        self.applied_deltas: Set[str] = set()
+        self.applied_tombstones: Set[int] = set()
+        self._tombstones_inode: Optional[int] = None
+        self._tombstones_offset = 0
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+    def is_stale(self) -> bool:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        return (stat.st_ino, stat.st_mtime_ns) != (self._stat.st_ino, self._stat.st_mtime_ns)
+
+    def _offset_at(self, index: int) -> int:
+        return OFFSET.unpack_from(self._map, SNAPSHOT_HEADER.size + index * OFFSET.size)[0]
+
+    def _code_at(self, offset: int) -> bytes:
+        code_len = CODE_LEN.unpack_from(self._map, offset + CODE_LEN_OFFSET)[0]
+        start = offset + RECORD.size
+        return self._map[start:start + code_len]
+
+    def _base_get(self, short_code: str) -> Optional[SnapshotRecord]:
+        key = short_code.encode("utf-8")
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            offset = self._offset_at(middle)
+            code = self._code_at(offset)
+            if code < key:
+                low = middle + 1
+            elif code > key:
+                high = middle
+            else:
+                return decode_record(self._map, offset)[0]
+        return None
+
+    def get(self, short_code: str) -> Optional[SnapshotRecord]:
+        if short_code in self._overlay:
+            return self._overlay[short_code]
+        return self._base_get(short_code)
+
+    def __iter__(self) -> Iterator[SnapshotRecord]:
+        overlay = dict(self._overlay)
+        for index in range(self.count):
+            record = decode_record(self._map, self._offset_at(index))[0]
+            if record.short_code in overlay:
+                record = overlay.pop(record.short_code)
+                if record is None:
+                    continue
+            yield record
+        for record in overlay.values():
+            if record is not None:
+                yield record
+
+    def apply_delta(self, path: str) -> int:
+        with open(path, "rb") as delta_file:
+            data = delta_file.read()
+        magic, count = HEADER.unpack_from(data, 0)
+        if magic != DELTA_MAGIC:
+            raise ValueError(f"{path} is not a redirect snapshot delta")
+        position = HEADER.size
+        for _ in range(count):
+            op = DELTA_OP.unpack_from(data, position)[0]
+            record, position = decode_record(data, position + DELTA_OP.size)
+            self._overlay[record.short_code] = record if op == OP_UPSERT else None
+        self.applied_deltas.add(path)
+        return count
+
+    def apply_tombstones(self, sequence: int, short_codes: List[str]) -> int:
+        self.forget(short_codes)
+        self.applied_tombstones.add(sequence)
+        return len(short_codes)
+
+    def read_new_tombstones(self) -> List[Tuple[int, List[str]]]:
+        try:
+            with open(tombstone_log_path(self.path), "rb") as log_file:
+                inode = os.fstat(log_file.fileno()).st_ino
+                if inode != self._tombstones_inode:
+                    self._tombstones_inode, self._tombstones_offset = inode, 0
+                log_file.seek(self._tombstones_offset)
+                data = log_file.read()
+        except FileNotFoundError:
+            return []
+        frames = []
+        consumed = 0
+        for sequence, short_codes, _, consumed in decode_tombstones(data):
+            if sequence > self.sequence and sequence not in self.applied_tombstones:
+                frames.append((sequence, short_codes))
+        self._tombstones_offset += consumed
+        return frames
+
+    def forget(self, short_codes: List[str]) -> None:
+        for short_code in short_codes:
+            self._overlay[short_code] = None
+
+    def apply_new_deltas(self) -> int:
+        changes = [
+            (delta_sequence(path), path, None)
+            for path in delta_paths(self.path, after=self.sequence)
+            if path not in self.applied_deltas
+        ]
+        changes.extend((sequence, None, short_codes) for sequence, short_codes in self.read_new_tombstones())
+        applied = 0
+        for sequence, path, short_codes in sorted(changes, key=lambda change: change[0]):
+            if path is not None:
+                applied += self.apply_delta(path)
+            else:
+                applied += self.apply_tombstones(sequence, short_codes)
+        return applied
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "path": self.path,
+            "records": self.count,
+            "sequence": self.sequence,
+            "size_bytes": len(self._map),
+            "deltas": len(self.applied_deltas),
+            "tombstones": len(self.applied_tombstones),
+            "overlay_records": len(self._overlay)
+        }
+
+def write_atomically(path: str, chunks: Iterator[bytes]) -> None:
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".snapshot-")
+    try:
+        with os.fdopen(fd, "wb") as temp_file:
+            for chunk in chunks:
+                temp_file.write(chunk)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+        os.replace(temp_path, path)
+    except Exception:
+        os.unlink(temp_path)
+        raise
+
+async def stream_active_urls(session: AsyncSession) -> AsyncIterator[Url]:
+    result = await session.stream_scalars(
+        select(Url).where(Url.is_active == True).execution_options(yield_per=10000)
+    )
+    async for url in result:
+        yield url
+
+async def export_snapshot(session: AsyncSession, path: str) -> int:
+    sequence = next_sequence()
+    entries: List[Tuple[bytes, int, int]] = []
+    with tempfile.TemporaryFile() as records_file:
+        async for url in stream_active_urls(session):
+            encoded = encode_record(record_from_url(url))
+            entries.append((url.short_code.encode("utf-8"), records_file.tell(), len(encoded)))
+            records_file.write(encoded)
+        entries.sort()
+
+        def chunks() -> Iterator[bytes]:
+            yield SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, len(entries), sequence)
+            base = SNAPSHOT_HEADER.size + len(entries) * OFFSET.size
+            position = base
+            for _, _, size in entries:
+                yield OFFSET.pack(position)
+                position += size
+            for _, offset, size in entries:
+                records_file.seek(offset)
+                yield records_file.read(size)
+
+        write_atomically(path, chunks())
+
+    for stale_delta in glob.glob(f"{glob.escape(path)}.delta.*"):
+        if delta_sequence(stale_delta) <= sequence:
+            os.unlink(stale_delta)
+    compact_tombstones(path, sequence)
+    logger.info(f"Exported {len(entries)} URLs to redirect snapshot {path}")
+    return len(entries)
+
+async def export_delta(session: AsyncSession, path: str) -> int:
+    sequence = next_sequence()
+    reader = SnapshotReader(path)
+    try:
+        reader.apply_new_deltas()
+        changes: List[bytes] = []
+        seen = set()
+        async for url in stream_active_urls(session):
+            record = record_from_url(url)
+            seen.add(record.short_code)
+            if reader.get(record.short_code) != record:
+                changes.append(DELTA_OP.pack(OP_UPSERT) + encode_record(record))
+        for record in reader:
+            if record.short_code not in seen:
+                changes.append(DELTA_OP.pack(OP_DELETE) + encode_record(record))
+    finally:
+        reader.close()
+
+    if changes:
+        write_atomically(delta_path(path, sequence), iter([HEADER.pack(DELTA_MAGIC, len(changes)), *changes]))
+    logger.info(f"Exported {len(changes)} changes to redirect snapshot delta for {path}")
+    return len(changes)
+
+def write_tombstones(path: str, short_codes: List[str], sequence: Optional[int] = None) -> None:
+    frame = encode_tombstones(sequence or next_sequence(), short_codes)
+    with locked_tombstone_log(path) as fd:
+        os.write(fd, frame)
+
+def compact_tombstones(path: str, sequence: int) -> None:
+    """Drop tombstones that the snapshot exported at sequence already reflects."""
+    if not os.path.exists(tombstone_log_path(path)):
+        return
+    with locked_tombstone_log(path) as fd:
+        data = os.pread(fd, os.fstat(fd).st_size, 0)
+        kept = [data[start:end] for frame_sequence, _, start, end in decode_tombstones(data) if frame_sequence > sequence]
+        write_atomically(tombstone_log_path(path), iter(kept))
+
+class RedirectSnapshot:
+    def __init__(self, path: str = REDIRECT_SNAPSHOT_PATH):
+        self.path = path
+        self.reader: Optional[SnapshotReader] = None
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def load(self) -> None:
+        reader = SnapshotReader(self.path)
+        reader.apply_new_deltas()
+        previous, self.reader = self.reader, reader
+        if previous is not None:
+            previous.close()
+        logger.info(f"Loaded redirect snapshot {self.path} with {reader.count} URLs and {len(reader.applied_deltas)} deltas")
+
+    def refresh(self) -> None:
+        if self.reader is None or self.reader.is_stale():
+            self.load()
+        else:
+            self.reader.apply_new_deltas()
+
+    def get(self, short_code: str) -> Optional[SnapshotRecord]:
+        if self.reader is None:
+            return None
+        record = self.reader.get(short_code)
+        if record is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return record
+
+    def invalidate(self, short_codes: List[str]) -> None:
+        if not self.enabled or not short_codes:
+            return
+        if self.reader is not None:
+            self.reader.forget(short_codes)
+        try:
+            write_tombstones(self.path, short_codes)
+        except Exception as e:
+            logger.error(f"Writing redirect snapshot tombstones for {len(short_codes)} URLs failed: {e}")
+
+    async def run_periodic_refresh(self) -> None:
+        while True:
+            await asyncio.sleep(REDIRECT_SNAPSHOT_REFRESH_INTERVAL)
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Redirect snapshot refresh failed: {e}")
+
+    def stats(self) -> Dict[str, object]:
+        if self.reader is None:
+            return {"enabled": self.enabled, "loaded": False}
+        return {
+            "enabled": True,
+            "loaded": True,
+            "hits": self.hits,
+            "misses": self.misses,
+            **self.reader.stats()
+        }
+
+redirect_snapshot = RedirectSnapshot()
@@ -0,0 +1,336 @@
+import asyncio
+import base64
+import hashlib
+import ipaddress
+import logging
+import posixpath
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+from app.config import (
+    GOOGLE_SAFE_BROWSING_API_KEY, SAFE_BROWSING_ENABLED, SAFE_BROWSING_LOCAL_DB,
+    SAFE_BROWSING_UPDATE_INTERVAL, SAFE_BROWSING_CACHE_MAX_SIZE
+)
+from app.core.cache import LRUCache
+from app.core.http_clients import upstream_clients
+
+logger = logging.getLogger(__name__)
+
+CLIENT_INFO = {
+    "clientId": "easylink-url-shortener",
+    "clientVersion": "1.0"
+}
+THREAT_TYPES = [
+    "MALWARE",
+    "SOCIAL_ENGINEERING",
+    "UNWANTED_SOFTWARE",
+    "POTENTIALLY_HARMFUL_APPLICATION"
+]
+THREAT_LISTS = [(threat_type, "ANY_PLATFORM", "URL") for threat_type in THREAT_TYPES]
+# Floor for cache durations, a missing or zero duration would otherwise never expire
+MIN_CACHE_DURATION = 30.0
+
+def parse_duration(value: Optional[str]) -> float:
+    if not value:
+        return 0.0
+    return float(value.rstrip("s"))
+
+def unquote_fully(value: str) -> str:
+    previous = None
+    while previous != value:
+        previous, value = value, unquote(value)
+    return value
+
+def quote_unsafe(value: str) -> str:
+    return "".join(
+        f"%{byte:02X}" if byte <= 0x20 or byte >= 0x7F or byte in (0x23, 0x25) else chr(byte)
+        for byte in value.encode("utf-8")
+    )
+
+def canonical_host(host: str) -> str:
+    host = unquote_fully(host).strip(".").lower()
+    while ".." in host:
+        host = host.replace("..", ".")
+    return quote_unsafe(host)
+
+def canonical_path(path: str) -> str:
+    path = unquote_fully(path) or "/"
+    trailing_slash = path.endswith("/")
+    path = posixpath.normpath(path)
+    if path.startswith("//"):
+        path = "/" + path.lstrip("/")
+    if trailing_slash and path != "/":
+        path += "/"
+    return quote_unsafe(path)
+
+def is_ip_address(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host.strip("[]"))
+        return True
+    except ValueError:
+        return False
+
+def url_expressions(url: str) -> List[str]:
+    parsed = urlsplit(url if "://" in url else f"http://{url}")
+    host = canonical_host(parsed.hostname or "")
+    path = canonical_path(parsed.path)
+    query = quote_unsafe(unquote_fully(parsed.query)) if parsed.query else ""
+
+    hosts = [host]
+    if not is_ip_address(host):
+        components = host.split(".")
+        hosts.extend(".".join(components[i:]) for i in range(max(1, len(components) - 5), len(components) - 1))
+
+    paths = [f"{path}?{query}"] if query else []
+    paths.append(path)
+    prefix = "/"
+    prefixes = [prefix]
+    for segment in path.split("/")[1:-1][:3]:
+        prefix += f"{segment}/"
+        prefixes.append(prefix)
+    paths.extend(prefix for prefix in prefixes if prefix not in paths)
+
+    return [f"{host}{path}" for host in hosts for path in paths]
+
+class PrefixSet:
+    def __init__(self, prefixes: List[bytes]):
+        groups: Dict[int, List[bytes]] = {}
+        for prefix in prefixes:
+            groups.setdefault(len(prefix), []).append(prefix)
+        self._arrays = {size: b"".join(items) for size, items in groups.items()}
+        self.count = len(prefixes)
+
+    def _contains(self, data: bytes, size: int, prefix: bytes) -> bool:
+        low, high = 0, len(data) // size
+        while low < high:
+            middle = (low + high) // 2
+            candidate = data[middle * size:(middle + 1) * size]
+            if candidate < prefix:
+                low = middle + 1
+            elif candidate > prefix:
+                high = middle
+            else:
+                return True
+        return False
+
+    def matches(self, full_hash: bytes) -> List[bytes]:
+        return [
+            full_hash[:size]
+            for size, data in self._arrays.items()
+            if self._contains(data, size, full_hash[:size])
+        ]
+
+    def to_list(self) -> List[bytes]:
+        return sorted(
+            data[i:i + size]
+            for size, data in self._arrays.items()
+            for i in range(0, len(data), size)
+        )
+
+    @property
+    def memory_bytes(self) -> int:
+        return sum(len(data) for data in self._arrays.values())
+
+class ThreatList:
+    def __init__(self, threat_type: str, platform_type: str, threat_entry_type: str):
+        self.threat_type = threat_type
+        self.platform_type = platform_type
+        self.threat_entry_type = threat_entry_type
+        self.reset()
+
+    def reset(self) -> None:
+        self.state = ""
+        self.prefixes = PrefixSet([])
+
+    def update_request(self) -> Dict[str, Any]:
+        return {
+            "threatType": self.threat_type,
+            "platformType": self.platform_type,
+            "threatEntryType": self.threat_entry_type,
+            "state": self.state,
+            "constraints": {"supportedCompressions": ["RAW"]}
+        }
+
+    def apply_update(self, response: Dict[str, Any]) -> None:
+        prefixes = [] if response.get("responseType") == "FULL_UPDATE" else self.prefixes.to_list()
+
+        removed = set()
+        for removal in response.get("removals", []):
+            removed.update(removal.get("rawIndices", {}).get("indices", []))
+        if removed:
+            prefixes = [prefix for index, prefix in enumerate(prefixes) if index not in removed]
+
+        for addition in response.get("additions", []):
+            raw_hashes = addition.get("rawHashes", {})
+            size = raw_hashes.get("prefixSize", 4)
+            data = base64.b64decode(raw_hashes.get("rawHashes", ""))
+            prefixes.extend(data[i:i + size] for i in range(0, len(data), size))
+        prefixes.sort()
+
+        checksum = response.get("checksum", {}).get("sha256")
+        if checksum and hashlib.sha256(b"".join(prefixes)).digest() != base64.b64decode(checksum):
+            raise ValueError(f"Checksum mismatch for threat list {self.threat_type}")
+
+        self.prefixes = PrefixSet(prefixes)
+        self.state = response.get("newClientState", "")
+
+class ThreatDatabase:
+    def __init__(self):
+        self.api_key = GOOGLE_SAFE_BROWSING_API_KEY
+        self.enabled = SAFE_BROWSING_LOCAL_DB and SAFE_BROWSING_ENABLED and bool(self.api_key)
+        self.lists = {key: ThreatList(*key) for key in THREAT_LISTS}
+        self.ready = False
+        self.resyncing = set()
+        self.minimum_wait = 0.0
+        self.last_update: Optional[datetime] = None
+        self.full_hash_cache = LRUCache(max_size=SAFE_BROWSING_CACHE_MAX_SIZE)
+        self.negative_cache = LRUCache(max_size=SAFE_BROWSING_CACHE_MAX_SIZE)
+        self.updates = 0
+        self.update_failures = 0
+        self.checked_urls = 0
+        self.prefix_matches = 0
+        self.confirm_requests = 0
+
+    async def update(self) -> None:
+        response = await upstream_clients.get("safe_browsing").post(
+            "/threatListUpdates:fetch",
+            params={"key": self.api_key},
+            json={
+                "client": CLIENT_INFO,
+                "listUpdateRequests": [threat_list.update_request() for threat_list in self.lists.values()]
+            }
+        )
+        response.raise_for_status()
+        data = response.json()
+
+        for list_update in data.get("listUpdateResponses", []):
+            key = (list_update.get("threatType"), list_update.get("platformType"), list_update.get("threatEntryType"))
+            threat_list = self.lists.get(key)
+            if threat_list is None:
+                continue
+            try:
+                threat_list.apply_update(list_update)
+                self.resyncing.discard(key)
+            except ValueError as e:
+                logger.error(f"{e}, requesting a full update next time")
+                threat_list.reset()
+                self.resyncing.add(key)
+
+        self.minimum_wait = parse_duration(data.get("minimumWaitDuration"))
+        self.last_update = datetime.utcnow()
+        self.updates += 1
+        # A reset list is empty until its full update arrives, the Lookup API covers it until then
+        self.ready = not self.resyncing
+        prefixes = sum(threat_list.prefixes.count for threat_list in self.lists.values())
+        if self.ready:
+            logger.info(f"Threat database updated, {prefixes} hash prefixes")
+        else:
+            logger.warning(f"Threat database updated, {prefixes} hash prefixes, {len(self.resyncing)} lists awaiting a full update")
+
+    async def run_periodic_update(self) -> None:
+        while True:
+            await asyncio.sleep(max(SAFE_BROWSING_UPDATE_INTERVAL, self.minimum_wait))
+            try:
+                await self.update()
+            except Exception as e:
+                self.update_failures += 1
+                logger.error(f"Threat database update failed: {e}")
+
+    def _lookup_threats(self, full_hash: bytes, prefixes: List[bytes]) -> Optional[List[str]]:
+        threats = self.full_hash_cache.get(full_hash)
+        if threats is not None:
+            return threats
+        if any(self.negative_cache.get(prefix) for prefix in prefixes):
+            return []
+        return None
+
+    async def _confirm(self, prefixes: List[bytes]) -> None:
+        self.confirm_requests += 1
+        response = await upstream_clients.get("safe_browsing").post(
+            "/fullHashes:find",
+            params={"key": self.api_key},
+            json={
+                "client": CLIENT_INFO,
+                "clientStates": [threat_list.state for threat_list in self.lists.values()],
+                "threatInfo": {
+                    "threatTypes": THREAT_TYPES,
+                    "platformTypes": ["ANY_PLATFORM"],
+                    "threatEntryTypes": ["URL"],
+                    "threatEntries": [{"hash": base64.b64encode(prefix).decode()} for prefix in prefixes]
+                }
+            }
+        )
+        response.raise_for_status()
+        data = response.json()
+
+        listed: Dict[bytes, Tuple[List[str], float]] = {}
+        for match in data.get("matches", []):
+            full_hash = base64.b64decode(match["threat"]["hash"])
+            threats, ttl = listed.get(full_hash, ([], float("inf")))
+            threats.append(match["threatType"])
+            listed[full_hash] = (threats, min(ttl, parse_duration(match.get("cacheDuration"))))
+        for full_hash, (threats, ttl) in listed.items():
+            self.full_hash_cache.set(full_hash, threats, ttl=max(ttl, MIN_CACHE_DURATION))
+
+        # A prefix with a listed full hash must not answer for it once the positive entry expires
+        negative_ttl = max(parse_duration(data.get("negativeCacheDuration")), MIN_CACHE_DURATION)
+        for prefix in prefixes:
+            if not any(full_hash.startswith(prefix) for full_hash in listed):
+                self.negative_cache.set(prefix, True, ttl=negative_ttl)
+
+    async def check_urls(self, urls: List[str]) -> Dict[str, List[str]]:
+        candidates: Dict[str, Dict[bytes, List[bytes]]] = {}
+        for url in urls:
+            self.checked_urls += 1
+            for expression in dict.fromkeys(url_expressions(url)):
+                full_hash = hashlib.sha256(expression.encode("utf-8")).digest()
+                prefixes = [
+                    prefix
+                    for threat_list in self.lists.values()
+                    for prefix in threat_list.prefixes.matches(full_hash)
+                ]
+                if prefixes:
+                    candidates.setdefault(url, {})[full_hash] = prefixes
+        self.prefix_matches += len(candidates)
+
+        unconfirmed = {
+            prefix
+            for hashes in candidates.values()
+            for full_hash, prefixes in hashes.items()
+            if self._lookup_threats(full_hash, prefixes) is None
+            for prefix in prefixes
+        }
+        if unconfirmed:
+            await self._confirm(sorted(unconfirmed))
+
+        results = {url: [] for url in urls}
+        for url, hashes in candidates.items():
+            for full_hash, prefixes in hashes.items():
+                for threat in self._lookup_threats(full_hash, prefixes) or []:
+                    if threat not in results[url]:
+                        results[url].append(threat)
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "ready": self.ready,
+            "resyncing_lists": len(self.resyncing),
+            "last_update": self.last_update,
+            "updates": self.updates,
+            "update_failures": self.update_failures,
+            "checked_urls": self.checked_urls,
+            "prefix_matches": self.prefix_matches,
+            "confirm_requests": self.confirm_requests,
+            "lists": {
+                threat_list.threat_type: {
+                    "prefixes": threat_list.prefixes.count,
+                    "memory_bytes": threat_list.prefixes.memory_bytes
+                }
+                for threat_list in self.lists.values()
+            },
+            "full_hash_cache": self.full_hash_cache.stats(),
+            "negative_cache": self.negative_cache.stats()
+        }
+
+threat_database = ThreatDatabase()
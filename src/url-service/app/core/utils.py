@@ -2,7 +2,11 @@ import random
 import string
 import hashlib
 import re
-from sqlmodel import Session, select
+from datetime import datetime, timezone
+from typing import AbstractSet, Optional
+from urllib.parse import urlsplit
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.models.url import Url
 from app.config import MAX_CUSTOM_URL_LENGTH, SHORT_CODE_LENGTH, RESERVED_SHORT_CODES
 
@@ -21,23 +25,34 @@ def generate_short_code_hash(url: str, length: int = SHORT_CODE_LENGTH) -> str:
         result += characters[char_index]
     return result
 
+def to_naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
 def is_code_reserved(code: str) -> bool:
     return code.lower() in RESERVED_SHORT_CODES
 
-def generate_unique_short_code(session: Session, url: str, length: int = SHORT_CODE_LENGTH) -> str:
+async def generate_unique_short_code(
+    session: AsyncSession,
+    url: str,
+    length: int = SHORT_CODE_LENGTH,
+    exclude: AbstractSet[str] = frozenset()
+) -> str:
     short_code = generate_short_code_hash(url, length)
     
     if is_code_reserved(short_code):
         short_code = generate_short_code_simple(length)
     
-    existing = session.exec(select(Url).where(Url.short_code == short_code)).first()
-    if not existing:
-        return short_code
+    if short_code not in exclude:
+        existing = (await session.exec(select(Url).where(Url.short_code == short_code))).first()
+        if not existing:
+            return short_code
     
     for attempt in range(10):
         short_code = generate_short_code_simple(length + attempt)
-        if not is_code_reserved(short_code):
-            existing = session.exec(select(Url).where(Url.short_code == short_code)).first()
+        if not is_code_reserved(short_code) and short_code not in exclude:
+            existing = (await session.exec(select(Url).where(Url.short_code == short_code))).first()
             if not existing:
                 return short_code
     
@@ -55,6 +70,18 @@ def validate_url(url: str) -> bool:
         r'(?:/?|[/?]\S+)$', re.IGNORECASE)
     return bool(url_pattern.match(url))
 
+def extract_domain(value: str) -> Optional[str]:
+    try:
+        host = urlsplit(value if "://" in value else f"//{value}").hostname
+    except ValueError:
+        return None
+    if not host:
+        return None
+    host = host.rstrip(".")
+    if host.startswith("www."):
+        host = host[4:]
+    return host or None
+
 def validate_custom_code(code: str) -> bool:
     if not code:
         return False
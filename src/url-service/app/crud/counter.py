@@ -0,0 +1,64 @@
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.dialects import postgresql, sqlite
+from app.database import engine
+from app.models.counter import Counter
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+
+CounterKey = Tuple[str, str]
+
+TOTAL_URLS = ("urls", "total")
+ACTIVE_URLS = ("urls", "active")
+
+def created_day_key(created_at: datetime) -> CounterKey:
+    return ("created_day", created_at.date().isoformat())
+
+def url_created_deltas(urls: Iterable) -> Dict[CounterKey, int]:
+    deltas: Dict[CounterKey, int] = {}
+    for url in urls:
+        keys = [TOTAL_URLS, created_day_key(url.created_at)]
+        if url.is_active:
+            keys.append(ACTIVE_URLS)
+        if url.domain:
+            keys.append(("domain", url.domain))
+        for key in keys:
+            deltas[key] = deltas.get(key, 0) + 1
+    return deltas
+
+def counter_insert():
+    if engine.dialect.name == "postgresql":
+        return postgresql.insert(Counter)
+    return sqlite.insert(Counter)
+
+def counter_rows(values: Dict[CounterKey, int]) -> List[dict]:
+    now = datetime.utcnow()
+    return [{"kind": kind, "key": key, "value": value, "updated_at": now} for (kind, key), value in values.items()]
+
+async def increment_counters(session: AsyncSession, deltas: Dict[CounterKey, int]) -> None:
+    deltas = {key: value for key, value in deltas.items() if value}
+    if not deltas:
+        return
+    # Rows are upserted in key order, so concurrent writers lock them in the same order
+    deltas = dict(sorted(deltas.items()))
+    statement = counter_insert().values(counter_rows(deltas))
+    await session.execute(statement.on_conflict_do_update(
+        index_elements=[Counter.kind, Counter.key],
+        set_={"value": Counter.value + statement.excluded.value, "updated_at": statement.excluded.updated_at}
+    ))
+
+async def get_counter(session: AsyncSession, kind: str, key: str) -> int:
+    value = (await session.exec(select(Counter.value).where(Counter.kind == kind, Counter.key == key))).first()
+    return value or 0
+
+async def get_top_counters(session: AsyncSession, kind: str, limit: int) -> List[Tuple[str, int]]:
+    return (await session.exec(
+        select(Counter.key, Counter.value)
+        .where(Counter.kind == kind, Counter.value > 0)
+        .order_by(Counter.value.desc())
+        .limit(limit)
+    )).all()
+
+async def get_all_counters(session: AsyncSession) -> Dict[CounterKey, int]:
+    rows = (await session.exec(select(Counter.kind, Counter.key, Counter.value))).all()
+    return {(row.kind, row.key): row.value for row in rows}
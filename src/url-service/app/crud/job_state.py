@@ -0,0 +1,19 @@
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.models.job_state import JobState
+from datetime import datetime
+import json
+
+async def get_job_state(session: AsyncSession, name: str) -> dict:
+    job_state = (await session.exec(select(JobState).where(JobState.name == name))).first()
+    if not job_state:
+        return {}
+    return json.loads(job_state.state)
+
+async def save_job_state(session: AsyncSession, name: str, state: dict) -> None:
+    job_state = (await session.exec(select(JobState).where(JobState.name == name))).first()
+    if not job_state:
+        job_state = JobState(name=name)
+    job_state.state = json.dumps(state, default=str)
+    job_state.updated_at = datetime.utcnow()
+    session.add(job_state)
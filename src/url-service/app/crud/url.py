@@ -1,19 +1,55 @@
-from sqlmodel import Session, select
+from sqlmodel import select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import and_, insert, not_, or_, update
+from sqlalchemy.exc import IntegrityError
 from app.models.url import Url
 from app.schemas.url import UrlCreate, UrlUpdate
-from app.core.utils import generate_unique_short_code, validate_url, validate_custom_code
+from app.core.utils import validate_url, validate_custom_code, extract_domain, to_naive_utc
+from app.crud.counter import ACTIVE_URLS, increment_counters, url_created_deltas
+from app.core.allocator import short_code_allocator
 from app.core.safe_browsing import safe_browsing_service
+from app.core.cache import url_cache
+from app.core.bloom import short_code_filter
+from app.core.previews import invalidate_preview_pages
+from app.core.snapshot import redirect_snapshot
+from app.core.qr import get_qr_code
 from datetime import datetime
-from typing import Optional
-from app.config import MAX_CUSTOM_URL_LENGTH
-import qrcode
-import io
+from typing import Dict, List, Optional, Tuple
+from app.config import MAX_CUSTOM_URL_LENGTH, REDIRECT_SNAPSHOT_DB_FALLBACK, EXPIRY_BATCH_SIZE
 import base64
+import json
 import logging
 
 logger = logging.getLogger(__name__)
 
-async def create_url(session: Session, url_data: UrlCreate, user_id: int) -> Url:
+SHORT_CODE_INSERT_ATTEMPTS = 3
+
+def invalidate_cached_url(short_code: str) -> None:
+    invalidate_cached_urls([short_code])
+
+def invalidate_cached_urls(short_codes: List[str]) -> None:
+    for short_code in short_codes:
+        url_cache.invalidate(short_code)
+        invalidate_preview_pages(short_code)
+    redirect_snapshot.invalidate(short_codes)
+
+def schedule_expiry(url: Url) -> None:
+    from app.core.expiry import expiry_scheduler
+    expiry_scheduler.schedule(url.id, url.expires_at)
+
+def unsafe_url_error(threats: List[str]) -> str:
+    threat_descriptions = [safe_browsing_service.get_threat_description(threat) for threat in threats]
+    return f"URL flagged as unsafe: {'; '.join(threat_descriptions)}"
+
+def safety_check_status(safety_check: dict) -> str:
+    if safety_check.get("error"):
+        return "error"
+    return "safe" if safety_check["is_safe"] else "unsafe"
+
+def invalid_custom_code_error() -> str:
+    return f"Invalid custom code: must be 4-{MAX_CUSTOM_URL_LENGTH} characters, alphanumeric with '_', '-' only, and not reserved"
+
+async def create_url(session: AsyncSession, url_data: UrlCreate, user_id: int) -> Url:
     if not validate_url(str(url_data.original_url)):
         raise ValueError("Invalid URL format or URL too long")
     
@@ -21,240 +57,519 @@ async def create_url(session: Session, url_data: UrlCreate, user_id: int) -> Url
         safety_check = await safe_browsing_service.check_url_safety(str(url_data.original_url))
         if not safety_check["is_safe"]:
             logger.warning(f"URL flagged as unsafe: {url_data.original_url}, threats: {safety_check['threats']}")
-            threat_descriptions = [
-                safe_browsing_service.get_threat_description(threat) 
-                for threat in safety_check["threats"]
-            ]
-            raise ValueError(f"URL flagged as unsafe: {'; '.join(threat_descriptions)}")
+            raise ValueError(unsafe_url_error(safety_check["threats"]))
     except Exception as e:
         logger.error(f"Error checking URL safety for {url_data.original_url}: {e}")
         raise
     
     if url_data.custom_code:
         if not validate_custom_code(url_data.custom_code):
-            raise ValueError(f"Invalid custom code: must be 4-{MAX_CUSTOM_URL_LENGTH} characters, alphanumeric with '_', '-' only, and not reserved")
+            raise ValueError(invalid_custom_code_error())
         
-        existing = session.exec(select(Url).where(Url.short_code == url_data.custom_code)).first()
+        existing = (await session.exec(select(Url).where(Url.short_code == url_data.custom_code))).first()
         if existing:
             raise ValueError("Custom code already exists")
         short_code = url_data.custom_code
     else:
-        short_code = generate_unique_short_code(session, str(url_data.original_url))
+        short_code = await short_code_allocator.allocate(session, str(url_data.original_url))
     
-    import json
-    safety_status = "safe" if safety_check["is_safe"] else "unsafe"
+    safety_status = safety_check_status(safety_check)
     safety_threats = json.dumps(safety_check["threats"]) if safety_check["threats"] else None
     
-    url = Url(
-        original_url=str(url_data.original_url),
-        short_code=short_code,
-        user_id=user_id,
-        expires_at=url_data.expires_at,
-        password=url_data.password,
-        remaining_clicks=url_data.remaining_clicks,
-        hide_thumbnail=url_data.hide_thumbnail,
-        safety_check_status=safety_status,
-        safety_check_at=datetime.utcnow(),
-        safety_threats=safety_threats
+    for attempt in range(SHORT_CODE_INSERT_ATTEMPTS):
+        url = Url(
+            original_url=str(url_data.original_url),
+            domain=extract_domain(str(url_data.original_url)),
+            short_code=short_code,
+            user_id=user_id,
+            expires_at=to_naive_utc(url_data.expires_at),
+            password=url_data.password,
+            remaining_clicks=url_data.remaining_clicks,
+            hide_thumbnail=url_data.hide_thumbnail,
+            safety_check_status=safety_status,
+            safety_check_at=None if safety_status == "error" else datetime.utcnow(),
+            safety_threats=safety_threats
+        )
+        
+        try:
+            session.add(url)
+            await increment_counters(session, url_created_deltas([url]))
+            await session.commit()
+            await session.refresh(url)
+            short_code_filter.add(url.short_code)
+            schedule_expiry(url)
+            return url
+        except IntegrityError:
+            await session.rollback()
+            if url_data.custom_code:
+                raise ValueError("Custom code already exists")
+            logger.warning(f"Short code {short_code} is already taken, allocating another one")
+            short_code = await short_code_allocator.allocate(session, str(url_data.original_url))
+        except Exception as e:
+            logger.error(f"Error saving URL to database: {e}")
+            await session.rollback()
+            raise
+    
+    raise ValueError("Could not generate unique short code")
+
+async def create_urls_batch(
+    session: AsyncSession,
+    items: List[UrlCreate],
+    user_id: int
+) -> List[Tuple[Optional[Url], Optional[str]]]:
+    errors: Dict[int, str] = {}
+    custom_codes: Dict[str, int] = {}
+    for index, item in enumerate(items):
+        if not validate_url(str(item.original_url)):
+            errors[index] = "Invalid URL format or URL too long"
+        elif item.custom_code:
+            if not validate_custom_code(item.custom_code):
+                errors[index] = invalid_custom_code_error()
+            elif item.custom_code in custom_codes:
+                errors[index] = "Custom code already exists"
+            else:
+                custom_codes[item.custom_code] = index
+    
+    if custom_codes:
+        existing = (await session.exec(select(Url.short_code).where(Url.short_code.in_(list(custom_codes))))).all()
+        for code in existing:
+            errors[custom_codes[code]] = "Custom code already exists"
+    
+    pending = [index for index in range(len(items)) if index not in errors]
+    safety_checks = await safe_browsing_service.check_urls_safety(
+        [str(items[index].original_url) for index in pending]
     )
+    for index in pending:
+        safety_check = safety_checks[str(items[index].original_url)]
+        if not safety_check["is_safe"]:
+            logger.warning(f"URL flagged as unsafe: {items[index].original_url}, threats: {safety_check['threats']}")
+            errors[index] = unsafe_url_error(safety_check["threats"])
+    pending = [index for index in pending if index not in errors]
     
-    try:
-        session.add(url)
-        session.commit()
-        session.refresh(url)
-        return url
-    except Exception as e:
-        logger.error(f"Error saving URL to database: {e}")
-        session.rollback()
-        raise
+    codes = {index: items[index].custom_code for index in pending if items[index].custom_code}
+    generated = [index for index in pending if index not in codes]
+    allocated = await short_code_allocator.allocate_many(session, [str(items[index].original_url) for index in generated])
+    codes.update(zip(generated, allocated))
+    
+    created: Dict[int, Url] = {}
+    for attempt in range(SHORT_CODE_INSERT_ATTEMPTS):
+        if not pending:
+            break
+        
+        checked_at = datetime.utcnow()
+        statuses = {index: safety_check_status(safety_checks[str(items[index].original_url)]) for index in pending}
+        rows = [
+            Url(
+                original_url=str(items[index].original_url),
+                domain=extract_domain(str(items[index].original_url)),
+                short_code=codes[index],
+                user_id=user_id,
+                expires_at=to_naive_utc(items[index].expires_at),
+                password=items[index].password,
+                remaining_clicks=items[index].remaining_clicks,
+                hide_thumbnail=items[index].hide_thumbnail,
+                safety_check_status=statuses[index],
+                safety_check_at=None if statuses[index] == "error" else checked_at,
+                safety_threats=None
+            ).model_dump(exclude={"id"})
+            for index in pending
+        ]
+        
+        try:
+            result = await session.execute(insert(Url).returning(Url, sort_by_parameter_order=True), rows)
+            urls = result.scalars().all()
+            await increment_counters(session, url_created_deltas(urls))
+            await session.commit()
+        except IntegrityError:
+            await session.rollback()
+            batch_codes = [codes[index] for index in pending]
+            taken = set((await session.exec(select(Url.short_code).where(Url.short_code.in_(batch_codes)))).all())
+            custom = {items[index].custom_code for index in pending if items[index].custom_code}
+            retry = []
+            for index in pending:
+                if items[index].custom_code:
+                    if codes[index] in taken:
+                        errors[index] = "Custom code already exists"
+                elif codes[index] in taken or codes[index] in custom:
+                    retry.append(index)
+            if retry:
+                logger.warning(f"{len(retry)} short codes are already taken, allocating other ones")
+                reallocated = await short_code_allocator.allocate_many(
+                    session, [str(items[index].original_url) for index in retry]
+                )
+                codes.update(zip(retry, reallocated))
+            pending = [index for index in pending if index not in errors]
+            continue
+        except Exception as e:
+            logger.error(f"Error saving URL batch to database: {e}")
+            await session.rollback()
+            raise
+        
+        for index, url in zip(pending, urls):
+            created[index] = url
+            short_code_filter.add(url.short_code)
+            schedule_expiry(url)
+        pending = []
+    
+    for index in pending:
+        errors[index] = "Could not generate unique short code"
+    
+    return [(created.get(index), errors.get(index)) for index in range(len(items))]
+
+async def apply_safety_verdicts(
+    session: AsyncSession,
+    urls: List[Tuple[int, str, str]],
+    safety_checks: Dict[str, dict],
+    checked_at: datetime
+) -> Tuple[List[dict], List[str]]:
+    results = []
+    deactivated = []
+    groups: Dict[Tuple[str, Optional[str]], List[int]] = {}
+    for url_id, short_code, original_url in urls:
+        safety_check = safety_checks[original_url]
+        threats = None
+        status = safety_check_status(safety_check)
+        if status == "error":
+            action = "scan_failed"
+        elif status == "safe":
+            action = "no_action"
+        else:
+            action = "deactivated"
+            threats = json.dumps(safety_check["threats"])
+            deactivated.append(short_code)
+        groups.setdefault((status, threats), []).append(url_id)
+        results.append({
+            "url_id": url_id,
+            "short_code": short_code,
+            "original_url": original_url,
+            "is_safe": None if status == "error" else safety_check["is_safe"],
+            "threats": safety_check["threats"],
+            "details": safety_check["details"],
+            "action": action
+        })
+    
+    for (status, threats), ids in groups.items():
+        # A failed lookup is not a check, so the re-scan keeps the link due
+        values = {"safety_check_status": status}
+        if status != "error":
+            values["safety_check_at"] = checked_at
+            values["safety_threats"] = threats
+        if status == "unsafe":
+            result = await session.execute(
+                update(Url)
+                .where(Url.id.in_(ids), Url.is_active == True)
+                .values(is_active=False)
+                .returning(Url.id)
+                .execution_options(synchronize_session=False)
+            )
+            await increment_counters(session, {ACTIVE_URLS: -len(result.all())})
+        await session.execute(update(Url).where(Url.id.in_(ids)).values(**values))
+    return results, deactivated
 
-async def update_url(session: Session, url_id: int, url_data: UrlUpdate, user_id: int) -> Optional[Url]:
+async def update_url(session: AsyncSession, url_id: int, url_data: UrlUpdate, user_id: int) -> Optional[Url]:
     if user_id == -1:
         return None
 
-    url = session.exec(select(Url).where(Url.id == url_id, Url.user_id == user_id)).first()
+    url = (await session.exec(select(Url).where(Url.id == url_id, Url.user_id == user_id))).first()
     if not url:
         return None
 
     url.password = url_data.password
-    url.expires_at = url_data.expires_at
-    if url_data.is_active:
+    url.expires_at = to_naive_utc(url_data.expires_at)
+    if url_data.is_active and not url.is_active:
         url.is_active = url_data.is_active
+        await increment_counters(session, {ACTIVE_URLS: 1})
     url.remaining_clicks = url_data.remaining_clicks
     url.hide_thumbnail = url_data.hide_thumbnail
     
     session.add(url)
-    session.commit()
-    session.refresh(url)
+    await session.commit()
+    await session.refresh(url)
+    invalidate_cached_url(url.short_code)
+    schedule_expiry(url)
     return url
 
-def deactivate_url(session: Session, url_id: int, user_id: int) -> Optional[Url]:
+async def deactivate_url(session: AsyncSession, url_id: int, user_id: int) -> Optional[Url]:
     if user_id == -1:
         return None
         
-    url = session.exec(select(Url).where(Url.id == url_id, Url.user_id == user_id)).first()
+    url = (await session.exec(select(Url).where(Url.id == url_id, Url.user_id == user_id))).first()
     if not url:
         return None
     
+    if url.is_active:
+        await increment_counters(session, {ACTIVE_URLS: -1})
     url.is_active = False
     session.add(url)
-    session.commit()
-    session.refresh(url)
+    await session.commit()
+    await session.refresh(url)
+    invalidate_cached_url(url.short_code)
     return url
 
-def activate_url(session: Session, url_id: int, user_id: int) -> Optional[Url]:
+async def activate_url(session: AsyncSession, url_id: int, user_id: int) -> Optional[Url]:
     if user_id == -1:
         return None
         
-    url = session.exec(select(Url).where(Url.id == url_id, Url.user_id == user_id)).first()
+    url = (await session.exec(select(Url).where(Url.id == url_id, Url.user_id == user_id))).first()
     if not url:
         return None
     
+    if not url.is_active:
+        await increment_counters(session, {ACTIVE_URLS: 1})
     url.is_active = True
     session.add(url)
-    session.commit()
-    session.refresh(url)
+    await session.commit()
+    await session.refresh(url)
+    invalidate_cached_url(url.short_code)
+    schedule_expiry(url)
     return url
 
-def get_url_by_short_code(session: Session, short_code: str) -> Optional[Url]:
-    return session.exec(select(Url).where(Url.short_code == short_code)).first()
+async def get_url_by_short_code(session: AsyncSession, short_code: str) -> Optional[Url]:
+    return (await session.exec(select(Url).where(Url.short_code == short_code))).first()
 
-def decrement_clicks_count(session: Session, url: Url) -> None:
-    if url.remaining_clicks is None:
-        return
-    
-    url.remaining_clicks -= 1
-    if url.remaining_clicks <= 0:
-        url.is_active = False
-    
-    session.add(url)
-    session.commit()
+async def get_url_by_short_code_cached(session: AsyncSession, short_code: str) -> Optional[Url]:
+    url = url_cache.get(short_code)
+    if url is not None:
+        return url
+    if redirect_snapshot.reader is not None:
+        record = redirect_snapshot.get(short_code)
+        if record is not None and not record.click_limited:
+            return record.to_url()
+        if not REDIRECT_SNAPSHOT_DB_FALLBACK:
+            return None
+    if not short_code_filter.might_contain(short_code):
+        return None
 
-def check_and_deactivate_expired_urls(session: Session, user_id: Optional[int] = None) -> int:
-    query = select(Url).where(
-        Url.expires_at <= datetime.utcnow(),
-        Url.is_active == True
+    url = await get_url_by_short_code(session, short_code)
+    if url and url.remaining_clicks is None:
+        url_cache.set(short_code, Url(**url.model_dump()))
+    return url
+
+async def set_url_inactive(session: AsyncSession, url: Url) -> None:
+    result = await session.execute(
+        update(Url)
+        .where(Url.id == url.id, Url.is_active == True)
+        .values(is_active=False)
+        .returning(Url.id)
+        .execution_options(synchronize_session=False)
     )
+    if result.first() is not None:
+        await increment_counters(session, {ACTIVE_URLS: -1})
+    await session.commit()
+    invalidate_cached_url(url.short_code)
+
+async def decrement_clicks_count(session: AsyncSession, url: Url) -> bool:
+    if url.remaining_clicks is None:
+        return True
     
-    if user_id is not None:
-        query = query.where(Url.user_id == user_id)
-    
-    expired_urls = session.exec(query).all()
+    result = await session.execute(
+        update(Url)
+        .where(Url.id == url.id, Url.is_active == True, Url.remaining_clicks > 0)
+        .values(remaining_clicks=Url.remaining_clicks - 1, is_active=Url.remaining_clicks > 1)
+        .returning(Url.remaining_clicks)
+        .execution_options(synchronize_session=False)
+    )
+    remaining_clicks = result.scalar_one_or_none()
+    if remaining_clicks == 0:
+        await increment_counters(session, {ACTIVE_URLS: -1})
+    await session.commit()
+    return remaining_clicks is not None
+
+async def deactivate_expired_urls(session: AsyncSession, now: datetime, url_ids: Optional[List[int]] = None) -> List[str]:
+    query = update(Url).where(Url.is_active == True, Url.expires_at <= now)
+    if url_ids is not None:
+        query = query.where(Url.id.in_(url_ids))
     
+    result = await session.execute(
+        query.values(is_active=False)
+        .returning(Url.short_code)
+        .execution_options(synchronize_session=False)
+    )
+    short_codes = result.scalars().all()
+    await increment_counters(session, {ACTIVE_URLS: -len(short_codes)})
+    await session.commit()
+    invalidate_cached_urls(short_codes)
+    return short_codes
+
+async def check_and_deactivate_expired_urls(session: AsyncSession, user_id: Optional[int] = None) -> int:
+    now = datetime.utcnow()
     count = 0
-    for url in expired_urls:
-        url.is_active = False
-        session.add(url)
-        count += 1
-    
-    if count > 0:
-        session.commit()
+    while True:
+        query = select(Url.id).where(Url.is_active == True, Url.expires_at <= now)
+        if user_id is not None:
+            query = query.where(Url.user_id == user_id)
+        
+        url_ids = (await session.exec(query.limit(EXPIRY_BATCH_SIZE))).all()
+        if url_ids:
+            count += len(await deactivate_expired_urls(session, now, url_ids=url_ids))
+        if len(url_ids) < EXPIRY_BATCH_SIZE:
+            return count
+
+async def backfill_url_domains(session: AsyncSession, after_id: int, batch_size: int) -> Optional[int]:
+    rows = (await session.exec(
+        select(Url.id, Url.original_url)
+        .where(Url.domain == None, Url.id > after_id)
+        .order_by(Url.id)
+        .limit(batch_size)
+    )).all()
+    if not rows:
+        return None
     
-    return count
+    updates = [
+        {"id": url_id, "domain": domain}
+        for url_id, domain in ((row.id, extract_domain(row.original_url)) for row in rows)
+        if domain
+    ]
+    if updates:
+        await session.execute(update(Url), updates)
+    await session.commit()
+    return rows[-1].id
 
-def get_user_urls(
-    session: Session, 
-    user_id: int, 
-    skip: int = 0, 
-    limit: int = 100,
+def effectively_active(now: datetime):
+    return and_(Url.is_active == True, or_(Url.expires_at == None, Url.expires_at > now))
+
+def filter_by_active(query, is_active: Optional[bool], now: datetime):
+    if is_active is None:
+        return query
+    if is_active:
+        return query.where(effectively_active(now))
+    return query.where(not_(effectively_active(now)))
+
+LIST_SORTS = {
+    "created_at": Url.created_at,
+    "clicks": Url.click_count
+}
+
+def encode_list_cursor(url: Url, sort: str = "created_at") -> str:
+    value = getattr(url, LIST_SORTS[sort].key)
+    payload = json.dumps([sort, value.isoformat() if isinstance(value, datetime) else value, url.id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def apply_list_cursor(query, cursor: Optional[str], sort: str = "created_at"):
+    if not cursor:
+        return query
+    try:
+        cursor_sort, value, url_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if cursor_sort != sort:
+            raise ValueError("Cursor was issued for another sort order")
+        value = to_naive_utc(datetime.fromisoformat(value)) if sort == "created_at" else int(value)
+        url_id = int(url_id)
+        if not all(-2**63 <= number < 2**63 for number in (value, url_id) if isinstance(number, int)):
+            raise ValueError("Cursor value out of range")
+    except (ValueError, TypeError, OverflowError) as e:
+        raise ValueError("Invalid cursor") from e
+    column = LIST_SORTS[sort]
+    return query.where(or_(
+        column < value,
+        and_(column == value, Url.id < url_id)
+    ))
+
+def order_for_listing(query, sort: str = "created_at"):
+    return query.order_by(LIST_SORTS[sort].desc(), Url.id.desc())
+
+def paginate_rows(rows: list, limit: int, sort: str = "created_at") -> Tuple[list, Optional[str]]:
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_list_cursor(rows[-1][0], sort)
+
+def filter_by_clicks(query, min_clicks: Optional[int], max_clicks: Optional[int]):
+    if min_clicks is not None:
+        query = query.where(Url.click_count >= min_clicks)
+    if max_clicks is not None:
+        query = query.where(Url.click_count <= max_clicks)
+    return query
+
+def count_rows(query):
+    return select(func.count()).select_from(query.subquery())
+
+def list_urls_query(
+    user_id: Optional[int],
     is_active: Optional[bool] = None,
     created_from: Optional[datetime] = None,
     created_to: Optional[datetime] = None,
-    domain: Optional[str] = None
-) -> list[Url]:
-    check_and_deactivate_expired_urls(session, user_id)
-    
-    query = select(Url).where(Url.user_id == user_id)
+    domain: Optional[str] = None,
+    min_clicks: Optional[int] = None,
+    max_clicks: Optional[int] = None
+):
+    now = datetime.utcnow()
+    query = select(Url, effectively_active(now).label("effective_active"))
     
-    if is_active is not None:
-        query = query.where(Url.is_active == is_active)
+    if user_id is not None:
+        query = query.where(Url.user_id == user_id)
+    query = filter_by_active(query, is_active, now)
     if created_from:
         query = query.where(Url.created_at >= created_from)
     if created_to:
         query = query.where(Url.created_at <= created_to)
     if domain:
-        query = query.where(Url.original_url.contains(f"://{domain}"))
+        query = query.where(Url.domain == extract_domain(domain))
+    return filter_by_clicks(query, min_clicks, max_clicks)
+
+async def get_user_urls(
+    session: AsyncSession, 
+    user_id: int, 
+    skip: int = 0, 
+    limit: int = 100,
+    is_active: Optional[bool] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    domain: Optional[str] = None,
+    cursor: Optional[str] = None,
+    min_clicks: Optional[int] = None,
+    max_clicks: Optional[int] = None,
+    sort: str = "created_at"
+) -> Tuple[List[Tuple[Url, bool]], Optional[str]]:
+    query = list_urls_query(user_id, is_active, created_from, created_to, domain, min_clicks, max_clicks)
+    if cursor:
+        query = apply_list_cursor(query, cursor, sort)
+    else:
+        query = query.offset(skip)
     
-    urls = session.exec(
-        query.offset(skip).limit(limit).order_by(Url.created_at.desc())
-    ).all()
+    rows = (await session.exec(order_for_listing(query, sort).limit(limit + 1))).all()
 
-    return urls
+    return paginate_rows([(url, bool(active)) for url, active in rows], limit, sort)
 
-def count_user_urls(
-    session: Session, 
+async def count_user_urls(
+    session: AsyncSession, 
     user_id: int,
     is_active: Optional[bool] = None,
     created_from: Optional[datetime] = None,
     created_to: Optional[datetime] = None,
-    domain: Optional[str] = None
+    domain: Optional[str] = None,
+    min_clicks: Optional[int] = None,
+    max_clicks: Optional[int] = None
 ) -> int:
-    from sqlmodel import func
-    
-    query = select(func.count(Url.id)).where(Url.user_id == user_id)
-    if is_active is not None:
-        query = query.where(Url.is_active == is_active)
-    if created_from:
-        query = query.where(Url.created_at >= created_from)
-    if created_to:
-        query = query.where(Url.created_at <= created_to)
-    if domain:
-        query = query.where(Url.original_url.contains(f"://{domain}"))
-    
-    count = session.exec(query).first() or 0
+    query = list_urls_query(user_id, is_active, created_from, created_to, domain, min_clicks, max_clicks)
+    count = (await session.exec(count_rows(query))).first() or 0
     return count
 
-def get_url_by_id(session: Session, url_id: int, user_id: Optional[int] = None) -> Optional[Url]:
+async def get_url_by_id(session: AsyncSession, url_id: int, user_id: Optional[int] = None) -> Optional[Url]:
     query = select(Url).where(Url.id == url_id)
     if user_id is not None:
         query = query.where(Url.user_id == user_id)
-    return session.exec(query).first()
-
-def generate_qr_code(url: str, size: int = 10, border: int = 4) -> str:
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_L,
-        box_size=size,
-        border=border,
-    )
-    qr.add_data(url)
-    qr.make(fit=True)
-    
-    img = qr.make_image(fill_color="black", back_color="white")
-    buffer = io.BytesIO()
-    img.save(buffer, format='PNG')
-    img_str = base64.b64encode(buffer.getvalue()).decode()
-    return f"data:image/png;base64,{img_str}"
+    return (await session.exec(query)).first()
 
-def get_url_with_qr_code(session: Session, url_id: int, user_id: int, base_url: str = "http://localhost:8000") -> Optional[dict]:
+async def get_url_with_qr_code(
+    session: AsyncSession,
+    url_id: int,
+    user_id: int,
+    base_url: str = "http://localhost:8000",
+    size: int = 10,
+    border: int = 4,
+    format: str = "png"
+) -> Optional[dict]:
     if user_id == -1:
         return None
         
-    url = session.exec(select(Url).where(Url.id == url_id, Url.user_id == user_id)).first()
+    url = (await session.exec(select(Url).where(Url.id == url_id, Url.user_id == user_id))).first()
     if not url:
         return None
     
     short_url = f"{base_url}/{url.short_code}"
-    qr_code = generate_qr_code(short_url)
+    qr_code = await get_qr_code(short_url, size, border, format)
     return {
         "url": url,
         "short_url": short_url,
         "qr_code": qr_code
     }
-
-async def get_clicks_count_for_user_url(url_id: int, user_id: int, token: str) -> int:
-    try:
-        import httpx
-        from app.config import ANALYTICS_SERVICE_URL
-        
-        async with httpx.AsyncClient() as client:
-            headers = {"Authorization": f"Bearer {token}"}
-            response = await client.get(f"{ANALYTICS_SERVICE_URL}/clicks/{url_id}", headers=headers, timeout=5.0)
-            
-            if response.status_code == 200:
-                data = response.json()
-                return data.get("total_clicks", 0)
-            else:
-                return 0
-    except Exception:
-        return 0
@@ -1,29 +1,86 @@
 from typing import Annotated
-from sqlmodel import SQLModel, create_engine, Session
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import inspect, text
+from sqlalchemy.ext.asyncio import create_async_engine
 from fastapi import Depends
-from app.config import DATABASE_URL
+from app.config import DATABASE_URL, DATABASE_POOL_SIZE, DATABASE_MAX_OVERFLOW
 import logging
 
 logger = logging.getLogger(__name__)
 
-engine = create_engine(DATABASE_URL)
+def get_async_database_url(database_url: str) -> str:
+    if database_url.startswith("postgresql://"):
+        return database_url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    if database_url.startswith("sqlite://"):
+        return database_url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    return database_url
 
-def init_db():
+ASYNC_DATABASE_URL = get_async_database_url(DATABASE_URL)
+
+if ASYNC_DATABASE_URL.startswith("sqlite"):
+    engine = create_async_engine(ASYNC_DATABASE_URL)
+else:
+    engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        pool_size=DATABASE_POOL_SIZE,
+        max_overflow=DATABASE_MAX_OVERFLOW,
+        pool_pre_ping=True
+    )
+
+def add_missing_columns(connection) -> None:
+    inspector = inspect(connection)
+    for table in SQLModel.metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            column_type = column.type.compile(dialect=connection.dialect)
+            ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"
+            if column.server_default is not None:
+                ddl += f" DEFAULT {column.server_default.arg}"
+                if not column.nullable:
+                    ddl += " NOT NULL"
+            connection.exec_driver_sql(ddl)
+            logger.info(f"Added column {table.name}.{column.name}")
+
+def create_missing_indexes(connection) -> None:
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+async def init_db():
     logger.info("Initializing URL service database")
     try:
         from app.models.url import Url
-        SQLModel.metadata.create_all(engine)
+        from app.models.job_state import JobState
+        from app.models.counter import Counter
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+            await conn.run_sync(add_missing_columns)
+            await conn.run_sync(create_missing_indexes)
         logger.info("URL service database tables created successfully")
     except Exception as e:
         logger.error(f"Error creating URL service database tables: {e}")
         raise
 
-def get_session():
+def create_session() -> AsyncSession:
+    return AsyncSession(engine, expire_on_commit=False)
+
+async def begin_snapshot(session: AsyncSession) -> None:
+    """Start a transaction in which every read sees the same committed state."""
+    if engine.dialect.name == "postgresql":
+        await session.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+    else:
+        # pysqlite only opens a transaction before writes, reads need an explicit one
+        await session.execute(text("BEGIN"))
+
+async def get_session():
     try:
-        with Session(engine) as session:
+        async with create_session() as session:
             yield session
     except Exception as e:
         logger.error(f"Database session error: {e}")
         raise
 
-SessionDep = Annotated[Session, Depends(get_session)]
+SessionDep = Annotated[AsyncSession, Depends(get_session)]
@@ -5,6 +5,8 @@ from app.config import ALLOWED_ORIGINS, DEBUG, MAX_CUSTOM_URL_LENGTH, SHORT_CODE
 from app.database import init_db
 from app.api import url, redirect, admin
 from app.core.rate_limiting import setup_rate_limiting
+from app.core.lifecycle import start_redirect_services, start_api_services, stop_redirect_services
+from app.redirect_app import RedirectApp
 import logging
 
 logging.basicConfig(
@@ -35,12 +37,20 @@ app.mount("/static", StaticFiles(directory="app/static"), name="static")
 async def startup_event():
     logger.info("Starting URL Service...")
     try:
-        init_db()
+        await init_db()
         logger.info("Database initialized successfully")
     except Exception as e:
         logger.error(f"Database initialization failed: {e}")
         raise
 
+    await start_redirect_services()
+    await start_api_services()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    logger.info("Stopping URL Service...")
+    await stop_redirect_services()
+
 @app.get("/")
 async def root():
     return {"message": "EasyLink URL Shortener Service is running"}
@@ -52,3 +62,5 @@ async def health_check():
 app.include_router(url.router, tags=["URLs"])
 app.include_router(redirect.router, tags=["Redirect"])
 app.include_router(admin.router, prefix="/admin", tags=["Admin"])
+
+asgi_app = RedirectApp(fallback=app)
@@ -0,0 +1,14 @@
+from sqlmodel import SQLModel, Field
+from sqlalchemy import Index
+from datetime import datetime
+
+class Counter(SQLModel, table=True):
+    __tablename__ = "counters"
+    __table_args__ = (
+        Index("ix_counters_kind_value", "kind", "value"),
+    )
+
+    kind: str = Field(primary_key=True)
+    key: str = Field(primary_key=True)
+    value: int = Field(default=0)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
@@ -0,0 +1,9 @@
+from sqlmodel import SQLModel, Field
+from datetime import datetime
+
+class JobState(SQLModel, table=True):
+    __tablename__ = "job_states"
+
+    name: str = Field(primary_key=True)
+    state: str = Field(default="{}")
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
@@ -1,12 +1,20 @@
 from sqlmodel import SQLModel, Field
+from sqlalchemy import Index, Sequence
 from datetime import datetime
 from typing import Optional
 
 class Url(SQLModel, table=True):
     __tablename__ = "urls"
+    __table_args__ = (
+        Index("ix_urls_created_at_id", "created_at", "id"),
+        Index("ix_urls_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_urls_click_count_id", "click_count", "id"),
+        Index("ix_urls_user_id_click_count_id", "user_id", "click_count", "id"),
+    )
 
     id: int = Field(primary_key=True)
     original_url: str = Field(index=True)
+    domain: Optional[str] = Field(default=None, index=True)
     short_code: str = Field(unique=True, index=True)
     user_id: int = Field(index=True, default=-1)
     is_active: bool = Field(default=True)
@@ -14,7 +22,11 @@ class Url(SQLModel, table=True):
     remaining_clicks: Optional[int] = Field(default=None)
     hide_thumbnail: bool = Field(default=False)
     created_at: datetime = Field(default_factory=datetime.utcnow)
-    expires_at: Optional[datetime] = Field(default=None)
+    expires_at: Optional[datetime] = Field(default=None, index=True)
     safety_check_status: Optional[str] = Field(default=None)
-    safety_check_at: Optional[datetime] = Field(default=None)
+    safety_check_at: Optional[datetime] = Field(default=None, index=True)
     safety_threats: Optional[str] = Field(default=None)
+    click_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    last_clicked_at: Optional[datetime] = Field(default=None)
+
+short_code_block_seq = Sequence("short_code_block_seq", metadata=SQLModel.metadata)
@@ -0,0 +1,107 @@
+import json
+import logging
+import re
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+from urllib.parse import quote
+from fastapi import HTTPException
+from starlette.requests import Request
+from app.config import MAX_CUSTOM_URL_LENGTH, RESERVED_SHORT_CODES
+from app.database import create_session
+from app.core.redirects import resolve_redirect, register_click
+from app.core.bots import is_social_media_bot
+from app.core.previews import get_preview_page, etag_matches
+from app.core.lifecycle import start_redirect_services, stop_redirect_services
+
+logger = logging.getLogger(__name__)
+
+ASGIApp = Callable[[Dict[str, Any], Callable, Callable], Awaitable[None]]
+
+SHORT_CODE_PATH = re.compile(f"^/([a-zA-Z0-9_-]{{4,{MAX_CUSTOM_URL_LENGTH}}})$")
+PASSTHROUGH_CODES = RESERVED_SHORT_CODES | {"docs", "redoc"}
+TRUE_VALUES = {"1", "true", "on", "yes", "t", "y"}
+
+async def send_response(
+    send: Callable,
+    status: int,
+    body: bytes = b"",
+    headers: Iterable[Tuple[str, str]] = ()
+) -> None:
+    raw_headers = [(b"content-length", str(len(body)).encode())]
+    raw_headers.extend((name.encode("latin-1"), value.encode("latin-1")) for name, value in headers)
+    await send({"type": "http.response.start", "status": status, "headers": raw_headers})
+    await send({"type": "http.response.body", "body": body})
+
+async def send_json(send: Callable, status: int, content: Any) -> None:
+    body = json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    await send_response(send, status, body, [("content-type", "application/json")])
+
+class RedirectApp:
+    def __init__(self, fallback: Optional[ASGIApp] = None):
+        self.fallback = fallback
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] == "http" and scope["method"] == "GET":
+            match = SHORT_CODE_PATH.match(scope["path"])
+            if match and match.group(1).lower() not in PASSTHROUGH_CODES:
+                await self.handle_redirect(scope, send, match.group(1))
+                return
+
+        if self.fallback is not None:
+            await self.fallback(scope, receive, send)
+        elif scope["type"] == "lifespan":
+            await self.handle_lifespan(receive, send)
+        elif scope["type"] == "http":
+            if scope["path"] == "/health":
+                await send_json(send, 200, {"status": "healthy"})
+            else:
+                await send_json(send, 404, {"detail": "Not Found"})
+
+    async def handle_lifespan(self, receive: Callable, send: Callable) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await start_redirect_services(standalone=True)
+                except Exception as e:
+                    logger.error(f"Redirect app startup failed: {e}")
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await stop_redirect_services()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def handle_redirect(self, scope: Dict[str, Any], send: Callable, short_code: str) -> None:
+        request = Request(scope)
+        params = request.query_params
+        try:
+            async with create_session() as session:
+                url = await resolve_redirect(session, short_code, params.get("password"))
+
+                if is_social_media_bot(request.headers.get("user-agent", "")):
+                    content, etag = get_preview_page(url)
+                    headers = [("etag", etag), ("cache-control", "no-cache")]
+                    if etag_matches(request.headers.get("if-none-match"), etag):
+                        await send_response(send, 304, headers=headers)
+                    else:
+                        headers.append(("content-type", "text/html; charset=utf-8"))
+                        await send_response(send, 200, content, headers)
+                    return
+
+                await register_click(session, request, url)
+        except HTTPException as e:
+            await send_json(send, e.status_code, {"detail": e.detail})
+            return
+        except Exception as e:
+            logger.error(f"Error redirecting {short_code}: {e}")
+            await send_json(send, 500, {"detail": "Internal server error"})
+            return
+
+        if params.get("json_response", "false").lower() in TRUE_VALUES:
+            await send_json(send, 200, {"url": url.original_url})
+        else:
+            location = quote(url.original_url, safe=":/%#?=@[]!$&'()*+,;")
+            await send_response(send, 301, headers=[("location", location)])
+
+app = RedirectApp()
@@ -1,6 +1,7 @@
-from pydantic import BaseModel, HttpUrl
+from pydantic import BaseModel, Field, HttpUrl
 from datetime import datetime
 from typing import Optional
+from app.config import SHORTEN_BATCH_MAX_SIZE
 
 class UrlCreate(BaseModel):
     original_url: HttpUrl
@@ -10,6 +11,12 @@ class UrlCreate(BaseModel):
     remaining_clicks: Optional[int] = None
     hide_thumbnail: Optional[bool] = False
 
+class UrlImportRow(UrlCreate):
+    user_id: int = -1
+
+class UrlBatchCreate(BaseModel):
+    urls: list[UrlCreate] = Field(..., min_length=1, max_length=SHORTEN_BATCH_MAX_SIZE)
+
 class UrlUpdate(BaseModel):
     password: Optional[str] = None
     expires_at: Optional[datetime] = None
@@ -31,17 +38,30 @@ class UrlResponse(BaseModel):
     hide_thumbnail: bool
     safety_check_status: Optional[str] = None
     safety_check_at: Optional[datetime] = None
+    click_count: int = 0
+    last_clicked_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
 
 class UrlListResponse(BaseModel):
     urls: list[UrlResponse]
-    total: int
+    total: Optional[int] = None
     skip: Optional[int] = None
     limit: Optional[int] = None
+    next_cursor: Optional[str] = None
     filters: Optional[dict] = None
 
+class UrlBatchItemResult(BaseModel):
+    index: int
+    url: Optional[UrlResponse] = None
+    error: Optional[str] = None
+
+class UrlBatchResponse(BaseModel):
+    results: list[UrlBatchItemResult]
+    created: int
+    failed: int
+
 class SafetyCheckRequest(BaseModel):
     url: str
 
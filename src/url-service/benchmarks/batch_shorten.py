@@ -0,0 +1,55 @@
+"""Creating N links with N POST /shorten calls vs one POST /shorten/batch, in process.
+
+Run from src/url-service: python -m benchmarks.batch_shorten [--items N] [--rounds N] [--safe-browsing-latency-ms MS]
+--safe-browsing-latency-ms replaces the Safe Browsing lookup with a stand-in that waits this long per call.
+"""
+import argparse
+import asyncio
+import itertools
+import time
+import httpx
+from benchmarks.common import summarize, print_results
+from app.database import init_db
+from app.main import app
+from app.api.dependencies import get_current_user
+from app.core.safe_browsing import safe_browsing_service
+
+async def main(args) -> None:
+    await init_db()
+    app.dependency_overrides[get_current_user] = lambda: {"id": 1}
+    if args.safe_browsing_latency_ms:
+        async def check_urls_safety(urls, use_cache=True):
+            await asyncio.sleep(args.safe_browsing_latency_ms / 1000)
+            return {url: {"is_safe": True, "threats": [], "details": "No threats detected"} for url in urls}
+        safe_browsing_service.check_urls_safety = check_urls_safety
+
+    counter = itertools.count()
+
+    def new_items():
+        return [{"original_url": f"https://example.com/batch/{next(counter)}"} for _ in range(args.items)]
+
+    single, batch = [], []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for _ in range(args.rounds):
+            started = time.perf_counter()
+            for item in new_items():
+                response = await client.post("/shorten", json=item)
+                assert response.status_code == 200, response.text
+            single.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            response = await client.post("/shorten/batch", json={"urls": new_items()})
+            assert response.status_code == 200 and response.json()["created"] == args.items, response.text
+            batch.append(time.perf_counter() - started)
+
+    results = [summarize(f"{args.items} x POST /shorten", single), summarize(f"POST /shorten/batch ({args.items} items)", batch)]
+    for row in results:
+        row["links_per_sec"] = round(args.items / (row["mean_ms"] / 1000), 1)
+    print_results(f"Creating {args.items} links per round, {args.rounds} rounds", results)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--safe-browsing-latency-ms", type=float, default=0)
+    asyncio.run(main(parser.parse_args()))
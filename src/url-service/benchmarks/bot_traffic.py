@@ -0,0 +1,64 @@
+"""Per-call cost of the bot traffic path: social bot detection and preview pages.
+
+Reported times include the benchmark loop overhead, which is the same for every row.
+
+Run from src/url-service: python -m benchmarks.bot_traffic [--calls N]
+"""
+import argparse
+import itertools
+from benchmarks.common import time_loop, print_results
+from app.core.bots import matches_bot_signature, is_social_media_bot
+from app.core.previews import get_preview_page, invalidate_preview_pages, render_preview_page
+from app.models.url import Url
+
+USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_1 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.1 Mobile/15E148 Safari/604.1",
+    "Mozilla/5.0 (X11; Linux x86_64; rv:121.0) Gecko/20100101 Firefox/121.0",
+    "Mozilla/5.0 (Linux; Android 14; Pixel 8) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.6099.144 Mobile Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.2 Safari/605.1.15",
+    "TelegramBot (like TwitterBot)",
+    "facebookexternalhit/1.1 (+http://www.facebook.com/externalhit_uatext.php)",
+    "WhatsApp/2.23.20.0 A",
+    "Mozilla/5.0 (compatible; Discordbot/2.0; +https://discordapp.com)",
+    "Slackbot-LinkExpanding 1.0 (+https://api.slack.com/robots)",
+]
+
+LEGACY_SOCIAL_BOTS = [
+    'facebookexternalhit', 'twitterbot', 'telegrambot', 'whatsapp',
+    'skypebot', 'discordbot', 'slackbot', 'linkedinbot', 'vkshare',
+    'applebot', 'googlebot', 'bingbot', 'yandexbot', 'viberbot',
+    'facebot', 'ia_archiver', 'developers.google.com/+/web/snippet'
+]
+
+def legacy_is_social_media_bot(user_agent: str) -> bool:
+    user_agent_lower = user_agent.lower()
+    return any(bot in user_agent_lower for bot in LEGACY_SOCIAL_BOTS)
+
+def main(args) -> None:
+    user_agents = itertools.cycle(USER_AGENTS)
+    for user_agent in USER_AGENTS:
+        assert legacy_is_social_media_bot(user_agent) == is_social_media_bot(user_agent)
+
+    print_results(f"Social bot detection over {len(USER_AGENTS)} realistic user agents", [
+        time_loop("substring scan (before)", lambda: legacy_is_social_media_bot(next(user_agents)), args.calls),
+        time_loop("compiled pattern", lambda: matches_bot_signature(next(user_agents)), args.calls),
+        time_loop("compiled pattern + verdict cache", lambda: is_social_media_bot(next(user_agents)), args.calls),
+    ])
+
+    url = Url(id=1, short_code="bench1", original_url="https://example.com/some/long/path?utm_source=bench", hide_thumbnail=False)
+
+    def cold_preview():
+        invalidate_preview_pages(url.short_code)
+        return get_preview_page(url)
+
+    print_results("Bot preview page", [
+        time_loop("render + encode per request (before)", lambda: render_preview_page(url.short_code, url.original_url, url.hide_thumbnail).encode("utf-8"), args.calls),
+        time_loop("cache miss (render, encode, etag)", cold_preview, args.calls),
+        time_loop("cache hit", lambda: get_preview_page(url), args.calls),
+    ])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=100000)
+    main(parser.parse_args())
@@ -0,0 +1,99 @@
+import os
+import tempfile
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional
+
+BENCHMARK_DATA_DIR = tempfile.mkdtemp(prefix="url-service-bench-")
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(BENCHMARK_DATA_DIR, 'bench.db')}")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+os.environ.setdefault("USERS_SERVICE_URL", "http://127.0.0.1:9")
+os.environ.setdefault("ANALYTICS_SERVICE_URL", "http://127.0.0.1:9")
+os.environ.setdefault("GOOGLE_SAFE_BROWSING_API_KEY", "")
+os.environ.setdefault("CLICK_SYNC_ENABLED", "false")
+os.environ.setdefault("SECURITY_RESCAN_ENABLED", "false")
+os.environ.setdefault("EXPIRY_SCHEDULER_ENABLED", "false")
+
+from sqlalchemy import insert
+from app.database import create_session, init_db
+from app.models.url import Url
+from app.core.rate_limiting import limiter
+
+limiter.enabled = False
+
+SEED_CHUNK_SIZE = 5000
+
+def seed_code(index: int) -> str:
+    return f"b{index:08d}"
+
+async def seed_urls(count: int, user_id: int = 1, start: int = 0, **values) -> List[str]:
+    await init_db()
+    codes = [seed_code(index) for index in range(start, start + count)]
+    now = datetime.utcnow()
+    async with create_session() as session:
+        for offset in range(0, count, SEED_CHUNK_SIZE):
+            rows = [
+                {
+                    "original_url": f"https://example.com/page/{code}",
+                    "domain": "example.com",
+                    "short_code": code,
+                    "user_id": user_id,
+                    "is_active": True,
+                    "hide_thumbnail": False,
+                    "created_at": now,
+                    "safety_check_status": "safe",
+                    "click_count": 0,
+                    **values
+                }
+                for code in codes[offset:offset + SEED_CHUNK_SIZE]
+            ]
+            await session.execute(insert(Url), rows)
+        await session.commit()
+    return codes
+
+def percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def summarize(name: str, latencies: List[float], elapsed: Optional[float] = None) -> Dict:
+    elapsed = elapsed if elapsed is not None else sum(latencies)
+    return {
+        "name": name,
+        "calls": len(latencies),
+        "per_sec": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3)
+    }
+
+def time_calls(name: str, func: Callable[[], object], repeat: int) -> Dict:
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - started)
+    return summarize(name, latencies)
+
+def time_loop(name: str, func: Callable[[], object], repeat: int) -> Dict:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    elapsed = time.perf_counter() - started
+    return {"name": name, "calls": repeat, "per_sec": round(repeat / elapsed, 1), "mean_us": round(elapsed / repeat * 1e6, 3)}
+
+async def time_async_calls(name: str, func: Callable[[], Awaitable[object]], repeat: int) -> Dict:
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await func()
+        latencies.append(time.perf_counter() - started)
+    return summarize(name, latencies)
+
+def print_results(title: str, results: List[Dict]) -> None:
+    print(f"\n{title}")
+    columns = list(dict.fromkeys(column for row in results for column in row))
+    widths = {column: max(len(column), *(len(str(row.get(column, "-"))) for row in results)) for column in columns}
+    print("  ".join(column.ljust(widths[column]) for column in columns))
+    for row in results:
+        print("  ".join(str(row.get(column, "-")).ljust(widths[column]) for column in columns))
@@ -0,0 +1,70 @@
+"""Concurrent redirect lookups: blocking sync engine vs the async engine.
+
+Run from src/url-service: python -m benchmarks.db_engine [--urls N] [--requests N] [--concurrency N]
+max_loop_lag_ms is the longest the event loop was unable to run other requests.
+Set DATABASE_URL to a Postgres server to measure the production driver pair (psycopg2 vs asyncpg).
+"""
+import argparse
+import asyncio
+import random
+import time
+from benchmarks.common import seed_urls, summarize, print_results
+from sqlmodel import Session, create_engine, select
+from app.config import DATABASE_URL
+from app.database import create_session
+from app.crud.url import get_url_by_short_code
+from app.models.url import Url
+
+HEARTBEAT_INTERVAL = 0.001
+
+async def run_concurrent(lookup, codes, requests: int, concurrency: int):
+    latencies = []
+
+    async def worker(worker_codes):
+        for code in worker_codes:
+            started = time.perf_counter()
+            await lookup(code)
+            latencies.append(time.perf_counter() - started)
+
+    async def heartbeat():
+        while True:
+            tick["expected"] = time.perf_counter() + HEARTBEAT_INTERVAL
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            lags.append(time.perf_counter() - tick["expected"])
+
+    lags = [0.0]
+    tick = {"expected": time.perf_counter()}
+    ticker = asyncio.create_task(heartbeat())
+    sample = [random.choice(codes) for _ in range(requests)]
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(sample[index::concurrency]) for index in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    lags.append(time.perf_counter() - tick["expected"])
+    ticker.cancel()
+    return latencies, elapsed, max(lags)
+
+async def main(args) -> None:
+    codes = await seed_urls(args.urls)
+    sync_engine = create_engine(DATABASE_URL)
+
+    async def sync_lookup(code: str):
+        with Session(sync_engine) as session:
+            return session.exec(select(Url).where(Url.short_code == code)).first()
+
+    async def async_lookup(code: str):
+        async with create_session() as session:
+            return await get_url_by_short_code(session, code)
+
+    results = []
+    for name, lookup in (("sync engine (before)", sync_lookup), ("async engine (after)", async_lookup)):
+        await run_concurrent(lookup, codes, min(args.requests, 200), args.concurrency)
+        latencies, elapsed, max_lag = await run_concurrent(lookup, codes, args.requests, args.concurrency)
+        results.append({**summarize(name, latencies, elapsed), "max_loop_lag_ms": round(max_lag * 1000, 3)})
+    print_results(f"{args.requests} lookups, concurrency {args.concurrency}, {args.urls} rows", results)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--urls", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,70 @@
+"""GET /my latency for a user with thousands of links: offset pages vs keyset cursors, in process.
+
+Run from src/url-service: python -m benchmarks.my_urls [--links N] [--expired N] [--limit N] [--rounds N]
+--expired links are active in the table but past expires_at, so listings filter them by the effective status.
+"""
+import argparse
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+import httpx
+from benchmarks.common import summarize, print_results, seed_urls, time_async_calls
+from app.main import app
+from app.api.dependencies import get_current_user
+
+async def walk(client: httpx.AsyncClient, params: dict, limit: int, use_cursor: bool) -> list:
+    latencies = []
+    skip, cursor = 0, None
+    while True:
+        page_params = {**params, "limit": limit, "include_total": "false"}
+        if use_cursor and cursor:
+            page_params["cursor"] = cursor
+        elif not use_cursor:
+            page_params["skip"] = skip
+        started = time.perf_counter()
+        response = await client.get("/my", params=page_params)
+        latencies.append(time.perf_counter() - started)
+        assert response.status_code == 200, response.text
+        data = response.json()
+        skip += limit
+        cursor = data["next_cursor"]
+        if not cursor:
+            return latencies
+
+async def main(args) -> None:
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    await seed_urls(args.links - args.expired)
+    await seed_urls(args.expired, start=args.links - args.expired, expires_at=datetime.utcnow() - timedelta(days=1))
+    app.dependency_overrides[get_current_user] = lambda: {"id": 1}
+
+    results = []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def first_page(**params):
+            response = await client.get("/my", params={"limit": args.limit, **params})
+            assert response.status_code == 200, response.text
+
+        results.append(await time_async_calls("first page + total", first_page, args.rounds * 10))
+        results.append(await time_async_calls("first page, no total", lambda: first_page(include_total="false"), args.rounds * 10))
+        results.append(await time_async_calls("first page, is_active=true", lambda: first_page(is_active="true"), args.rounds * 10))
+
+        for name, params in (("", {}), (", is_active=true", {"is_active": "true"})):
+            for use_cursor in (False, True):
+                latencies, walks = [], []
+                for _ in range(args.rounds):
+                    started = time.perf_counter()
+                    latencies.extend(await walk(client, params, args.limit, use_cursor))
+                    walks.append(time.perf_counter() - started)
+                row = summarize(f"all pages by {'cursor' if use_cursor else 'offset'}{name}", latencies)
+                row["walk_ms"] = round(sum(walks) / len(walks) * 1000, 1)
+                results.append(row)
+
+    print_results(f"GET /my, {args.links} links ({args.expired} expired), {args.limit} per page", results)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--links", type=int, default=5000)
+    parser.add_argument("--expired", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=3)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,70 @@
+"""QR code latency: cold renders vs cache hits vs 304 revalidation, directly and through GET /{url_id}/qr, in process.
+
+Run from src/url-service: python -m benchmarks.qr_codes [--links N] [--size N]
+Cold rows clear the QR cache before every call, so each call renders the image again.
+Cached rows run after one untimed pass over all links; --links must fit in QR_CACHE_MAX_SIZE.
+"""
+import argparse
+import asyncio
+import logging
+import httpx
+from benchmarks.common import print_results, time_async_calls
+from app.database import init_db
+from app.main import app
+from app.api.dependencies import get_current_user, get_current_user_optional
+from app.core.qr import get_qr_code, qr_cache
+
+async def main(args) -> None:
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    await init_db()
+    app.dependency_overrides[get_current_user] = lambda: {"id": 1}
+    app.dependency_overrides[get_current_user_optional] = lambda: {"id": 1}
+
+    results = []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        url_ids = []
+        for i in range(args.links):
+            response = await client.post("/shorten", json={"original_url": f"https://example.com/qr/{i}"})
+            assert response.status_code == 200, response.text
+            url_ids.append(response.json()["id"])
+        short_urls = [f"http://bench/{i}" for i in range(args.links)]
+
+        for format in ("png", "svg"):
+            params = {"format": format, "size": args.size}
+            etags = {}
+
+            async def render(cold: bool):
+                short_url = short_urls[render.calls % len(short_urls)]
+                render.calls += 1
+                if cold:
+                    qr_cache.clear()
+                await get_qr_code(short_url, args.size, 4, format)
+
+            async def request(cold: bool, revalidate: bool = False):
+                url_id = url_ids[request.calls % len(url_ids)]
+                request.calls += 1
+                if cold:
+                    qr_cache.clear()
+                headers = {"If-None-Match": etags[url_id]} if revalidate else {}
+                response = await client.get(f"/{url_id}/qr", params=params, headers=headers)
+                assert response.status_code == (304 if revalidate else 200), response.text
+                etags[url_id] = response.headers["etag"]
+
+            render.calls = request.calls = 0
+            results.append(await time_async_calls(f"get_qr_code {format}, cold", lambda: render(True), args.links))
+            for _ in range(args.links):
+                await render(False)
+            results.append(await time_async_calls(f"get_qr_code {format}, cached", lambda: render(False), args.links))
+            results.append(await time_async_calls(f"GET /qr {format}, cold", lambda: request(True), args.links))
+            for _ in range(args.links):
+                await request(False)
+            results.append(await time_async_calls(f"GET /qr {format}, cached", lambda: request(False), args.links))
+            results.append(await time_async_calls(f"GET /qr {format}, 304", lambda: request(False, True), args.links))
+
+    print_results(f"QR codes for {args.links} links, box size {args.size}", results)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--links", type=int, default=200)
+    parser.add_argument("--size", type=int, default=10)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,44 @@
+"""Redirect throughput of the FastAPI route vs the raw ASGI redirect app, in process.
+
+Run from src/url-service: python -m benchmarks.redirect_app [--urls N] [--requests N] [--concurrency N]
+Both apps share the redirect cache, which is warmed first, so the difference is framework overhead.
+"""
+import argparse
+import asyncio
+import random
+import time
+import httpx
+from benchmarks.common import seed_urls, summarize, print_results
+from app.main import app, asgi_app
+
+async def run_concurrent(client: httpx.AsyncClient, codes, requests: int, concurrency: int):
+    latencies = []
+
+    async def worker(worker_codes):
+        for code in worker_codes:
+            started = time.perf_counter()
+            response = await client.get(f"/{code}")
+            latencies.append(time.perf_counter() - started)
+            assert response.status_code == 301, response.status_code
+
+    sample = [random.choice(codes) for _ in range(requests)]
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(sample[index::concurrency]) for index in range(concurrency)))
+    return latencies, time.perf_counter() - started
+
+async def main(args) -> None:
+    codes = await seed_urls(args.urls)
+    results = []
+    for name, target in (("FastAPI route", app), ("raw ASGI redirect app", asgi_app)):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=target), base_url="http://bench") as client:
+            await run_concurrent(client, codes, len(codes), args.concurrency)
+            latencies, elapsed = await run_concurrent(client, codes, args.requests, args.concurrency)
+        results.append(summarize(name, latencies, elapsed))
+    print_results(f"{args.requests} redirects, concurrency {args.concurrency}, {args.urls} links", results)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--urls", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
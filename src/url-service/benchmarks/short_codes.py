@@ -0,0 +1,68 @@
+"""Short code allocation cost on a large urls table: hash + existence probes vs sequence blocks.
+
+Run from src/url-service: python -m benchmarks.short_codes [--rows N] [--calls N]
+Rows are added only up to --rows, so a persistent DATABASE_URL can be reused between runs.
+Sequence blocks need a database with sequences (Postgres); on SQLite the allocator itself falls
+back to probing, so only the CPU cost of the permutation is reported for it.
+"""
+import argparse
+import asyncio
+import itertools
+from sqlmodel import select, func
+from benchmarks.common import seed_urls, time_loop, time_async_calls, print_results
+from app.core.allocator import short_code_allocator
+from app.core.utils import generate_short_code_hash, generate_unique_short_code
+from app.database import create_session, init_db
+from app.models.url import Url
+
+REPEATED_URL = "https://example.com/popular"
+
+async def main(args) -> None:
+    await init_db()
+    async with create_session() as session:
+        existing = (await session.exec(select(func.count(Url.id)))).first() or 0
+    if existing < args.rows:
+        print(f"Seeding {args.rows - existing} rows...")
+        await seed_urls(args.rows - existing, start=existing)
+
+    async with create_session() as session:
+        repeated_code = generate_short_code_hash(REPEATED_URL)
+        if not (await session.exec(select(Url).where(Url.short_code == repeated_code))).first():
+            session.add(Url(original_url=REPEATED_URL, short_code=repeated_code))
+            await session.commit()
+
+        counter = itertools.count()
+        results = [
+            await time_async_calls(
+                "hash + probe, new URLs (before)",
+                lambda: generate_unique_short_code(session, f"https://example.com/new/{next(counter)}"),
+                args.calls
+            ),
+            await time_async_calls(
+                "hash + probe, URL already shortened (before)",
+                lambda: generate_unique_short_code(session, REPEATED_URL),
+                args.calls
+            ),
+        ]
+        if session.bind.dialect.supports_sequences:
+            results.append(await time_async_calls(
+                "sequence blocks",
+                lambda: short_code_allocator.allocate(session, REPEATED_URL),
+                args.calls
+            ))
+            await session.commit()
+        encode_counter = itertools.count()
+        results.append(time_loop(
+            "permutation encode (CPU only)",
+            lambda: short_code_allocator.permutation.encode(next(encode_counter)),
+            args.calls
+        ))
+
+    print_results(f"Short code allocation with {args.rows} existing rows", results)
+    print(f"Blocks leased: {short_code_allocator.blocks_leased}, block size: {short_code_allocator.block_size}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--calls", type=int, default=2000)
+    asyncio.run(main(parser.parse_args()))
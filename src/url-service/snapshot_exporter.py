@@ -0,0 +1,20 @@
+import asyncio
+import sys
+from app.database import create_session
+from app.core.snapshot import export_snapshot, export_delta
+
+USAGE = "Usage: python snapshot_exporter.py [full|delta] PATH"
+
+async def run_export(mode: str, path: str):
+    async with create_session() as session:
+        if mode == "full":
+            count = await export_snapshot(session, path)
+        else:
+            count = await export_delta(session, path)
+    print(f"{mode}: {count} records written for {path}")
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] not in ("full", "delta"):
+        print(USAGE)
+        sys.exit(1)
+    asyncio.run(run_export(sys.argv[1], sys.argv[2]))
@@ -0,0 +1,54 @@
+import os
+import tempfile
+
+TEST_DATA_DIR = tempfile.mkdtemp(prefix="url-service-tests-")
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(TEST_DATA_DIR, 'test.db')}")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+os.environ.setdefault("USERS_SERVICE_URL", "http://127.0.0.1:9")
+os.environ.setdefault("ANALYTICS_SERVICE_URL", "http://127.0.0.1:9")
+os.environ.setdefault("GOOGLE_SAFE_BROWSING_API_KEY", "")
+os.environ.setdefault("CLICK_SYNC_ENABLED", "false")
+os.environ.setdefault("SECURITY_RESCAN_ENABLED", "false")
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from tests.safe_browsing_server import StandInSafeBrowsing
+
+TEST_USER_ID = 1
+
+@pytest.fixture(scope="session")
+def app():
+    from app.main import app
+    from app.core.rate_limiting import limiter
+    from app.api.dependencies import get_current_user, get_current_user_optional, verify_admin_token
+    app.dependency_overrides[get_current_user] = lambda: {"id": TEST_USER_ID}
+    app.dependency_overrides[get_current_user_optional] = lambda: {"id": TEST_USER_ID}
+    app.dependency_overrides[verify_admin_token] = lambda: True
+    limiter.enabled = False
+    yield app
+    app.dependency_overrides.clear()
+
+@pytest.fixture(scope="session")
+def client(app):
+    with TestClient(app) as client:
+        yield client
+
+@pytest.fixture(scope="session")
+def run(client):
+    return client.portal.call
+
+@pytest.fixture
+def safe_browsing_server(monkeypatch):
+    from app.core.http_clients import upstream_clients
+    server = StandInSafeBrowsing()
+    server.start()
+    monkeypatch.setitem(upstream_clients._clients, "safe_browsing", httpx.AsyncClient(base_url=server.url))
+    yield server
+    server.stop()
+
+@pytest.fixture
+def click_sync_enabled(monkeypatch):
+    from app.core.click_sync import click_count_sync
+    monkeypatch.setattr(click_count_sync, "enabled", True)
@@ -0,0 +1,115 @@
+import base64
+import hashlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+def full_hash(expression: str) -> bytes:
+    return hashlib.sha256(expression.encode("utf-8")).digest()
+
+def full_update(prefixes: List[bytes], state: str = "state-1", checksum: Optional[bytes] = None) -> dict:
+    prefixes = sorted(prefixes)
+    by_size: Dict[int, List[bytes]] = {}
+    for prefix in prefixes:
+        by_size.setdefault(len(prefix), []).append(prefix)
+    return {
+        "responseType": "FULL_UPDATE",
+        "additions": [
+            {"compressionType": "RAW", "rawHashes": {"prefixSize": size, "rawHashes": base64.b64encode(b"".join(items)).decode()}}
+            for size, items in by_size.items()
+        ],
+        "newClientState": state,
+        "checksum": {"sha256": base64.b64encode(checksum or hashlib.sha256(b"".join(prefixes)).digest()).decode()}
+    }
+
+class StandInSafeBrowsing:
+    """Local stand-in for the Safe Browsing Lookup and Update APIs."""
+
+    def __init__(self):
+        self.unsafe_urls: Dict[str, str] = {}
+        self.list_updates: Dict[str, dict] = {}
+        self.full_hashes: Dict[bytes, str] = {}
+        self.cache_duration: Optional[str] = "300s"
+        self.negative_cache_duration: Optional[str] = "300s"
+        self.status = 200
+        self.requests: List[Tuple[str, dict]] = []
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def requests_to(self, path: str) -> List[dict]:
+        return [body for request_path, body in self.requests if request_path == path]
+
+    def respond(self, path: str, body: dict) -> dict:
+        if path == "/threatMatches:find":
+            return {"matches": [
+                {"threatType": self.unsafe_urls[entry["url"]], "threat": {"url": entry["url"]}}
+                for entry in body["threatInfo"]["threatEntries"]
+                if entry["url"] in self.unsafe_urls
+            ]}
+        if path == "/threatListUpdates:fetch":
+            return {
+                "listUpdateResponses": [
+                    {
+                        "threatType": request["threatType"],
+                        "platformType": request["platformType"],
+                        "threatEntryType": request["threatEntryType"],
+                        **self.list_updates[request["threatType"]]
+                    }
+                    for request in body["listUpdateRequests"]
+                    if request["threatType"] in self.list_updates
+                ],
+                "minimumWaitDuration": "0s"
+            }
+        if path == "/fullHashes:find":
+            prefixes = [base64.b64decode(entry["hash"]) for entry in body["threatInfo"]["threatEntries"]]
+            matches = []
+            for listed_hash, threat_type in self.full_hashes.items():
+                if any(listed_hash.startswith(prefix) for prefix in prefixes):
+                    match = {"threatType": threat_type, "threat": {"hash": base64.b64encode(listed_hash).decode()}}
+                    if self.cache_duration is not None:
+                        match["cacheDuration"] = self.cache_duration
+                    matches.append(match)
+            response = {"matches": matches}
+            if self.negative_cache_duration is not None:
+                response["negativeCacheDuration"] = self.negative_cache_duration
+            return response
+        raise KeyError(path)
+
+    def _handler(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                path = self.path.split("?", 1)[0]
+                body = json.loads(self.rfile.read(int(self.headers["content-length"])))
+                stand_in.requests.append((path, body))
+                if stand_in.status != 200:
+                    content, status = b"{}", stand_in.status
+                else:
+                    try:
+                        content, status = json.dumps(stand_in.respond(path, body)).encode(), 200
+                    except KeyError:
+                        content, status = b"{}", 404
+                self.send_response(status)
+                self.send_header("content-type", "application/json")
+                self.send_header("content-length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
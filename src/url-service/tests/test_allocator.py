@@ -0,0 +1,58 @@
+import asyncio
+import itertools
+from types import SimpleNamespace
+import pytest
+from app.core.allocator import BASE62_ALPHABET, ShortCodeAllocator, ShortCodePermutation
+
+class SequenceSession:
+    """Hands out consecutive block numbers like short_code_block_seq."""
+
+    bind = SimpleNamespace(dialect=SimpleNamespace(supports_sequences=True))
+
+    def __init__(self, start: int = 1):
+        self.blocks = itertools.count(start)
+
+    async def execute(self, statement):
+        block = next(self.blocks)
+        return SimpleNamespace(scalar_one=lambda: block)
+
+def test_permutation_is_a_bijection_over_a_small_keyspace():
+    permutation = ShortCodePermutation(2, "test-secret")
+    values = range(permutation.space)
+
+    permuted = [permutation.permute(value) for value in values]
+    assert sorted(permuted) == list(values)
+    assert all(permutation.invert(permutation.permute(value)) == value for value in values)
+
+    codes = [permutation.encode(value) for value in values]
+    assert len(set(codes)) == permutation.space
+    assert all(len(code) == 2 and set(code) <= set(BASE62_ALPHABET) for code in codes)
+    assert all(permutation.decode(code) == value for value, code in zip(values, codes))
+
+def test_permutation_depends_on_the_secret():
+    first, second = ShortCodePermutation(3, "one"), ShortCodePermutation(3, "two")
+    assert [first.encode(value) for value in range(10)] != [second.encode(value) for value in range(10)]
+
+def test_blocks_do_not_collide_across_boundaries(monkeypatch):
+    monkeypatch.setattr("app.core.allocator.is_code_reserved", lambda code: False)
+    allocator = ShortCodeAllocator(length=2, block_size=100)
+    session = SequenceSession()
+
+    async def allocate():
+        codes = []
+        for size in (37, 63, 1, 99, 200, 13):
+            codes.extend(await allocator.allocate_many(session, ["https://example.com"] * size))
+        return codes
+
+    codes = asyncio.run(allocate())
+
+    assert len(set(codes)) == len(codes) == 413
+    assert [allocator.permutation.decode(code) for code in codes] == list(range(100, 513))
+    assert allocator.blocks_leased == 5
+
+def test_block_past_the_keyspace_is_refused():
+    allocator = ShortCodeAllocator(length=2, block_size=100)
+    session = SequenceSession(start=allocator.permutation.space // 100)
+
+    with pytest.raises(ValueError):
+        asyncio.run(allocator.allocate(session, "https://example.com"))
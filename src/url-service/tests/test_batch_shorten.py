@@ -0,0 +1,54 @@
+import pytest
+from app.core.safe_browsing import safe_browsing_service
+from app.database import create_session
+from app.models.url import Url
+from sqlmodel import select
+
+async def fetch_statuses(url_ids: list) -> dict:
+    async with create_session() as session:
+        rows = (await session.exec(select(Url.id, Url.safety_check_status).where(Url.id.in_(url_ids)))).all()
+        return {url_id: status for url_id, status in rows}
+
+@pytest.fixture
+def safety_verdicts(monkeypatch):
+    verdicts = {}
+
+    async def check_urls_safety(urls, use_cache=True):
+        return {
+            url: verdicts.get(url, {"is_safe": True, "threats": [], "details": "No threats detected"})
+            for url in urls
+        }
+
+    monkeypatch.setattr(safe_browsing_service, "check_urls_safety", check_urls_safety)
+    return verdicts
+
+def test_batch_and_single_create_store_the_same_safety_status(client, run, safety_verdicts):
+    failed_url = "https://example.com/safety-lookup-failed"
+    safety_verdicts[failed_url] = {"is_safe": True, "threats": [], "details": "Safe Browsing API error", "error": True}
+
+    single = client.post("/shorten", json={"original_url": failed_url}).json()
+    batch = client.post("/shorten/batch", json={"urls": [
+        {"original_url": failed_url},
+        {"original_url": "https://example.com/safety-ok"}
+    ]}).json()
+
+    failed_id, safe_id = (result["url"]["id"] for result in batch["results"])
+    statuses = run(fetch_statuses, [single["id"], failed_id, safe_id])
+    assert statuses[single["id"]] == "error"
+    assert statuses[failed_id] == statuses[single["id"]]
+    assert statuses[safe_id] == "safe"
+
+def test_batch_reports_unsafe_items(client, safety_verdicts):
+    unsafe_url = "https://example.com/safety-malware"
+    safety_verdicts[unsafe_url] = {"is_safe": False, "threats": ["MALWARE"], "details": "Threats detected"}
+
+    response = client.post("/shorten/batch", json={"urls": [
+        {"original_url": unsafe_url},
+        {"original_url": "https://example.com/safety-fine"}
+    ]})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["created"] == 1 and body["failed"] == 1
+    assert body["results"][0]["error"].startswith("URL flagged as unsafe")
+    assert body["results"][1]["url"]["safety_check_status"] == "safe"
@@ -0,0 +1,54 @@
+import asyncio
+import httpx
+import pytest
+from app.core.click_events import ClickEventShipper
+from app.core.http_clients import upstream_clients
+
+def make_event(url_id: int, event_id: str) -> dict:
+    return {"event_id": event_id, "url_id": url_id, "user_id": None, "user_agent": "test", "referer": "", "ip_address": "127.0.0.1"}
+
+@pytest.fixture
+def analytics(monkeypatch):
+    requests = []
+    responses = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        response = responses.pop(0) if responses else httpx.Response(200, json={"accepted": 0})
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    client = httpx.AsyncClient(base_url="http://analytics", transport=httpx.MockTransport(handler))
+    monkeypatch.setitem(upstream_clients._clients, "analytics", client)
+    return requests, responses
+
+def test_read_timeouts_are_retried_with_same_event_ids(analytics):
+    requests, responses = analytics
+    responses.append(httpx.ReadTimeout("timed out"))
+    shipper = ClickEventShipper(max_retries=3, retry_backoff=0)
+
+    assert asyncio.run(shipper._send([make_event(1, "a")], retries=3)) is True
+    assert len(requests) == 2
+    assert requests[0].content == requests[1].content
+    assert shipper.retries == 1 and shipper.dropped == 0
+
+def test_batch_is_dropped_after_the_last_timeout(analytics):
+    requests, responses = analytics
+    responses.extend([httpx.ReadTimeout("timed out")] * 4)
+    shipper = ClickEventShipper(max_retries=3, retry_backoff=0)
+
+    assert asyncio.run(shipper._send([make_event(1, "a"), make_event(2, "b")], retries=3)) is False
+    assert len(requests) == 4
+    assert shipper.batches_failed == 1 and shipper.dropped == 2
+
+def test_server_errors_are_retried_with_same_event_ids(analytics):
+    requests, responses = analytics
+    responses.extend([httpx.Response(503), httpx.ConnectError("refused")])
+    shipper = ClickEventShipper(max_retries=3, retry_backoff=0)
+
+    assert asyncio.run(shipper._send([make_event(1, "a"), make_event(2, "b")], retries=3)) is True
+    assert len(requests) == 3
+    assert shipper.retries == 2
+    bodies = {request.content for request in requests}
+    assert len(bodies) == 1
@@ -0,0 +1,40 @@
+import pytest
+from sqlalchemy import insert
+from app.database import create_session
+from app.models.url import Url
+from tests.conftest import TEST_USER_ID
+
+DOMAIN = "clicks.example"
+PATHS = ["/my", "/admin/urls"]
+
+async def seed_clicked_links() -> None:
+    async with create_session() as session:
+        await session.execute(insert(Url), [
+            {"original_url": f"https://{DOMAIN}/{clicks}", "domain": DOMAIN, "short_code": f"clk{clicks}",
+             "user_id": TEST_USER_ID, "click_count": clicks}
+            for clicks in range(10)
+        ])
+        await session.commit()
+
+@pytest.fixture(scope="module")
+def clicked_links(run):
+    run(seed_clicked_links)
+
+@pytest.mark.parametrize("path", PATHS)
+@pytest.mark.parametrize("sort", ["created_at", "clicks"])
+def test_click_filters_count_the_whole_filtered_set(client, clicked_links, click_sync_enabled, path, sort):
+    params = {"domain": DOMAIN, "min_clicks": 3, "max_clicks": 8, "limit": 2, "sort": sort}
+    pages = [client.get(path, params=params).json()]
+    while pages[-1]["next_cursor"]:
+        pages.append(client.get(path, params={**params, "cursor": pages[-1]["next_cursor"]}).json())
+
+    assert [page["total"] for page in pages] == [6, 6, 6]
+    assert sorted(url["click_count"] for page in pages for url in page["urls"]) == [3, 4, 5, 6, 7, 8]
+
+@pytest.mark.parametrize("path", PATHS)
+@pytest.mark.parametrize("params", [{"min_clicks": 3}, {"max_clicks": 8}, {"sort": "clicks"}])
+def test_click_filters_need_click_sync(client, path, params):
+    response = client.get(path, params={"domain": DOMAIN, **params})
+    assert response.status_code == 400
+    assert "CLICK_SYNC_ENABLED" in response.json()["detail"]
+    assert client.get(path, params={"domain": DOMAIN}).status_code == 200
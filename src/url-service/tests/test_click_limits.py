@@ -0,0 +1,35 @@
+import asyncio
+from app.crud.counter import ACTIVE_URLS, get_counter
+from app.crud.url import decrement_clicks_count, get_url_by_id
+from app.database import create_session
+
+REMAINING_CLICKS = 5
+EXTRA_CLICKS = 3
+
+async def active_counter() -> int:
+    async with create_session() as session:
+        return await get_counter(session, *ACTIVE_URLS)
+
+async def click(url_id: int) -> bool:
+    async with create_session() as session:
+        return await decrement_clicks_count(session, await get_url_by_id(session, url_id))
+
+async def click_concurrently(url_id: int) -> list:
+    return await asyncio.gather(*(click(url_id) for _ in range(REMAINING_CLICKS + EXTRA_CLICKS)))
+
+async def load(url_id: int):
+    async with create_session() as session:
+        return await get_url_by_id(session, url_id)
+
+def test_concurrent_clicks_never_exceed_the_limit(client, run):
+    created = client.post("/shorten", json={"original_url": "https://example.com/limited", "remaining_clicks": REMAINING_CLICKS})
+    assert created.status_code == 200, created.text
+    url_id = created.json()["id"]
+    active_before = run(active_counter)
+
+    results = run(click_concurrently, url_id)
+
+    assert results.count(True) == REMAINING_CLICKS
+    url = run(load, url_id)
+    assert url.remaining_clicks == 0 and not url.is_active
+    assert run(active_counter) == active_before - 1
@@ -0,0 +1,94 @@
+import asyncio
+import itertools
+from sqlalchemy.exc import OperationalError
+from app.api import admin
+from app.core.counters import CounterReconciler
+from app.core.safe_browsing import safe_browsing_service
+from app.crud.counter import get_all_counters, increment_counters, url_created_deltas
+from app.crud.url import get_url_by_id
+from app.database import create_session
+from app.models.url import Url
+from tests.conftest import TEST_USER_ID
+
+SCAN_USER_ID = 4242
+
+codes = itertools.count()
+
+async def create_link(user_id: int = TEST_USER_ID) -> int:
+    async with create_session() as session:
+        url = Url(original_url=f"https://counters.example/{next(codes)}", domain="counters.example", short_code=f"ctr{next(codes)}", user_id=user_id)
+        session.add(url)
+        await increment_counters(session, url_created_deltas([url]))
+        await session.commit()
+        return url.id
+
+async def is_active(url_id: int) -> bool:
+    async with create_session() as session:
+        return (await get_url_by_id(session, url_id)).is_active
+
+async def counter_drift() -> dict:
+    async with create_session() as session:
+        stored = await get_all_counters(session)
+        counts = await CounterReconciler().count_urls(session)
+    return {key: stored.get(key, 0) - counts.get(key, 0) for key in stored.keys() | counts.keys() if stored.get(key, 0) != counts.get(key, 0)}
+
+async def reconcile_while_creating() -> None:
+    reconciler = CounterReconciler()
+    count_urls = reconciler.count_urls
+    writers = []
+
+    async def count_urls_during_writes(session):
+        counts = await count_urls(session)
+        writers.extend(asyncio.create_task(create_link()) for _ in range(3))
+        await asyncio.sleep(0.2)
+        return counts
+
+    reconciler.count_urls = count_urls_during_writes
+    await create_link()
+    async with create_session() as session:
+        await reconciler.reconcile(session)
+    await asyncio.gather(*writers)
+
+def test_reconcile_keeps_increments_committed_meanwhile(run):
+    run(reconcile_while_creating)
+    assert run(counter_drift) == {}
+
+def test_reconcile_retries_lock_conflicts(run):
+    reconciler = CounterReconciler()
+    reconcile_once = reconciler._reconcile_once
+    attempts = []
+
+    async def conflicting_once(session):
+        attempts.append(session)
+        if len(attempts) == 1:
+            raise OperationalError("UPDATE counters", {}, Exception("database is locked"))
+        return await reconcile_once(session)
+
+    reconciler._reconcile_once = conflicting_once
+
+    async def reconcile():
+        async with create_session() as session:
+            return await reconciler.reconcile(session)
+
+    run(reconcile)
+    assert len(attempts) == 2
+    assert reconciler.retries == 1 and reconciler.runs == 1
+    assert run(counter_drift) == {}
+
+def test_security_scan_commits_each_chunk(client, run, monkeypatch):
+    url_ids = [run(create_link, SCAN_USER_ID) for _ in range(2)]
+    seen_active = []
+
+    async def check_urls_safety(urls, use_cache=True):
+        # The deactivation from the previous chunk is visible to other sessions during the next lookup
+        seen_active.append(await is_active(url_ids[0]))
+        return {url: {"is_safe": len(seen_active) > 1, "threats": ["MALWARE"], "details": "Threats detected"} for url in urls}
+
+    monkeypatch.setattr(safe_browsing_service, "check_urls_safety", check_urls_safety)
+    monkeypatch.setattr(admin, "SAFE_BROWSING_BATCH_SIZE", 1)
+    response = client.post("/admin/urls/security-scan", params={"user_id": SCAN_USER_ID})
+
+    assert response.status_code == 200, response.text
+    assert response.json()["deactivated_count"] == 1
+    assert seen_active == [True, False]
+    assert run(counter_drift) == {}
@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta, timezone
+from sqlmodel import select
+from app.core.utils import to_naive_utc
+from app.database import create_session
+from app.models.url import Url
+
+async def fetch_url(url_id: int) -> Url:
+    async with create_session() as session:
+        return (await session.exec(select(Url).where(Url.id == url_id))).first()
+
+def test_to_naive_utc():
+    assert to_naive_utc(None) is None
+    assert to_naive_utc(datetime(2030, 1, 1, 12)) == datetime(2030, 1, 1, 12)
+    offset = timezone(timedelta(hours=3))
+    assert to_naive_utc(datetime(2030, 1, 1, 12, tzinfo=offset)) == datetime(2030, 1, 1, 9)
+
+def test_shorten_stores_naive_utc_expiry(client, run):
+    response = client.post("/shorten", json={
+        "original_url": "https://example.com/expiry-single",
+        "expires_at": "2030-01-01T12:00:00+03:00"
+    })
+    assert response.status_code == 200, response.text
+    expires_at = run(fetch_url, response.json()["id"]).expires_at
+    assert expires_at.tzinfo is None
+    assert expires_at == datetime(2030, 1, 1, 9)
+
+def test_batch_shorten_stores_naive_utc_expiry(client, run):
+    response = client.post("/shorten/batch", json={"urls": [
+        {"original_url": "https://example.com/expiry-batch", "expires_at": "2030-01-01T12:00:00Z"}
+    ]})
+    assert response.status_code == 200, response.text
+    result = response.json()["results"][0]
+    assert result["error"] is None
+    expires_at = run(fetch_url, result["url"]["id"]).expires_at
+    assert expires_at.tzinfo is None
+    assert expires_at == datetime(2030, 1, 1, 12)
+
+def test_update_stores_naive_utc_expiry(client, run):
+    url_id = client.post("/shorten", json={"original_url": "https://example.com/expiry-update"}).json()["id"]
+    response = client.put(f"/{url_id}", json={"expires_at": "2030-06-01T00:30:00+01:00"})
+    assert response.status_code == 200, response.text
+    expires_at = run(fetch_url, url_id).expires_at
+    assert expires_at.tzinfo is None
+    assert expires_at == datetime(2030, 5, 31, 23, 30)
+
+def test_listings_accept_utc_date_filters(client):
+    url_id = client.post("/shorten", json={"original_url": "https://example.com/created-filter"}).json()["id"]
+    created_from = (datetime.utcnow() - timedelta(hours=1)).strftime("%Y-%m-%dT%H:%M:%SZ")
+    created_to = (datetime.utcnow() + timedelta(hours=1)).strftime("%Y-%m-%dT%H:%M:%SZ")
+    params = {"created_from": created_from, "created_to": created_to, "limit": 100}
+
+    response = client.get("/my", params=params)
+    assert response.status_code == 200, response.text
+    assert url_id in [url["id"] for url in response.json()["urls"]]
+
+    response = client.get("/admin/urls", params=params)
+    assert response.status_code == 200, response.text
+    assert url_id in [url["id"] for url in response.json()["urls"]]
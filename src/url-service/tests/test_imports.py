@@ -0,0 +1,50 @@
+import asyncio
+from app.core.imports import parse_rows
+
+CSV = (
+    '﻿original_url,password,user_id\r\n'
+    'https://example.com/one,,1\r\n'
+    '\r\n'
+    'https://example.com/two,"multi\r\nline ""secret""",1\r\n'
+    'https://example.com/three,"a,b",1\n'
+    'https://example.com/four,1\n'
+    'not a url,,1\n'
+    'https://example.com/five,"never closed,1\n'
+    'https://example.com/six,,1\n'
+).encode()
+
+async def parse(format: str, body: bytes, chunk_size: int) -> list:
+    async def chunks():
+        for i in range(0, len(body), chunk_size):
+            yield body[i:i + chunk_size]
+    return [row async for row in parse_rows(format, chunks())]
+
+def test_csv_fields_may_span_lines_and_chunks():
+    for chunk_size in (1, 7, len(CSV)):
+        rows = asyncio.run(parse("csv", CSV, chunk_size))
+
+        assert [line_number for line_number, _, _, _ in rows] == [2, 4, 6, 7, 8, 9]
+        one, two, three, four, invalid, unterminated = rows
+        assert str(one[2].original_url) == "https://example.com/one" and one[2].user_id == 1
+        assert two[2].password == 'multi\nline "secret"'
+        assert three[2].password == "a,b"
+        assert four[2] is None and four[3] == "Expected 3 columns, got 2"
+        assert invalid[2] is None and "original_url" in invalid[3]
+        assert unterminated[2] is None and unterminated[3] == "Unterminated quoted field"
+        assert unterminated[1].endswith("example.com/six,,1")
+
+def test_ndjson_rows_are_parsed_per_line():
+    body = b'{"original_url": "https://example.com/a", "user_id": 2}\n\nnot json\n[1]\n'
+    rows = asyncio.run(parse("ndjson", body, 5))
+
+    assert [(line_number, row is not None) for line_number, _, row, _ in rows] == [(1, True), (3, False), (4, False)]
+    assert rows[1][3].startswith("Invalid JSON") and rows[2][3] == "Row must be an object"
+
+def test_import_endpoint_reports_failed_rows(client):
+    body = 'original_url,password,user_id\nhttps://example.com/imported,"two\nlines",1\n"not a\nurl",,1\n'
+    job = client.post("/admin/imports", params={"format": "csv"}, content=body.encode()).json()
+
+    assert job["status"] == "completed"
+    assert (job["processed"], job["created"], job["failed"]) == (2, 1, 1)
+    report = client.get(job["failed_rows_url"])
+    assert report.status_code == 200 and "not a" in report.text
@@ -0,0 +1,69 @@
+import base64
+import json
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import insert
+from app.database import create_session
+from app.models.url import Url
+from tests.conftest import TEST_USER_ID
+
+DOMAIN = "cursors.example"
+PATHS = ["/my", "/admin/urls"]
+SORTS = ["created_at", "clicks"]
+
+pytestmark = pytest.mark.usefixtures("click_sync_enabled")
+
+def cursor_for(payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+async def seed_links() -> None:
+    created_at = datetime(2024, 1, 1)
+    async with create_session() as session:
+        # Pairs share created_at and click_count so pages also break ties on id
+        await session.execute(insert(Url), [
+            {"original_url": f"https://{DOMAIN}/{index}", "domain": DOMAIN, "short_code": f"cur{index}",
+             "user_id": TEST_USER_ID, "created_at": created_at + timedelta(minutes=index // 2), "click_count": index // 2}
+            for index in range(7)
+        ])
+        await session.commit()
+
+@pytest.fixture(scope="module")
+def links(run):
+    run(seed_links)
+
+@pytest.mark.parametrize("path", PATHS)
+@pytest.mark.parametrize("sort", SORTS)
+def test_cursor_pages_cover_the_listing_once(client, links, path, sort):
+    params = {"domain": DOMAIN, "sort": sort}
+    expected = [url["id"] for url in client.get(path, params=params).json()["urls"]]
+    pages = [client.get(path, params={**params, "limit": 2}).json()]
+    while pages[-1]["next_cursor"]:
+        pages.append(client.get(path, params={**params, "limit": 2, "cursor": pages[-1]["next_cursor"]}).json())
+
+    assert len(expected) == 7 and len(pages) == 4
+    assert [url["id"] for page in pages for url in page["urls"]] == expected
+    assert all(page["total"] == 7 for page in pages)
+
+@pytest.mark.parametrize("path", PATHS)
+@pytest.mark.parametrize("cursor", [
+    "not a cursor",
+    "bm90IGpzb24",
+    cursor_for({"sort": "created_at"}),
+    cursor_for(["created_at", "yesterday", 1]),
+    cursor_for(["created_at", None, 1]),
+    cursor_for(["clicks", "many", 1]),
+    cursor_for(["clicks", 10 ** 30, 1]),
+    cursor_for(["clicks", 1, 2 ** 63]),
+    "WyJjbGlja3MiLCAxZTQwMCwgMV0"
+])
+def test_malformed_cursors_are_rejected(client, links, path, cursor):
+    response = client.get(path, params={"domain": DOMAIN, "sort": "clicks", "cursor": cursor})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+@pytest.mark.parametrize("path", PATHS)
+def test_cursor_is_bound_to_its_sort_order(client, links, path):
+    cursor = client.get(path, params={"domain": DOMAIN, "sort": "created_at", "limit": 2}).json()["next_cursor"]
+    response = client.get(path, params={"domain": DOMAIN, "sort": "clicks", "cursor": cursor})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
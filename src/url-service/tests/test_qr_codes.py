@@ -0,0 +1,19 @@
+import pytest
+
+@pytest.fixture(scope="module")
+def url_id(client):
+    return client.post("/shorten", json={"original_url": "https://example.com/qr-code"}).json()["id"]
+
+@pytest.mark.parametrize("format", ["png", "svg"])
+def test_qr_code_revalidates_with_if_none_match(client, url_id, format):
+    response = client.get(f"/{url_id}/qr", params={"format": format})
+    etag = response.headers["etag"]
+    assert response.status_code == 200 and response.content
+
+    for if_none_match in (etag, f"W/{etag}", f'"stale", {etag}', "*"):
+        revalidated = client.get(f"/{url_id}/qr", params={"format": format}, headers={"If-None-Match": if_none_match})
+        assert revalidated.status_code == 304, if_none_match
+        assert revalidated.headers["etag"] == etag
+
+    changed = client.get(f"/{url_id}/qr", params={"format": format, "size": 5}, headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["etag"] != etag
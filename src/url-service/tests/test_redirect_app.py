@@ -0,0 +1,25 @@
+from fastapi.testclient import TestClient
+from app.core import lifecycle
+from app.core.bloom import short_code_filter
+from app.core.click_events import ClickEventShipper
+from app.database import create_session
+from app.models.url import Url
+from app.redirect_app import RedirectApp
+
+async def create_url_elsewhere(short_code: str) -> None:
+    async with create_session() as session:
+        session.add(Url(original_url=f"https://example.com/{short_code}", short_code=short_code, user_id=1))
+        await session.commit()
+
+def test_standalone_app_finds_links_created_after_startup(client, monkeypatch):
+    monkeypatch.setattr(short_code_filter, "enabled", True)
+    monkeypatch.setattr(lifecycle, "background_tasks", [])
+    monkeypatch.setattr(lifecycle, "click_event_shipper", ClickEventShipper())
+    with TestClient(RedirectApp()) as redirect_client:
+        redirect_client.portal.call(create_url_elsewhere, "standalone1")
+        response = redirect_client.get("/standalone1", follow_redirects=False)
+        missing = redirect_client.get("/standalone-missing", follow_redirects=False)
+
+    assert response.status_code == 301
+    assert response.headers["location"] == "https://example.com/standalone1"
+    assert missing.status_code == 404
@@ -0,0 +1,95 @@
+import asyncio
+import pytest
+from app.core import safe_browsing
+from app.core.safe_browsing import SafeBrowsingService
+
+LOOKUP = "/threatMatches:find"
+
+@pytest.fixture
+def service(safe_browsing_server):
+    service = SafeBrowsingService()
+    service.api_key = "test-key"
+    service.enabled = True
+    return service
+
+def looked_up(server) -> list:
+    return [[entry["url"] for entry in body["threatInfo"]["threatEntries"]] for body in server.requests_to(LOOKUP)]
+
+def test_lookups_are_deduplicated_and_batched(service, safe_browsing_server, monkeypatch):
+    monkeypatch.setattr(safe_browsing, "SAFE_BROWSING_BATCH_SIZE", 2)
+    safe_browsing_server.unsafe_urls["https://d.example/"] = "MALWARE"
+    urls = [f"https://{name}.example/" for name in "abcde"]
+
+    results = asyncio.run(service.check_urls_safety(urls + ["https://a.example/"]))
+
+    assert looked_up(safe_browsing_server) == [urls[0:2], urls[2:4], urls[4:5]]
+    assert set(results) == set(urls)
+    assert results["https://d.example/"]["threats"] == ["MALWARE"]
+    assert all(results[url]["is_safe"] for url in urls if url != "https://d.example/")
+
+def test_canonical_forms_share_a_cached_verdict(service, safe_browsing_server):
+    async def check():
+        await service.check_url_safety("HTTPS://Example.COM:443/path#top")
+        await service.check_url_safety("https://example.com/path")
+        await service.check_url_safety("https://example.com./path")
+        await service.check_url_safety("https://example.com:8443/path")
+
+    asyncio.run(check())
+
+    assert looked_up(safe_browsing_server) == [["HTTPS://Example.COM:443/path#top"], ["https://example.com:8443/path"]]
+    assert service.cache_hits == 2
+
+def test_unsafe_host_root_covers_the_whole_host(service, safe_browsing_server):
+    safe_browsing_server.unsafe_urls["https://evil.example/"] = "SOCIAL_ENGINEERING"
+
+    async def check():
+        return (
+            await service.check_url_safety("https://evil.example/"),
+            await service.check_url_safety("https://EVIL.example/login?next=1")
+        )
+
+    root, page = asyncio.run(check())
+
+    assert not root["is_safe"] and not page["is_safe"]
+    assert page["threats"] == ["SOCIAL_ENGINEERING"]
+    assert len(looked_up(safe_browsing_server)) == 1
+
+def test_unsafe_path_does_not_cover_the_host(service, safe_browsing_server):
+    safe_browsing_server.unsafe_urls["https://mixed.example/bad"] = "MALWARE"
+
+    async def check():
+        return (
+            await service.check_url_safety("https://mixed.example/bad"),
+            await service.check_url_safety("https://mixed.example/good"),
+            await service.check_url_safety("https://mixed.example/bad?utm=1")
+        )
+
+    bad, good, bad_with_query = asyncio.run(check())
+
+    assert not bad["is_safe"]
+    assert good["is_safe"] and bad_with_query["is_safe"]
+    assert len(looked_up(safe_browsing_server)) == 3
+
+def test_failed_lookups_are_not_cached(service, safe_browsing_server):
+    safe_browsing_server.status = 503
+
+    async def check():
+        failed = await service.check_url_safety("https://flaky.example/")
+        safe_browsing_server.status = 200
+        return failed, await service.check_url_safety("https://flaky.example/")
+
+    failed, retried = asyncio.run(check())
+
+    assert failed["error"] and "error" not in retried
+    assert len(looked_up(safe_browsing_server)) == 2
+
+def test_inputs_submitted_as_the_same_entry_share_its_verdict(service, safe_browsing_server):
+    safe_browsing_server.unsafe_urls["https://evil.example/x"] = "MALWARE"
+    urls = ["evil.example/x", "https://evil.example/x", "https://safe.example/"]
+
+    results = asyncio.run(service._lookup_chunk(urls))[0]
+
+    assert looked_up(safe_browsing_server) == [["https://evil.example/x", "https://safe.example/"]]
+    assert results["evil.example/x"]["threats"] == ["MALWARE"]
+    assert results["https://evil.example/x"]["threats"] == ["MALWARE"]
+    assert results["https://safe.example/"]["is_safe"]
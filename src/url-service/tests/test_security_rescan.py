@@ -0,0 +1,55 @@
+import pytest
+from sqlmodel import select
+from app.config import SECURITY_RESCAN_RETRY_DELAY
+from app.core.safe_browsing import safe_browsing_service
+from app.core.security_rescan import SecurityRescanJob
+from app.database import create_session
+from app.models.url import Url
+
+FAILED = {"is_safe": True, "threats": [], "details": "Safe Browsing API error", "error": True}
+
+@pytest.fixture
+def failing_urls(monkeypatch):
+    failing = set()
+
+    async def check_urls_safety(urls, use_cache=True):
+        return {
+            url: FAILED if url in failing else {"is_safe": True, "threats": [], "details": "No threats detected"}
+            for url in urls
+        }
+
+    monkeypatch.setattr(safe_browsing_service, "check_urls_safety", check_urls_safety)
+    return failing
+
+async def fetch_checks(url_ids: list) -> dict:
+    async with create_session() as session:
+        rows = (await session.exec(select(Url.id, Url.safety_check_status, Url.safety_check_at).where(Url.id.in_(url_ids)))).all()
+        return {url_id: (status, checked_at) for url_id, status, checked_at in rows}
+
+async def run_chunk(job: SecurityRescanJob) -> int:
+    async with create_session() as session:
+        return await job.run_chunk(session)
+
+def test_failed_lookups_stay_due_and_hold_the_cursor(client, run, failing_urls):
+    urls = [f"https://example.com/rescan-{index}" for index in range(3)]
+    failing_urls.update(urls)
+    created = client.post("/shorten/batch", json={"urls": [{"original_url": url} for url in urls]}).json()
+    first_id, failed_id, last_id = (result["url"]["id"] for result in created["results"])
+    assert all(checked_at is None for _, checked_at in run(fetch_checks, [first_id, failed_id, last_id]).values())
+
+    failing_urls.difference_update({urls[0], urls[2]})
+    job = SecurityRescanJob()
+    run(run_chunk, job)
+
+    checks = run(fetch_checks, [first_id, failed_id, last_id])
+    assert checks[failed_id] == ("error", None)
+    assert checks[first_id][1] is not None and checks[last_id][1] is not None
+    assert job.cursor["id"] == first_id
+    assert job.failed_chunks == 1 and job.retry_delay() == SECURITY_RESCAN_RETRY_DELAY
+
+    failing_urls.clear()
+    run(run_chunk, job)
+
+    assert run(fetch_checks, [failed_id])[failed_id][0] == "safe"
+    assert job.cursor["id"] == failed_id and job.failed_chunks == 0
+    assert run(run_chunk, job) == 0 and job.passes == 1
@@ -0,0 +1,45 @@
+from sqlalchemy import insert
+from app.core import bloom
+from app.core.bloom import ShortCodeFilter
+from app.crud import url as url_crud
+from app.crud.url import get_url_by_short_code_cached
+from app.database import create_session
+from app.models.url import Url
+from tests.conftest import TEST_USER_ID
+
+async def insert_link(short_code: str) -> None:
+    # Stands in for a link created by another worker, which never reaches this process's filter
+    async with create_session() as session:
+        await session.execute(insert(Url), [{"original_url": "https://example.com/filter", "short_code": short_code, "user_id": TEST_USER_ID}])
+        await session.commit()
+
+async def resolve(short_code: str):
+    async with create_session() as session:
+        return await get_url_by_short_code_cached(session, short_code)
+
+async def rebuild(short_code_filter: ShortCodeFilter) -> None:
+    async with create_session() as session:
+        await short_code_filter.rebuild(session)
+
+def test_filter_is_off_by_default():
+    assert not bloom.short_code_filter.enabled
+    assert not ShortCodeFilter().ready
+
+def test_code_created_after_the_filter_was_built_resolves(run):
+    run(rebuild, bloom.short_code_filter)
+    run(insert_link, "fltrother")
+
+    url = run(resolve, "fltrother")
+    assert url is not None and url.short_code == "fltrother"
+
+def test_enabled_filter_admits_codes_created_in_this_process(client, run, monkeypatch):
+    short_code_filter = ShortCodeFilter(enabled=True)
+    monkeypatch.setattr(url_crud, "short_code_filter", short_code_filter)
+    run(rebuild, short_code_filter)
+
+    created = client.post("/shorten", json={"original_url": "https://example.com/filter", "custom_code": "fltrlocal"})
+    assert created.status_code == 200, created.text
+
+    assert run(resolve, "fltrlocal") is not None
+    assert run(resolve, "fltrmissing") is None
+    assert short_code_filter.rejected == 1
@@ -0,0 +1,114 @@
+import os
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import update
+from app.core import redirects
+from app.core.snapshot import (
+    DELTA_MAGIC, HEADER, SnapshotReader, compact_tombstones, decode_tombstones, delta_path, delta_paths,
+    export_snapshot, next_sequence, redirect_snapshot, tombstone_log_path, write_atomically, write_tombstones
+)
+from app.crud import url as url_crud
+from app.crud.url import deactivate_expired_urls
+from app.database import create_session
+from app.models.url import Url
+
+async def export(path: str) -> int:
+    async with create_session() as session:
+        return await export_snapshot(session, path)
+
+async def expire(url_id: int) -> list:
+    async with create_session() as session:
+        await session.execute(update(Url).where(Url.id == url_id).values(expires_at=datetime.utcnow() - timedelta(seconds=1)))
+        return await deactivate_expired_urls(session, datetime.utcnow(), url_ids=[url_id])
+
+@pytest.fixture
+def snapshot_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "redirects.snap")
+    monkeypatch.setattr(redirect_snapshot, "path", path)
+    yield path
+    if redirect_snapshot.reader is not None:
+        redirect_snapshot.reader.close()
+        redirect_snapshot.reader = None
+
+def replica_get(path: str, short_code: str):
+    reader = SnapshotReader(path)
+    try:
+        reader.apply_new_deltas()
+        return reader.get(short_code)
+    finally:
+        reader.close()
+
+def test_deactivated_link_is_not_served_from_snapshot(client, run, snapshot_path):
+    created = client.post("/shorten", json={"original_url": "https://example.com/snapshot-deactivate"}).json()
+    run(export, snapshot_path)
+    redirect_snapshot.load()
+    assert client.get(f"/{created['short_code']}", follow_redirects=False).status_code == 301
+    assert redirect_snapshot.get(created["short_code"]) is not None
+
+    assert client.patch(f"/{created['id']}/deactivate").status_code == 200
+
+    assert client.get(f"/{created['short_code']}", follow_redirects=False).status_code == 410
+    assert replica_get(snapshot_path, created["short_code"]) is None
+
+def test_updated_link_is_tombstoned(client, run, snapshot_path):
+    created = client.post("/shorten", json={"original_url": "https://example.com/snapshot-update"}).json()
+    run(export, snapshot_path)
+    assert replica_get(snapshot_path, created["short_code"]) is not None
+
+    assert client.put(f"/{created['id']}", json={"password": "secret"}).status_code == 200
+    assert replica_get(snapshot_path, created["short_code"]) is None
+
+def test_expired_link_is_tombstoned(client, run, snapshot_path):
+    created = client.post("/shorten", json={"original_url": "https://example.com/snapshot-expire"}).json()
+    run(export, snapshot_path)
+    assert replica_get(snapshot_path, created["short_code"]) is not None
+
+    assert run(expire, created["id"]) == [created["short_code"]]
+    assert replica_get(snapshot_path, created["short_code"]) is None
+
+def test_full_export_keeps_newer_deltas_and_tombstones(client, run, snapshot_path):
+    created = client.post("/shorten", json={"original_url": "https://example.com/snapshot-newer"}).json()
+    future = next_sequence() + 3600 * 10 ** 9
+    older_delta = delta_path(snapshot_path, next_sequence())
+    newer_delta = delta_path(snapshot_path, future)
+    for path in (older_delta, newer_delta):
+        write_atomically(path, iter([HEADER.pack(DELTA_MAGIC, 0)]))
+    write_tombstones(snapshot_path, ["oldcode1"])
+    write_tombstones(snapshot_path, [created["short_code"]], sequence=future)
+
+    run(export, snapshot_path)
+
+    with open(tombstone_log_path(snapshot_path), "rb") as log_file:
+        frames = [(sequence, codes) for sequence, codes, _, _ in decode_tombstones(log_file.read())]
+    assert frames == [(future, [created["short_code"]])]
+    assert delta_paths(snapshot_path) == [newer_delta]
+    assert replica_get(snapshot_path, created["short_code"]) is None
+
+def test_invalidations_append_to_one_tombstone_log(client, run, snapshot_path):
+    created = [client.post("/shorten", json={"original_url": f"https://example.com/snapshot-log/{i}"}).json() for i in range(3)]
+    run(export, snapshot_path)
+    redirect_snapshot.load()
+    replica = SnapshotReader(snapshot_path)
+    try:
+        for url in created:
+            assert client.patch(f"/{url['id']}/deactivate").status_code == 200
+            replica.apply_new_deltas()
+            assert replica.get(url["short_code"]) is None
+
+        assert sorted(os.listdir(os.path.dirname(snapshot_path))) == ["redirects.snap", "redirects.snap.tombstones"]
+        assert len(replica.applied_tombstones) == 3
+
+        compact_tombstones(snapshot_path, 0)
+        assert replica.apply_new_deltas() == 0
+    finally:
+        replica.close()
+
+def test_click_limited_link_needs_the_database(client, run, snapshot_path, monkeypatch):
+    created = client.post("/shorten", json={"original_url": "https://example.com/snapshot-limited", "remaining_clicks": 5}).json()
+    run(export, snapshot_path)
+    redirect_snapshot.load()
+    monkeypatch.setattr(url_crud, "REDIRECT_SNAPSHOT_DB_FALLBACK", False)
+    monkeypatch.setattr(redirects, "REDIRECT_SNAPSHOT_DB_FALLBACK", False)
+
+    assert client.get(f"/{created['short_code']}", follow_redirects=False).status_code == 503
+    assert client.get("/nosuchcode", follow_redirects=False).status_code == 404
@@ -0,0 +1,102 @@
+import asyncio
+import time
+import pytest
+from app.core import safe_browsing
+from app.core.safe_browsing import SafeBrowsingService
+from app.core.threat_db import MIN_CACHE_DURATION, ThreatDatabase
+from tests.safe_browsing_server import full_hash, full_update
+
+EVIL = full_hash("evil.example/")
+SAFE = full_hash("safe.example/")
+
+@pytest.fixture
+def database(safe_browsing_server):
+    database = ThreatDatabase()
+    database.api_key = "test-key"
+    return database
+
+def update_states(server) -> list:
+    return [
+        {request["threatType"]: request["state"] for request in body["listUpdateRequests"]}
+        for body in server.requests_to("/threatListUpdates:fetch")
+    ]
+
+def test_listed_url_is_confirmed_with_full_hashes(database, safe_browsing_server):
+    safe_browsing_server.list_updates["MALWARE"] = full_update([EVIL[:4], SAFE[:4]])
+    safe_browsing_server.full_hashes[EVIL] = "MALWARE"
+
+    async def check():
+        await database.update()
+        return await database.check_urls(["http://evil.example/", "http://safe.example/", "http://other.example/"])
+
+    results = asyncio.run(check())
+
+    assert database.ready
+    assert results == {"http://evil.example/": ["MALWARE"], "http://safe.example/": [], "http://other.example/": []}
+    assert len(safe_browsing_server.requests_to("/fullHashes:find")) == 1
+
+def test_checksum_mismatch_falls_back_to_lookup_api(database, safe_browsing_server, monkeypatch):
+    monkeypatch.setattr(safe_browsing, "threat_database", database)
+    service = SafeBrowsingService()
+    service.api_key = "test-key"
+    service.enabled = True
+    safe_browsing_server.unsafe_urls["http://evil.example/"] = "MALWARE"
+    safe_browsing_server.full_hashes[EVIL] = "MALWARE"
+
+    async def check():
+        safe_browsing_server.list_updates["MALWARE"] = full_update([EVIL[:4]], checksum=b"\0" * 32)
+        await database.update()
+        mismatched = (database.ready, await service.check_urls_safety(["http://evil.example/"], use_cache=False))
+
+        safe_browsing_server.list_updates["MALWARE"] = full_update([EVIL[:4]], state="state-2")
+        await database.update()
+        return mismatched, await service.check_urls_safety(["http://evil.example/"], use_cache=False)
+
+    (ready, fallback), resynced = asyncio.run(check())
+
+    assert not ready
+    assert fallback["http://evil.example/"]["threats"] == ["MALWARE"]
+    assert len(safe_browsing_server.requests_to("/threatMatches:find")) == 1
+    assert database.ready
+    assert update_states(safe_browsing_server)[1]["MALWARE"] == ""
+    assert resynced["http://evil.example/"]["threats"] == ["MALWARE"]
+    assert len(safe_browsing_server.requests_to("/fullHashes:find")) == 1
+
+def test_missing_cache_durations_still_expire(database, safe_browsing_server):
+    safe_browsing_server.list_updates["MALWARE"] = full_update([EVIL[:4], SAFE[:4]])
+    safe_browsing_server.full_hashes[EVIL] = "MALWARE"
+    safe_browsing_server.cache_duration = None
+    safe_browsing_server.negative_cache_duration = "0s"
+
+    async def check():
+        await database.update()
+        await database.check_urls(["http://evil.example/", "http://safe.example/"])
+        await database.check_urls(["http://evil.example/", "http://safe.example/"])
+
+    asyncio.run(check())
+
+    expiries = [database.full_hash_cache._entries[EVIL][1], database.negative_cache._entries[SAFE[:4]][1]]
+    assert all(expires_at is not None for expires_at in expiries)
+    assert all(expires_at <= time.monotonic() + MIN_CACHE_DURATION for expires_at in expiries)
+    assert len(safe_browsing_server.requests_to("/fullHashes:find")) == 1
+
+def test_listed_prefix_is_not_negative_cached(database, safe_browsing_server):
+    safe_browsing_server.list_updates["MALWARE"] = full_update([EVIL[:4], SAFE[:4]])
+    safe_browsing_server.full_hashes[EVIL] = "MALWARE"
+    safe_browsing_server.cache_duration = "60s"
+    safe_browsing_server.negative_cache_duration = "3600s"
+
+    async def check():
+        await database.update()
+        first = await database.check_urls(["http://evil.example/", "http://safe.example/"])
+        # The positive entry expires or is evicted long before the negative one
+        database.full_hash_cache.invalidate(EVIL)
+        return first, await database.check_urls(["http://evil.example/", "http://safe.example/"])
+
+    first, second = asyncio.run(check())
+
+    assert first == second == {"http://evil.example/": ["MALWARE"], "http://safe.example/": []}
+    assert database.negative_cache.get(EVIL[:4]) is None
+    assert database.negative_cache.get(SAFE[:4])
+    confirms = safe_browsing_server.requests_to("/fullHashes:find")
+    assert len(confirms) == 2 and len(confirms[1]["threatInfo"]["threatEntries"]) == 1